@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Con la variable ADS_ASYNC_VIEWS definida, el camino de entrega de anuncios se
+sirve con vistas asíncronas (ver "Despliegue ASGI" en el README):
+
+    ADS_ASYNC_VIEWS=1 uvicorn AdSystem.asgi:application --workers 4
 """
 
 import os
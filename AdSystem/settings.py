@@ -205,3 +205,107 @@ LOGIN_REDIRECT_URL = "ads:ad_statistics"
 # URL a la que se redirigirá a los usuarios después de cerrar sesión.
 # Generalmente, se redirige de nuevo a la página de inicio de sesión o a la página principal.
 LOGOUT_REDIRECT_URL = "ads:login"
+
+# -------------------------------------------------------------
+# Configuración del motor de entrega de anuncios
+# -------------------------------------------------------------
+
+# Segundos tras los cuales cada proceso reconstruye por completo su índice de
+# elegibilidad en memoria (las señales sólo actualizan el proceso que guarda).
+ADS_INDEX_MAX_AGE = int(os.getenv("ADS_INDEX_MAX_AGE", "300"))
+
+# Modo de selección aleatoria de anuncios: "weighted" respeta `Ad.delivery_weight`,
+# "uniform" da la misma probabilidad a todos los candidatos.
+ADS_SELECTION_MODE = os.getenv("ADS_SELECTION_MODE", "weighted")
+
+# Milisegundos entre escrituras del búfer de contadores de impresiones y clics.
+# Con 0 cada incremento se escribe inmediatamente.
+ADS_COUNTER_FLUSH_INTERVAL = int(os.getenv("ADS_COUNTER_FLUSH_INTERVAL", "1000"))
+
+# Milisegundos entre inserciones en lote de eventos (impresiones y clics) y tamaño
+# máximo del búfer antes de que la propia solicitud lo vacíe.
+ADS_EVENT_FLUSH_INTERVAL = int(os.getenv("ADS_EVENT_FLUSH_INTERVAL", "1000"))
+ADS_EVENT_BUFFER_MAX = int(os.getenv("ADS_EVENT_BUFFER_MAX", "50000"))
+
+# Ventana (segundos) en la que un segundo clic de la misma sesión en el mismo
+# anuncio se descarta, y número máximo de claves que se recuerdan por proceso.
+ADS_CLICK_DEDUP_SECONDS = int(os.getenv("ADS_CLICK_DEDUP_SECONDS", "5"))
+ADS_CLICK_DEDUP_MAX_KEYS = int(os.getenv("ADS_CLICK_DEDUP_MAX_KEYS", "100000"))
+
+# Perfil de despliegue ASGI (uvicorn): con la variable ADS_ASYNC_VIEWS definida,
+# la decisión de anuncios, la redirección de clics y la API de anuncios y del
+# detalle de carruseles se sirven con vistas asíncronas. WhiteNoise sólo funciona
+# de forma síncrona y obligaría a ejecutar cada solicitud en un hilo, así que en
+# este perfil los archivos estáticos los sirve el proxy inverso o un CDN.
+ADS_ASYNC_VIEWS = "ADS_ASYNC_VIEWS" in os.environ
+if ADS_ASYNC_VIEWS:
+    MIDDLEWARE.remove("whitenoise.middleware.WhiteNoiseMiddleware")
+
+# Número máximo de espacios que se pueden pedir en una solicitud de anuncios por lote.
+ADS_BATCH_MAX_SLOTS = int(os.getenv("ADS_BATCH_MAX_SLOTS", "12"))
+
+# Caché HTTP de las respuestas derivadas del catálogo (carruseles, esquema de la API):
+# segundos que el cliente puede reutilizarlas sin revalidar y segundos adicionales en
+# los que puede servir la copia vieja mientras revalida en segundo plano.
+ADS_CATALOG_MAX_AGE = int(os.getenv("ADS_CATALOG_MAX_AGE", "60"))
+ADS_CATALOG_STALE_WHILE_REVALIDATE = int(os.getenv("ADS_CATALOG_STALE_WHILE_REVALIDATE", "300"))
+
+# Control de gasto de las campañas con precio: milisegundos entre conciliaciones
+# del gasto en memoria con la base de datos, segundos de gasto que se permiten en
+# ráfaga y número de procesos que sirven anuncios (el ritmo se reparte entre ellos).
+ADS_PACING_RECONCILE_INTERVAL = int(os.getenv("ADS_PACING_RECONCILE_INTERVAL", "5000"))
+ADS_PACING_BURST_SECONDS = int(os.getenv("ADS_PACING_BURST_SECONDS", "300"))
+ADS_PACING_WORKERS = int(os.getenv("ADS_PACING_WORKERS", "1"))
+
+# Topes de frecuencia por sesión: ventana en horas, número de intervalos en que se
+# divide (su resolución) y memoria fija en bytes y filas del sketch que los cuenta.
+ADS_FREQUENCY_WINDOW_HOURS = int(os.getenv("ADS_FREQUENCY_WINDOW_HOURS", "24"))
+ADS_FREQUENCY_BUCKETS = int(os.getenv("ADS_FREQUENCY_BUCKETS", "8"))
+ADS_FREQUENCY_SKETCH_MEMORY = int(os.getenv("ADS_FREQUENCY_SKETCH_MEMORY", str(16 * 1024 * 1024)))
+ADS_FREQUENCY_SKETCH_DEPTH = int(os.getenv("ADS_FREQUENCY_SKETCH_DEPTH", "4"))
+
+# Filtro de tráfico inválido: archivo con rangos IP bloqueados (un CIDR por línea,
+# p. ej. los de centros de datos) y número de veredictos recientes que se recuerdan.
+ADS_IVT_IP_RANGES_FILE = os.getenv("ADS_IVT_IP_RANGES_FILE", "")
+ADS_IVT_CACHE_SIZE = int(os.getenv("ADS_IVT_CACHE_SIZE", "100000"))
+
+# Ingesta de conversiones: filas por transacción de `bulk_create` y token que los
+# anunciantes deben enviar en la cabecera X-Ads-Token (vacío: se rechazan todos).
+ADS_CONVERSION_CHUNK_SIZE = int(os.getenv("ADS_CONVERSION_CHUNK_SIZE", "1000"))
+ADS_CONVERSION_TOKEN = os.getenv("ADS_CONVERSION_TOKEN", "")
+
+# Ventana (horas) de la atribución por último clic: una conversión se atribuye al
+# último clic de su sesión ocurrido como mucho este tiempo antes.
+ADS_ATTRIBUTION_LOOKBACK_HOURS = int(os.getenv("ADS_ATTRIBUTION_LOOKBACK_HOURS", "168"))
+
+# Segundos que espera una conversión antes de atribuirse, para que los clics que
+# siguen en el búfer de escritura se inserten antes (mayor que ADS_EVENT_FLUSH_INTERVAL).
+ADS_ATTRIBUTION_DELAY_SECONDS = int(os.getenv("ADS_ATTRIBUTION_DELAY_SECONDS", "60"))
+
+# Segundos que se guardan en caché los resultados de estadísticas de rangos que
+# incluyen el día en curso (los de días cerrados se guardan sin caducidad). Se
+# invalidan solos cuando `update_rollups` incorpora eventos nuevos de hoy.
+ADS_STATS_CACHE_TIMEOUT = int(os.getenv("ADS_STATS_CACHE_TIMEOUT", "300"))
+
+# Filas que las exportaciones de eventos leen de la base de datos en cada lote.
+ADS_EXPORT_CHUNK_SIZE = int(os.getenv("ADS_EXPORT_CHUNK_SIZE", "5000"))
+
+# Puntos por defecto y máximos de las series temporales de la API de estadísticas
+# (las series más largas se reducen en el servidor).
+ADS_STATS_DEFAULT_POINTS = int(os.getenv("ADS_STATS_DEFAULT_POINTS", "500"))
+ADS_STATS_MAX_POINTS = int(os.getenv("ADS_STATS_MAX_POINTS", "5000"))
+
+# Filas que cuentan como mucho los listados de eventos del admin (clics, impresiones,
+# conversiones); con más, el total y el número de páginas son aproximados.
+ADS_ADMIN_COUNT_LIMIT = int(os.getenv("ADS_ADMIN_COUNT_LIMIT", "10000"))
+
+# -------------------------------------------------------------
+# Configuración de Django REST Framework
+# -------------------------------------------------------------
+
+REST_FRAMEWORK = {
+    # Los endpoints de listado se paginan para que el coste de serialización
+    # dependa del tamaño de la página y no del inventario total.
+    "DEFAULT_PAGINATION_CLASS": "ads.pagination.StandardPagination",
+    "PAGE_SIZE": 10,
+}
@@ -18,7 +18,8 @@ from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path, re_path
 from django.conf.urls.static import static
-
+from django.views.decorators.cache import cache_control, cache_page
+from django.middleware.http import ConditionalGetMiddleware
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
@@ -36,12 +37,39 @@ schema_view = get_schema_view(
    permission_classes=(permissions.AllowAny,),
 )
 
+# El esquema sólo cambia con un despliegue: se guarda en la caché del servidor
+# y se sirve con ETag para que los clientes revaliden con un 304.
+SCHEMA_CACHE_TIMEOUT = 60 * 60
+
+
+# No se usa el `cache_timeout` de drf_yasg porque añade cabeceras "no-cache"
+# que impiden la revalidación en el navegador.
+def _schema(renderer=None):
+    view = schema_view.without_ui() if renderer is None else schema_view.with_ui(renderer)
+    view = cache_page(SCHEMA_CACHE_TIMEOUT)(view)
+
+    @cache_control(
+        public=True,
+        max_age=settings.ADS_CATALOG_MAX_AGE,
+        stale_while_revalidate=settings.ADS_CATALOG_STALE_WHILE_REVALIDATE,
+    )
+    def schema(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        # Se renderiza aquí para calcular el ETag también sobre las respuestas
+        # que devuelve la caché, y responder 304 si el cliente ya las tiene.
+        if hasattr(response, "render"):
+            response = response.render()
+        return ConditionalGetMiddleware(lambda request: response)(request)
+
+    return schema
+
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('ads/', include('ads.urls')),
-    re_path(r'^swagger(?P<format>\.json|\.yaml)$/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    re_path(r'^swagger(?P<format>\.json|\.yaml)$/', _schema(), name='schema-json'),
+    path('swagger/', _schema('swagger'), name='schema-swagger-ui'),
+    path('redoc/', _schema('redoc'), name='schema-redoc'),
 ]
 
 
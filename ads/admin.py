@@ -2,7 +2,24 @@
 from django.contrib import admin
 from django.db.models import Count
 
-from .models import Ad, Click, Carousel, Keyword, Campaign, Conversion
+from .models import Ad, Click, Carousel, Keyword, Campaign, Conversion, Impression
+from .pagination import EstimatedCountPaginator
+
+
+class EventAdmin(admin.ModelAdmin):
+    """
+    Base de los listados de eventos (clics, impresiones, conversiones), que
+    pueden tener millones de filas: el anuncio se trae con un JOIN, el total
+    es un conteo acotado (ver EstimatedCountPaginator) en vez de un
+    `COUNT(*)` exacto y la jerarquía de fechas sólo consulta la primera y la
+    última fecha. Al navegar por la jerarquía, el filtro es un rango sobre
+    `timestamp` que aprovecha su índice.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    date_hierarchy = "timestamp"
+    change_list_template = "admin/ads/event_change_list.html"
+    list_select_related = ("ad",)
 
 
 @admin.register(Campaign)
@@ -15,11 +32,14 @@ class CampaignAdmin(admin.ModelAdmin):
         "start_date",
         "end_date",
         "budget",
+        "pricing_model",
+        "bid",
+        "spent",
         "is_active",
     )
-    list_filter = ("is_active", "start_date", "end_date")
+    list_filter = ("is_active", "pricing_model", "start_date", "end_date")
     search_fields = ("name", "target_audience")
-    readonly_fields = ("created_at", "updated_at")
+    readonly_fields = ("spent", "created_at", "updated_at")
 
 
 @admin.register(Ad)
@@ -41,12 +61,17 @@ class AdAdmin(admin.ModelAdmin):
         "display_end_time",
         "display_days_of_week",
         "ab_test_group",
+        "delivery_weight",
     )
     list_filter = ("is_active", "created_at", "target_gender", "campaign", "display_days_of_week", "ab_test_group")
+    list_select_related = ("campaign",)
     search_fields = ("name", "target_url", "target_location")
-    readonly_fields = ("created_at", "updated_at", "total_clicks", "total_impressions")
+    readonly_fields = (
+        "created_at", "updated_at", "total_clicks", "total_impressions",
+        "invalid_clicks", "invalid_impressions",
+    )
     fieldsets = (
-        (None, {"fields": ("campaign", "name", "image", "target_url", "is_active")}),
+        (None, {"fields": ("campaign", "name", "image", "target_url", "is_active", "delivery_weight", "frequency_cap")}),
         (
             "Segmentación de Audiencia",
             {
@@ -81,7 +106,14 @@ class AdAdmin(admin.ModelAdmin):
         (
             "Información Adicional",
             {
-                "fields": ("total_clicks", "total_impressions", "created_at", "updated_at"),
+                "fields": (
+                    "total_clicks",
+                    "total_impressions",
+                    "invalid_clicks",
+                    "invalid_impressions",
+                    "created_at",
+                    "updated_at",
+                ),
                 "classes": ("collapse",),
             },
         ),
@@ -102,25 +134,9 @@ class AdAdmin(admin.ModelAdmin):
 
     image_tag.short_description = "Imagen"
 
-    def get_queryset(self, request):
-        """
-        Optimiza el queryset para incluir el conteo de clics.
-        """
-        queryset = super().get_queryset(request)
-        return queryset.annotate(click_count=Count("clicks"))
-
-    def total_clicks(self, obj):
-        """
-        Muestra el conteo de clics para cada anuncio en el listado.
-        """
-        return obj.click_count
-
-    total_clicks.admin_order_field = "click_count"
-    total_clicks.short_description = "Total de Clicks"
-
 
 @admin.register(Click)
-class ClickAdmin(admin.ModelAdmin):
+class ClickAdmin(EventAdmin):
     """
     Configuración de la administración para el modelo Click.
     """
@@ -160,6 +176,7 @@ class CarouselAdmin(admin.ModelAdmin):
 
     list_display = ("name", "campaign", "is_active", "ad_count", "created_at", "updated_at")
     list_filter = ("is_active", "campaign")
+    list_select_related = ("campaign",)
     search_fields = ("name",)
     filter_horizontal = (
         "ads",
@@ -176,13 +193,20 @@ class CarouselAdmin(admin.ModelAdmin):
         ),
     )
 
+    def get_queryset(self, request):
+        """
+        Cuenta los anuncios de todos los carruseles en la misma consulta.
+        """
+        return super().get_queryset(request).annotate(ads_total=Count("ads"))
+
     def ad_count(self, obj):
         """
         Muestra el número de anuncios en el carrusel.
         """
-        return obj.ads.count()
+        return obj.ads_total
 
     ad_count.short_description = "Número de Anuncios"
+    ad_count.admin_order_field = "ads_total"
 
 
 @admin.register(Keyword)
@@ -196,11 +220,30 @@ class KeywordAdmin(admin.ModelAdmin):
 
 
 @admin.register(Conversion)
-class ConversionAdmin(admin.ModelAdmin):
+class ConversionAdmin(EventAdmin):
     """
     Configuración de la administración para el modelo Conversion.
     """
-    list_display = ("ad", "conversion_type", "value", "timestamp", "session_id")
+    list_display = ("ad", "conversion_type", "value", "timestamp", "session_id", "event_id")
     list_filter = ("conversion_type", "timestamp", "ad")
-    search_fields = ("ad__name", "conversion_type", "session_id")
+    search_fields = ("ad__name", "conversion_type", "session_id", "event_id")
     readonly_fields = ("timestamp",)
+
+
+@admin.register(Impression)
+class ImpressionAdmin(EventAdmin):
+    """
+    Configuración de la administración para el modelo Impression.
+    """
+    list_display = ("ad", "timestamp", "session_hash_hex")
+    list_filter = ("timestamp",)
+    search_fields = ("ad__name",)
+    readonly_fields = ("ad", "timestamp", "session_hash")
+
+    def session_hash_hex(self, obj):
+        """
+        Muestra el hash de sesión en hexadecimal.
+        """
+        return bytes(obj.session_hash).hex() if obj.session_hash else "-"
+
+    session_hash_hex.short_description = "Hash de Sesión"
@@ -0,0 +1,35 @@
+from ads.analytics.ab import ab_test_report, analyze_ab_tests
+from ads.analytics.caching import (
+    bump_statistics_version,
+    cached_periods,
+    cached_statistic,
+    statistics_cache,
+)
+from ads.analytics.attribution import reset_attribution, update_attribution
+from ads.analytics.hll import STANDARD_ERROR, HyperLogLog, merge_sketches
+from ads.analytics.ranges import date_range_q, day_start
+from ads.analytics.reports import ad_ranking, downsample, merge_timelines, ranking_rows, timeline
+from ads.analytics.rollups import get_watermarks, update_rollups
+
+__all__ = [
+    "ab_test_report",
+    "analyze_ab_tests",
+    "bump_statistics_version",
+    "cached_periods",
+    "cached_statistic",
+    "statistics_cache",
+    "STANDARD_ERROR",
+    "HyperLogLog",
+    "merge_sketches",
+    "date_range_q",
+    "day_start",
+    "ad_ranking",
+    "downsample",
+    "merge_timelines",
+    "ranking_rows",
+    "timeline",
+    "get_watermarks",
+    "update_rollups",
+    "reset_attribution",
+    "update_attribution",
+]
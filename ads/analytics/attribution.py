@@ -0,0 +1,230 @@
+import datetime
+import heapq
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ads.analytics.caching import bump_statistics_version, statistics_changed
+from ads.models import AdHourlyAttributionStats, Click, Conversion, RollupWatermark
+
+# Nombre de la marca de agua (último id de conversión atribuido) en RollupWatermark.
+WATERMARK = "attribution"
+
+# Con el mismo timestamp, el clic se procesa antes que la conversión.
+_CLICK, _CONVERSION = 0, 1
+
+# Sesiones por consulta de clics (usa el índice (session_id, timestamp)).
+SESSION_BATCH = 500
+
+
+def lookback():
+    """
+    Ventana de atribución: una conversión se atribuye al último clic de la
+    misma sesión ocurrido como mucho este tiempo antes.
+    """
+    return datetime.timedelta(hours=getattr(settings, "ADS_ATTRIBUTION_LOOKBACK_HOURS", 168))
+
+
+def settle_delay():
+    """
+    Antigüedad mínima de una conversión para atribuirla: deja tiempo a que los
+    búferes de escritura (`ADS_EVENT_FLUSH_INTERVAL`) inserten sus clics.
+    """
+    return datetime.timedelta(seconds=getattr(settings, "ADS_ATTRIBUTION_DELAY_SECONDS", 60))
+
+
+def attribute(conversions, clicks, window):
+    """
+    Atribución por último clic sobre dos flujos ordenados por timestamp.
+
+    `conversions` son tuplas (timestamp, id, session_id, tipo, valor) y
+    `clicks` tuplas (timestamp, id, ad_id, session_id). Se recorren mezclados
+    en orden temporal guardando sólo el último clic de cada sesión dentro de
+    la ventana; como los clics llegan en orden, el diccionario está ordenado
+    por antigüedad y los vencidos se descartan desde el principio. La memoria
+    depende de las sesiones activas en la ventana, no del total de clics.
+    Produce pares (conversión, ad_id del clic).
+    """
+    last_clicks = OrderedDict()
+    stream = heapq.merge(
+        ((click[0], _CLICK, click) for click in clicks),
+        ((conversion[0], _CONVERSION, conversion) for conversion in conversions),
+        key=lambda event: event[:2],
+    )
+    for moment, kind, event in stream:
+        horizon = moment - window
+        while last_clicks:
+            session, (clicked_at, _) = next(iter(last_clicks.items()))
+            if clicked_at >= horizon:
+                break
+            del last_clicks[session]
+        if kind == _CLICK:
+            session = event[3]
+            last_clicks.pop(session, None)
+            last_clicks[session] = (moment, event[2])
+        else:
+            last = last_clicks.get(event[2])
+            if last is not None:
+                yield event, last[1]
+
+
+def _segments(conversions, window):
+    """
+    Divide las conversiones (ordenadas) en tramos separados por más de la
+    ventana, para leer sólo los clics que pueden atribuirse a alguna.
+    """
+    segment = []
+    for conversion in conversions:
+        if segment and conversion[0] - segment[-1][0] > window:
+            yield segment
+            segment = []
+        segment.append(conversion)
+    if segment:
+        yield segment
+
+
+def _session_batches(segment):
+    """
+    Divide un tramo de conversiones por sesiones en grupos de `SESSION_BATCH`:
+    la atribución de cada sesión es independiente de las demás.
+    """
+    by_session = {}
+    for conversion in segment:
+        by_session.setdefault(conversion[2], []).append(conversion)
+    sessions = sorted(by_session)
+    for offset in range(0, len(sessions), SESSION_BATCH):
+        batch = sessions[offset:offset + SESSION_BATCH]
+        conversions = sorted(
+            (conversion for session in batch for conversion in by_session[session]),
+            key=lambda row: row[:2],
+        )
+        yield batch, conversions
+
+
+def session_clicks(sessions, start, end):
+    """
+    Clics de las sesiones entre `start` y `end` (inclusive) en orden temporal,
+    como tuplas (timestamp, id, ad_id, session_id). Usa el índice
+    `ads_click_session_ts_idx` (ver el comando check_query_plans).
+    """
+    return (
+        Click.objects.filter(session_id__in=sessions, timestamp__gte=start, timestamp__lte=end)
+        .order_by("timestamp", "pk")
+        .values_list("timestamp", "pk", "ad_id", "session_id")
+    )
+
+
+def _settled(rows, cutoff, now):
+    """
+    Prefijo (por id) de las conversiones que ya pueden atribuirse: se detiene
+    en la primera posterior a `cutoff`, cuyos clics pueden seguir en un búfer.
+    Las de fecha futura no detienen la marca de agua.
+    """
+    for position, row in enumerate(rows):
+        if cutoff < row[0] <= now:
+            return rows[:position]
+    return rows
+
+
+def _hour(moment):
+    return moment.astimezone(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _add_totals(totals):
+    """
+    Suma los conteos {(ad_id, hora, tipo): (conversiones, valor)} a la tabla resumen.
+    """
+    if not totals:
+        return
+    existing = {
+        (row.ad_id, row.hour, row.conversion_type): row
+        for row in AdHourlyAttributionStats.objects.filter(
+            ad_id__in={ad_id for ad_id, _, _ in totals},
+            hour__in={hour for _, hour, _ in totals},
+        )
+    }
+    created, changed = [], []
+    for key, (count, value) in totals.items():
+        row = existing.get(key)
+        if row is None:
+            ad_id, hour, conversion_type = key
+            created.append(
+                AdHourlyAttributionStats(
+                    ad_id=ad_id,
+                    hour=hour,
+                    conversion_type=conversion_type,
+                    conversions=count,
+                    conversion_value=value,
+                )
+            )
+        else:
+            row.conversions += count
+            row.conversion_value += value
+            changed.append(row)
+    AdHourlyAttributionStats.objects.bulk_update(changed, ["conversions", "conversion_value"])
+    AdHourlyAttributionStats.objects.bulk_create(created)
+
+
+def update_attribution(batch_size=50000):
+    """
+    Atribuye las conversiones nuevas desde la marca de agua y acumula el
+    resultado en `AdHourlyAttributionStats`.
+
+    Cada pasada toma como mucho `batch_size` conversiones por id (así también
+    se atribuyen las que llegan tarde con fecha antigua), las ordena por
+    timestamp y, por grupos de sesiones, las cruza con el flujo ordenado de
+    los clics de esas sesiones en su intervalo (más la ventana hacia atrás),
+    sin ningún JOIN entre tablas. El resumen y la marca de agua se escriben
+    en la misma transacción, así que cada conversión se cuenta una sola vez.
+
+    La marca de agua va `settle_delay()` por detrás del momento actual: las
+    conversiones más recientes esperan a la siguiente ejecución para que los
+    clics que aún están en los búferes de escritura se tengan en cuenta. Un
+    clic insertado después de atribuir su conversión ya no la cambia.
+    Retorna el número de conversiones atribuidas.
+    """
+    window = lookback()
+    attributed = 0
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            mark, _ = RollupWatermark.objects.select_for_update().get_or_create(source=WATERMARK)
+            fetched = list(
+                Conversion.objects.filter(pk__gt=mark.last_id)
+                .order_by("pk")
+                .values_list("timestamp", "pk", "session_id", "conversion_type", "value")[:batch_size]
+            )
+            rows = _settled(fetched, now - settle_delay(), now)
+            if not rows:
+                return attributed
+            conversions = sorted((row for row in rows if row[2]), key=lambda row: row[:2])
+            totals = {}
+            for segment in _segments(conversions, window):
+                for sessions, batch in _session_batches(segment):
+                    clicks = session_clicks(sessions, batch[0][0] - window, batch[-1][0])
+                    for conversion, ad_id in attribute(batch, clicks.iterator(chunk_size=5000), window):
+                        key = (ad_id, _hour(conversion[0]), conversion[3])
+                        count, value = totals.get(key, (0, Decimal(0)))
+                        totals[key] = (count + 1, value + (conversion[4] or 0))
+            _add_totals(totals)
+            hours = [hour for _, hour, _ in totals]
+            transaction.on_commit(lambda: statistics_changed(hours))
+            mark.last_id = rows[-1][1]
+            mark.save(update_fields=["last_id", "updated_at"])
+            attributed += sum(count for count, _ in totals.values())
+        if len(fetched) < batch_size or len(rows) < len(fetched):
+            return attributed
+
+
+def reset_attribution():
+    """
+    Borra los resultados y la marca de agua para volver a atribuir todo
+    (p. ej. después de cambiar la ventana).
+    """
+    with transaction.atomic():
+        AdHourlyAttributionStats.objects.all().delete()
+        RollupWatermark.objects.filter(source=WATERMARK).delete()
+    bump_statistics_version()
@@ -0,0 +1,252 @@
+"""
+Caché de resultados de las estadísticas (panel y API).
+
+Cada resultado se guarda en la caché de Django con una clave formada por el
+nombre de la consulta, sus parámetros normalizados y una versión de los datos:
+
+* Rangos cerrados (terminan antes del día UTC en curso): la versión es
+  `statistics_version()`, que sólo cambia cuando `update_rollups` o
+  `update_attribution` recalculan un día pasado (eventos que llegan tarde).
+  Se guardan sin caducidad.
+* Rangos abiertos (incluyen hoy o no tienen fecha final): la versión incluye
+  además `recent_version()`, que cambia cada vez que se incorporan eventos
+  del día en curso. Caducan, como mucho, a los `ADS_STATS_CACHE_TIMEOUT`
+  segundos.
+
+Ambas versiones viven en la propia caché, así que una consulta servida desde
+la caché no toca la base de datos. Las estadísticas que se pueden sumar por
+periodos (`cached_periods`) guardan además por separado la parte cerrada de
+un rango abierto: al llegar eventos nuevos sólo se vuelve a leer el día en curso.
+
+Las solicitudes idénticas concurrentes comparten un único cálculo: dentro del
+proceso esperan al que ya está en curso y, entre procesos, quien no obtiene
+el turno (una clave con `cache.add`) espera a que aparezca el resultado.
+"""
+import datetime
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from ads.catalog import catalog_version
+
+STATISTICS_VERSION_KEY = "ads:statistics-version"
+RECENT_VERSION_KEY = "ads:statistics-recent-version"
+
+# Segundos que un proceso reserva un cálculo y frecuencia con la que los demás
+# comprueban si ya terminó.
+COMPUTE_LEASE = 60
+POLL_INTERVAL = 0.05
+
+_MISSING = object()
+
+
+def _version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time(), None)
+        version = cache.get(key)
+    return version
+
+
+def statistics_version():
+    """
+    Versión de los datos de días ya cerrados (ver `catalog_version`).
+    """
+    return _version(STATISTICS_VERSION_KEY)
+
+
+def recent_version():
+    """
+    Versión de los datos del día UTC en curso.
+    """
+    return _version(RECENT_VERSION_KEY)
+
+
+def bump_statistics_version():
+    """
+    Invalida los resultados guardados de rangos cerrados (y, con ellos, los
+    de rangos abiertos, cuya clave también la incluye).
+    """
+    cache.set(STATISTICS_VERSION_KEY, time.time(), None)
+
+
+def bump_recent_version():
+    """
+    Invalida los resultados guardados de rangos que incluyen el día en curso.
+    """
+    cache.set(RECENT_VERSION_KEY, time.time(), None)
+
+
+def _utc_today():
+    return timezone.now().astimezone(datetime.timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def statistics_changed(moments):
+    """
+    Invalida los resultados afectados por los instantes recalculados (días u
+    horas): los rangos cerrados si alguno es anterior al día UTC en curso y
+    los abiertos si alguno pertenece a él.
+    """
+    today = _utc_today()
+    moments = list(moments)
+    if any(moment < today for moment in moments):
+        bump_statistics_version()
+    elif moments:
+        bump_recent_version()
+
+
+def _last_closed_date():
+    """
+    Último día local cuyo final no pasa del inicio del día UTC en curso.
+    """
+    return timezone.localdate(_utc_today()) - datetime.timedelta(days=1)
+
+
+def _is_closed(end_date):
+    return bool(end_date) and end_date <= _last_closed_date()
+
+
+def split_range(start_date=None, end_date=None):
+    """
+    Divide el rango en su parte cerrada y su parte abierta (la que incluye
+    hoy): ((inicio, fin) o None, (inicio, fin) o None).
+    """
+    last_closed = _last_closed_date()
+    if end_date and end_date <= last_closed:
+        return (start_date, end_date), None
+    if start_date and start_date > last_closed:
+        return None, (start_date, end_date)
+    return (start_date, last_closed), (last_closed + datetime.timedelta(days=1), end_date)
+
+
+def _normalize(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def cache_key(name, params, end_date=None):
+    """
+    Clave del resultado: nombre, versión de los datos y parámetros (sin los
+    vacíos, en orden) resumidos con SHA-1.
+    """
+    if _is_closed(end_date):
+        version = f"c{statistics_version()}"
+    else:
+        version = f"o{statistics_version()}.{recent_version()}"
+    normalized = sorted(
+        (key, _normalize(value)) for key, value in params.items() if value not in (None, "")
+    )
+    digest = hashlib.sha1(repr((version, catalog_version(), normalized)).encode()).hexdigest()
+    return f"ads:stats:{name}:{digest}"
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class StatisticsCache:
+    """
+    Guarda resultados de consultas de estadísticas y agrupa los cálculos
+    concurrentes de una misma clave.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, name, params, compute, end_date=None):
+        """
+        Resultado de `compute()` para la consulta `name` con `params`; si el
+        rango termina en `end_date` antes de hoy, se guarda sin caducidad.
+        """
+        closed = _is_closed(end_date)
+        key = cache_key(name, params, end_date)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._compute_shared(key, compute, closed)
+            return flight.result
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _compute_shared(self, key, compute, closed):
+        lease = f"{key}:lease"
+        deadline = time.monotonic() + COMPUTE_LEASE
+        owner = cache.add(lease, 1, COMPUTE_LEASE)
+        while not owner and time.monotonic() < deadline:
+            # Otro proceso lo está calculando: esperar su resultado.
+            time.sleep(POLL_INTERVAL)
+            value = cache.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            owner = cache.add(lease, 1, COMPUTE_LEASE)
+        try:
+            value = compute()
+            timeout = None if closed else getattr(settings, "ADS_STATS_CACHE_TIMEOUT", 300)
+            cache.set(key, value, timeout)
+            return value
+        finally:
+            if owner:
+                cache.delete(lease)
+
+
+statistics_cache = StatisticsCache()
+
+
+def cached_statistic(name, params, compute, end_date=None):
+    """
+    Atajo de `statistics_cache.get_or_compute`.
+    """
+    return statistics_cache.get_or_compute(name, params, compute, end_date)
+
+
+def cached_periods(name, params, load, combine, start_date=None, end_date=None):
+    """
+    Datos de una estadística que se puede sumar por periodos: `load(inicio,
+    fin)` los lee para un subrango y `combine(partes)` une los de varios. La
+    parte cerrada del rango se guarda como un rango cerrado (sin caducidad);
+    la del día en curso se lee siempre, así que conviene guardar el resultado
+    final con `cached_statistic`.
+    """
+    closed, current = split_range(start_date, end_date)
+    parts = []
+    if closed:
+        parts.append(
+            cached_statistic(
+                name,
+                {**params, "start_date": closed[0], "end_date": closed[1]},
+                lambda: load(*closed),
+                closed[1],
+            )
+        )
+    if current:
+        parts.append(load(*current))
+    return combine(parts)
@@ -0,0 +1,61 @@
+"""
+Reducción de series temporales a un número de puntos para dibujarlas.
+
+`lttb` (Largest-Triangle-Three-Buckets) conserva la forma de la serie
+eligiendo en cada tramo el punto que forma el triángulo de mayor área con
+el elegido en el tramo anterior y la media del siguiente: mantiene picos y
+valles, adecuado para líneas. `bucket_sum` suma los valores en intervalos
+de tiempo de igual anchura: conserva los totales, adecuado para barras.
+"""
+import numpy as np
+
+LTTB = "lttb"
+SUM = "sum"
+METHODS = (LTTB, SUM)
+
+
+def lttb(x, y, points):
+    """
+    Índices (ordenados) de los `points` puntos elegidos de la serie (x, y),
+    con x creciente. Siempre se conservan el primer y el último punto, así
+    que se eligen al menos 3.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    points = max(points, 3)
+    if points >= n:
+        return np.arange(n)
+    # El primer y el último punto se conservan; el resto se reparte en points - 2 tramos.
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        following = slice(end, edges[bucket + 2] if bucket + 2 < len(edges) else n)
+        mean_x, mean_y = x[following].mean(), y[following].mean()
+        area = np.abs(
+            (x[previous] - mean_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (mean_y - y[previous])
+        )
+        previous = start + int(area.argmax())
+        selected[bucket + 1] = previous
+    return selected
+
+
+def bucket_sum(x, y, points):
+    """
+    Suma `y` en `points` intervalos de igual anchura de `x`. Retorna (x, y)
+    de los intervalos con datos, donde x es el primer valor de cada intervalo.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if points >= len(y):
+        return x, y
+    span = (x[-1] - x[0]) or 1.0
+    buckets = np.minimum(((x - x[0]) * points / span).astype(np.int64), points - 1)
+    sums = np.bincount(buckets, weights=y, minlength=points)
+    # x está ordenado, así que los intervalos también: basta el primer índice de cada uno.
+    present, firsts = np.unique(buckets, return_index=True)
+    return x[firsts], sums[present]
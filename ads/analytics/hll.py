@@ -0,0 +1,95 @@
+import hashlib
+import math
+import zlib
+
+# Con p = 11 hay m = 2048 registros de un byte. El error estándar relativo
+# de la estimación es 1.04 / sqrt(m) ≈ 2.3 %: en ~95 % de los casos el valor
+# real está dentro de ±4.6 % del estimado.
+PRECISION = 11
+REGISTERS = 1 << PRECISION
+STANDARD_ERROR = 1.04 / math.sqrt(REGISTERS)
+
+_HASH_BITS = 64
+_RANK_BITS = _HASH_BITS - PRECISION
+_RANK_MASK = (1 << _RANK_BITS) - 1
+_ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+
+
+def _hash64(value):
+    """
+    64 bits uniformes para un valor. Los session_id ya son SHA-256 en
+    hexadecimal, así que se aprovechan directamente sin volver a hashearlos.
+    """
+    if len(value) == 64:
+        try:
+            return int(value[:16], 16)
+        except ValueError:
+            pass
+    return int.from_bytes(hashlib.sha256(value.encode()).digest()[:8], "big")
+
+
+class HyperLogLog:
+    """
+    Sketch HyperLogLog de tamaño fijo para contar elementos distintos.
+
+    Dos sketches se combinan tomando el máximo registro a registro, así que
+    los únicos de cualquier rango de horas o conjunto de anuncios se obtienen
+    fusionando sus sketches horarios sin volver a leer los clics.
+    """
+    __slots__ = ("registers",)
+
+    def __init__(self, registers=None):
+        self.registers = bytearray(registers or REGISTERS)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Reconstruye un sketch serializado con `to_bytes()`.
+        """
+        return cls(zlib.decompress(bytes(data)))
+
+    def to_bytes(self):
+        """
+        Serialización compacta (los registros vacíos se comprimen bien).
+        """
+        return zlib.compress(bytes(self.registers))
+
+    def add(self, value):
+        if not value:
+            return
+        hashed = _hash64(value)
+        index = hashed >> _RANK_BITS
+        rank = _RANK_BITS - (hashed & _RANK_MASK).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """
+        Incorpora otro sketch a este (unión de conjuntos).
+        """
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def estimate(self):
+        """
+        Número estimado de elementos distintos.
+        """
+        zeros = self.registers.count(0)
+        if zeros == REGISTERS:
+            return 0
+        raw = _ALPHA * REGISTERS * REGISTERS / sum(2.0 ** -r for r in self.registers)
+        if raw <= 2.5 * REGISTERS and zeros:
+            # Corrección para rangos pequeños (linear counting)
+            return round(REGISTERS * math.log(REGISTERS / zeros))
+        return round(raw)
+
+
+def merge_sketches(serialized):
+    """
+    Fusiona una secuencia de sketches serializados en uno solo.
+    """
+    result = HyperLogLog()
+    for data in serialized:
+        if data:
+            result.merge(HyperLogLog.from_bytes(data))
+    return result
@@ -0,0 +1,25 @@
+import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+
+
+def day_start(date):
+    """
+    Inicio (medianoche, con zona horaria) del día indicado.
+    """
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time.min))
+
+
+def date_range_q(field, start_date=None, end_date=None):
+    """
+    Filtro de fechas como rango semiabierto [inicio, fin + 1 día) sobre un campo
+    DateTimeField. A diferencia de `field__date__gte`, la columna no se envuelve
+    en una función, así que la base de datos puede usar su índice (es "sargable").
+    """
+    range_filter = Q()
+    if start_date:
+        range_filter &= Q(**{f"{field}__gte": day_start(start_date)})
+    if end_date:
+        range_filter &= Q(**{f"{field}__lt": day_start(end_date + datetime.timedelta(days=1))})
+    return range_filter
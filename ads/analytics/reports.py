@@ -0,0 +1,172 @@
+"""
+Consultas del panel y de la API de estadísticas sobre los agregados horarios.
+
+El ranking de anuncios se ordena y se corta en SQL (sólo se leen las filas
+de la página pedida) y las series temporales se reducen en el servidor al
+número de puntos que el cliente va a dibujar.
+"""
+import datetime
+
+from django.db.models import F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, TruncDay
+from django.utils import timezone
+
+from ads.analytics.downsampling import SUM, bucket_sum, lttb
+from ads.analytics.hll import HyperLogLog
+from ads.analytics.ranges import date_range_q
+from ads.models import AdHourlyAttributionStats, AdHourlyConversionStats, AdHourlyStats
+
+# Criterios de ordenación del ranking (con "-" delante, descendente).
+RANKING_ORDERINGS = ("clicks", "impressions", "ctr")
+CLICKS, IMPRESSIONS, CONVERSIONS = "clicks", "impressions", "conversions"
+TIMELINE_METRICS = (CLICKS, IMPRESSIONS, CONVERSIONS)
+DAY, HOUR = "day", "hour"
+
+# Las anotaciones no pueden llamarse como los campos del modelo agregado.
+_RANKING_COLUMNS = {"clicks": "total_clicks", "impressions": "total_impressions", "ctr": "ctr"}
+
+
+def ad_ranking(start_date=None, end_date=None, ordering="-clicks"):
+    """
+    Queryset de diccionarios (`ad_id`, `ad__name`, `total_clicks`,
+    `total_impressions`, `ctr` en %) de los anuncios con actividad en el
+    rango, ordenado en la base de datos: al paginarlo o cortarlo (top-K) sólo
+    se leen las filas necesarias. Lanza ValueError si el orden no existe.
+    """
+    column = _RANKING_COLUMNS.get(ordering.lstrip("-"))
+    if column is None:
+        raise ValueError(f"Orden no soportado: {ordering}")
+    order = F(column).desc() if ordering.startswith("-") else F(column).asc()
+    return (
+        AdHourlyStats.objects.filter(date_range_q("hour", start_date, end_date))
+        .values("ad_id", "ad__name")
+        .annotate(total_clicks=Sum("clicks"), total_impressions=Sum("impressions"))
+        .filter(Q(total_clicks__gt=0) | Q(total_impressions__gt=0))
+        .annotate(
+            ctr=Coalesce(
+                Cast("total_clicks", FloatField()) * 100 / NullIf("total_impressions", 0),
+                Value(0.0),
+            )
+        )
+        .order_by(order, "ad_id")
+    )
+
+
+def unique_clicks_by_ad(ad_ids, start_date=None, end_date=None):
+    """
+    Estima los clics únicos de los anuncios fusionando sus sketches horarios.
+    """
+    sketches = {}
+    rows = AdHourlyStats.objects.filter(
+        date_range_q("hour", start_date, end_date),
+        ad_id__in=ad_ids,
+        unique_sketch__isnull=False,
+    ).values_list("ad_id", "unique_sketch")
+    for ad_id, data in rows.iterator():
+        sketches.setdefault(ad_id, HyperLogLog()).merge(HyperLogLog.from_bytes(data))
+    return {ad_id: sketch.estimate() for ad_id, sketch in sketches.items()}
+
+
+def attributed_conversions_by_ad(ad_ids, start_date=None, end_date=None):
+    """
+    Conversiones atribuidas por último clic a los anuncios en el rango, desde
+    el resumen que mantiene `update_attribution` (sin cruzar clics y conversiones).
+    """
+    rows = (
+        AdHourlyAttributionStats.objects.filter(
+            date_range_q("hour", start_date, end_date), ad_id__in=ad_ids
+        )
+        .values("ad_id")
+        .annotate(count=Sum("conversions"))
+        .order_by()
+    )
+    return {row["ad_id"]: row["count"] for row in rows}
+
+
+def ranking_rows(rows, start_date=None, end_date=None):
+    """
+    Completa filas de `ad_ranking` (p. ej. una página) con los clics únicos y
+    las conversiones atribuidas, consultando sólo esos anuncios.
+    """
+    rows = list(rows)
+    ad_ids = [row["ad_id"] for row in rows]
+    unique_clicks = unique_clicks_by_ad(ad_ids, start_date, end_date)
+    attributed = attributed_conversions_by_ad(ad_ids, start_date, end_date)
+    return [
+        {
+            "id": row["ad_id"],
+            "name": row["ad__name"],
+            "clicks": row["total_clicks"],
+            "unique_clicks": unique_clicks.get(row["ad_id"], 0),
+            "impressions": row["total_impressions"],
+            "ctr": round(row["ctr"], 2),
+            "attributed_conversions": attributed.get(row["ad_id"], 0),
+        }
+        for row in rows
+    ]
+
+
+def timeline(metric, start_date=None, end_date=None, granularity=DAY):
+    """
+    Series temporales de `metric` por día u hora: {nombre: (momentos, valores)}.
+    Clics e impresiones forman una sola serie; las conversiones, una por tipo.
+    """
+    if metric == CONVERSIONS:
+        queryset, field, group = AdHourlyConversionStats.objects, "conversions", ("conversion_type",)
+    elif metric in (CLICKS, IMPRESSIONS):
+        queryset, field, group = AdHourlyStats.objects, metric, ()
+    else:
+        raise ValueError(f"Métrica no soportada: {metric}")
+    moment = TruncDay("hour") if granularity == DAY else F("hour")
+    rows = (
+        queryset.filter(date_range_q("hour", start_date, end_date))
+        .annotate(moment=moment)
+        .values(*group, "moment")
+        .annotate(total=Sum(field))
+        .order_by(*group, "moment")
+        .values_list(*group, "moment", "total")
+    )
+    series = {}
+    for row in rows:
+        name = row[0] if group else metric
+        moments, values = series.setdefault(name, ([], []))
+        moments.append(row[-2])
+        values.append(row[-1])
+    return series
+
+
+def merge_timelines(parts):
+    """
+    Une series de `timeline` de periodos consecutivos (en orden) en una sola.
+    """
+    series = {}
+    for part in parts:
+        for name, (moments, values) in part.items():
+            merged_moments, merged_values = series.setdefault(name, ([], []))
+            merged_moments.extend(moments)
+            merged_values.extend(values)
+    return series
+
+
+def downsample(moments, values, points, method=SUM):
+    """
+    Reduce una serie a como mucho `points` puntos: por suma en intervalos de
+    igual duración (`SUM`, conserva los totales) o con LTTB (`LTTB`, conserva
+    la forma). Las series que ya caben se devuelven tal cual.
+    """
+    if len(values) <= points:
+        return moments, values
+    seconds = [moment.timestamp() for moment in moments]
+    if method == SUM:
+        starts, sums = bucket_sum(seconds, values, points)
+        return (
+            [datetime.datetime.fromtimestamp(start, tz=datetime.timezone.utc) for start in starts],
+            [int(total) for total in sums],
+        )
+    selected = lttb(seconds, values, points).tolist()
+    return [moments[index] for index in selected], [values[index] for index in selected]
+
+
+def format_moment(moment, granularity=DAY):
+    moment = timezone.localtime(moment)
+    return moment.strftime("%Y-%m-%d") if granularity == DAY else moment.strftime("%Y-%m-%d %H:%M")
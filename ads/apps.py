@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AdsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ads'
+
+    def ready(self):
+        # Registra los receptores que mantienen al día el índice de elegibilidad.
+        from ads import signals  # noqa: F401
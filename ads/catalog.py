@@ -0,0 +1,113 @@
+import functools
+import inspect
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+CATALOG_VERSION_KEY = "ads:catalog-version"
+
+
+def catalog_version():
+    """
+    Sello de versión del catálogo (anuncios, campañas, palabras clave y
+    carruseles): el instante, en segundos, del último cambio conocido.
+
+    Se guarda en la caché de Django para que todos los procesos lo compartan;
+    con varios procesos la caché debe ser compartida (Redis, Memcached...).
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, time.time(), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+async def acatalog_version():
+    """
+    Versión asíncrona de `catalog_version()` para las vistas ASGI.
+    """
+    version = await cache.aget(CATALOG_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CATALOG_VERSION_KEY, time.time(), None)
+        version = await cache.aget(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """
+    Marca el catálogo como modificado; invalida los ETag emitidos hasta ahora.
+    """
+    cache.set(CATALOG_VERSION_KEY, time.time(), None)
+
+
+def _validators(version, extra):
+    etag = f"{version:.6f}-{extra}" if extra else f"{version:.6f}"
+    return quote_etag(etag), int(version)
+
+
+def _not_modified(request, etag, last_modified):
+    if request.method not in ("GET", "HEAD"):
+        return None
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def _finish(request, response, etag, last_modified):
+    if request.method in ("GET", "HEAD") and response.status_code in (200, 304):
+        response.headers.setdefault("ETag", etag)
+        response.headers.setdefault("Last-Modified", http_date(last_modified))
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=getattr(settings, "ADS_CATALOG_MAX_AGE", 60),
+            stale_while_revalidate=getattr(
+                settings, "ADS_CATALOG_STALE_WHILE_REVALIDATE", 300
+            ),
+        )
+    return response
+
+
+def catalog_cached(etag_func=None):
+    """
+    Decorador para vistas derivadas del catálogo.
+
+    Añade ETag y Last-Modified a partir del sello de versión (más lo que
+    aporte `etag_func`, p. ej. el estado de programación) y responde 304 a
+    las solicitudes condicionales que coinciden sin llegar a ejecutar la vista,
+    es decir, sin tocar el ORM. Las respuestas llevan `Cache-Control` con
+    `max-age` y `stale-while-revalidate`.
+
+    Admite vistas asíncronas; en ellas `etag_func` puede ser una corrutina.
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                extra = etag_func(request, *args, **kwargs) if etag_func else None
+                if inspect.isawaitable(extra):
+                    extra = await extra
+                etag, last_modified = _validators(await acatalog_version(), extra)
+                response = _not_modified(request, etag, last_modified)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _finish(request, response, etag, last_modified)
+
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            extra = etag_func(request, *args, **kwargs) if etag_func else None
+            etag, last_modified = _validators(catalog_version(), extra)
+            response = _not_modified(request, etag, last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return _finish(request, response, etag, last_modified)
+
+        return wrapper
+
+    return decorator
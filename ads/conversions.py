@@ -0,0 +1,202 @@
+"""
+Ingesta de conversiones (postbacks de anunciantes e importaciones CSV).
+
+Cada conversión se valida con comprobaciones simples sobre el diccionario
+recibido, sin serializadores, y se escribe en lotes de
+`ADS_CONVERSION_CHUNK_SIZE` filas con un `bulk_create` por transacción. La
+ingesta es idempotente sobre `event_id`: un evento ya registrado (o repetido
+dentro del mismo envío) se cuenta como duplicado y no se vuelve a insertar.
+"""
+import datetime
+import itertools
+import json
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ads.models import Ad, Conversion
+
+# Número máximo de errores que se detallan en el resultado de una ingesta.
+MAX_REPORTED_ERRORS = 100
+
+_EVENT_ID_LENGTH = Conversion._meta.get_field("event_id").max_length
+_TYPE_LENGTH = Conversion._meta.get_field("conversion_type").max_length
+_SESSION_LENGTH = Conversion._meta.get_field("session_id").max_length
+_MAX_VALUE = Decimal(10) ** (
+    Conversion._meta.get_field("value").max_digits
+    - Conversion._meta.get_field("value").decimal_places
+)
+_CENTS = Decimal("0.01")
+
+
+@dataclass
+class IngestResult:
+    """
+    Resumen de una ingesta: conversiones nuevas, duplicadas y rechazadas, con
+    el detalle (posición, mensaje) de los primeros errores.
+    """
+    accepted: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    errors: list = field(default_factory=list)
+
+    def reject(self, position, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((position, message))
+
+    def as_dict(self):
+        return {
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "errors": [
+                {"position": position, "error": message} for position, message in self.errors
+            ],
+        }
+
+
+def _text(data, name, max_length, required=False):
+    value = data.get(name)
+    if value is None or value == "":
+        if required:
+            raise ValueError(f"Falta el campo '{name}'.")
+        return None
+    value = str(value).strip()
+    if len(value) > max_length:
+        raise ValueError(f"'{name}' supera los {max_length} caracteres.")
+    return value
+
+
+def _timestamp(value, now):
+    if value is None or value == "":
+        return now
+    if isinstance(value, (int, float)):
+        try:
+            moment = datetime.datetime.fromtimestamp(value, tz=datetime.timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            raise ValueError("'timestamp' está fuera de rango.") from None
+    else:
+        moment = parse_datetime(str(value))
+        if moment is None:
+            raise ValueError("'timestamp' no es una fecha ISO 8601 válida.")
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+    return moment
+
+
+def _value(value):
+    if value is None or value == "":
+        return None
+    try:
+        amount = Decimal(str(value)).quantize(_CENTS)
+    except InvalidOperation:
+        raise ValueError("'value' no es un número válido.") from None
+    if not amount.is_finite() or abs(amount) >= _MAX_VALUE:
+        raise ValueError("'value' está fuera de rango.")
+    return amount
+
+
+def parse_conversion(data, now=None):
+    """
+    Valida un evento de conversión y retorna la instancia (sin guardar).
+
+    Campos: `event_id` y `conversion_type` obligatorios, `ad_id` (entero),
+    `value`, `timestamp` (ISO 8601 o segundos Unix; por defecto ahora) y
+    `session_id`. `data` puede ser un diccionario o una línea JSON. Lanza
+    ValueError con un mensaje legible si el evento no es válido.
+    """
+    if isinstance(data, (bytes, str)):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            raise ValueError("JSON inválido.") from None
+    if not isinstance(data, dict):
+        raise ValueError("Cada evento debe ser un objeto.")
+    try:
+        ad_id = int(data.get("ad_id"))
+    except (TypeError, ValueError):
+        raise ValueError("'ad_id' debe ser un entero.") from None
+    return Conversion(
+        event_id=_text(data, "event_id", _EVENT_ID_LENGTH, required=True),
+        ad_id=ad_id,
+        conversion_type=_text(data, "conversion_type", _TYPE_LENGTH, required=True),
+        value=_value(data.get("value")),
+        timestamp=_timestamp(data.get("timestamp"), now or timezone.now()),
+        session_id=_text(data, "session_id", _SESSION_LENGTH),
+    )
+
+
+def ingest_conversions(rows, chunk_size=None):
+    """
+    Valida y guarda conversiones en lotes. `rows` es un iterable (que puede
+    ser un flujo perezoso) de pares (posición, evento), donde la posición
+    sólo se usa para informar errores (p. ej. el número de línea).
+
+    Cada lote cuesta tres consultas: anuncios existentes, `event_id` ya
+    registrados y el `bulk_create`. Si otra ingesta concurrente inserta el
+    mismo evento entre medias, el lote se reintenta sin él y el evento cuenta
+    como duplicado, así que `accepted` son las filas realmente insertadas.
+    Retorna un `IngestResult`.
+    """
+    chunk_size = chunk_size or getattr(settings, "ADS_CONVERSION_CHUNK_SIZE", 1000)
+    result = IngestResult()
+    rows = iter(rows)
+    while chunk := list(itertools.islice(rows, chunk_size)):
+        _ingest_chunk(chunk, result)
+    return result
+
+
+def _ingest_chunk(chunk, result):
+    now = timezone.now()
+    parsed = {}
+    for position, data in chunk:
+        try:
+            conversion = parse_conversion(data, now)
+        except ValueError as exc:
+            result.reject(position, str(exc))
+            continue
+        if conversion.event_id in parsed:
+            result.duplicates += 1
+            continue
+        parsed[conversion.event_id] = (position, conversion)
+    if not parsed:
+        return
+
+    ad_ids = {conversion.ad_id for _, conversion in parsed.values()}
+    known_ads = set(Ad.objects.filter(pk__in=ad_ids).values_list("pk", flat=True))
+    existing = set(
+        Conversion.objects.filter(event_id__in=parsed).values_list("event_id", flat=True)
+    )
+    conversions = []
+    for event_id, (position, conversion) in parsed.items():
+        if event_id in existing:
+            result.duplicates += 1
+        elif conversion.ad_id not in known_ads:
+            result.reject(position, f"El anuncio {conversion.ad_id} no existe.")
+        else:
+            conversions.append(conversion)
+    while conversions:
+        try:
+            with transaction.atomic():
+                Conversion.objects.bulk_create(conversions)
+            break
+        except IntegrityError:
+            # Otra ingesta concurrente registró alguno de estos eventos: se
+            # cuentan como duplicados y se reintenta con el resto.
+            taken = set(
+                Conversion.objects.filter(
+                    event_id__in=[conversion.event_id for conversion in conversions]
+                ).values_list("event_id", flat=True)
+            )
+            if not taken:
+                raise
+            result.duplicates += len(taken)
+            conversions = [
+                conversion for conversion in conversions if conversion.event_id not in taken
+            ]
+    result.accepted += len(conversions)
@@ -0,0 +1,45 @@
+from ads.delivery.index import EligibilityIndex, Targeting, eligibility_index
+from ads.delivery.selection import AliasTable, CandidatePool, weighted_shuffle
+from ads.delivery.decision import choose_ad, choose_ads
+from ads.delivery.buffers import (
+    BulkInsertBuffer,
+    CounterBuffer,
+    click_buffer,
+    counter_buffer,
+    impression_buffer,
+    spend_buffer,
+)
+from ads.delivery.pacing import BudgetPacer, budget_pacer
+from ads.delivery.dedup import RecentKeys, recent_clicks
+from ads.delivery.ivt import IPRangeTrie, TrafficFilter, traffic_filter
+from ads.delivery.frequency import FrequencyCapper, FrequencySketch, frequency_capper
+from ads.delivery.events import record_click, record_impression
+
+__all__ = [
+    "EligibilityIndex",
+    "Targeting",
+    "eligibility_index",
+    "AliasTable",
+    "CandidatePool",
+    "weighted_shuffle",
+    "choose_ad",
+    "choose_ads",
+    "BulkInsertBuffer",
+    "CounterBuffer",
+    "click_buffer",
+    "counter_buffer",
+    "impression_buffer",
+    "spend_buffer",
+    "BudgetPacer",
+    "budget_pacer",
+    "RecentKeys",
+    "recent_clicks",
+    "IPRangeTrie",
+    "TrafficFilter",
+    "traffic_filter",
+    "FrequencyCapper",
+    "FrequencySketch",
+    "frequency_capper",
+    "record_click",
+    "record_impression",
+]
@@ -0,0 +1,282 @@
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Case, F, Value, When
+
+from ads.delivery.concurrency import in_event_loop
+from ads.models import Ad, Campaign, Click, Impression
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicFlusher:
+    """
+    Base para los búferes de escritura diferida.
+
+    Un hilo en segundo plano (uno por proceso, creado bajo demanda) llama a
+    `flush()` cada `interval` milisegundos; también se vacía al terminar el
+    proceso. Con un intervalo de 0 se escribe de forma síncrona en cada evento,
+    lo que resulta útil en desarrollo y en pruebas.
+
+    Dentro de un bucle de eventos (vistas asíncronas) nunca se escribe en el
+    hilo de la solicitud: el vaciado se delega siempre al hilo de escritura.
+    """
+    interval_setting = None
+    default_interval = 1000
+
+    def __init__(self, interval_setting=None):
+        if interval_setting:
+            self.interval_setting = interval_setting
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        atexit.register(self.flush)
+
+    @property
+    def interval(self):
+        """
+        Intervalo entre vaciados, en milisegundos.
+        """
+        return getattr(settings, self.interval_setting, self.default_interval)
+
+    def _ensure_started(self):
+        # Tras un fork (p. ej. gunicorn con --preload) el hilo no se hereda.
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name=type(self).__name__, daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            # Con intervalo 0 el hilo sólo existe para las vistas asíncronas
+            # y espera a que lo despierten.
+            self._wakeup.wait(self.interval / 1000 or None)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Error al vaciar %s", type(self).__name__)
+            finally:
+                close_old_connections()
+
+    def _flush_now(self):
+        """
+        Vacía el búfer en el hilo actual, o despierta al hilo de escritura si
+        se está en un bucle de eventos.
+        """
+        if in_event_loop():
+            self._ensure_started()
+            self._wakeup.set()
+        else:
+            self.flush()
+
+    def _after_add(self):
+        if self.interval <= 0:
+            self._flush_now()
+        else:
+            self._ensure_started()
+
+    def flush(self):
+        raise NotImplementedError
+
+
+class CounterBuffer(PeriodicFlusher):
+    """
+    Acumula en memoria incrementos de campos numéricos por fila (por defecto
+    los contadores de impresiones y clics de `Ad`) y los escribe en una única
+    transacción con expresiones F(), de modo que cada fila se actualiza una
+    vez por intervalo en lugar de una vez por evento. Si la escritura falla,
+    los deltas se reincorporan al búfer para el siguiente intento y no se
+    pierde ningún conteo.
+    """
+    interval_setting = "ADS_COUNTER_FLUSH_INTERVAL"
+    chunk_size = 500
+
+    def __init__(
+        self,
+        model=Ad,
+        fields=("total_impressions", "total_clicks", "invalid_impressions", "invalid_clicks"),
+    ):
+        super().__init__()
+        self.model = model
+        self.fields = fields
+        self._deltas = {}
+
+    def add(self, pk, **deltas):
+        """
+        Suma los deltas indicados (p. ej. `total_clicks=1`) a la fila.
+        """
+        with self._lock:
+            pending = self._deltas.setdefault(pk, dict.fromkeys(self.fields, 0))
+            for field, amount in deltas.items():
+                pending[field] += amount
+        self._after_add()
+
+    def pending(self, pk):
+        """
+        Deltas todavía no escritos para una fila.
+        """
+        with self._lock:
+            return dict(self._deltas.get(pk, dict.fromkeys(self.fields, 0)))
+
+    def _take(self):
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+        return deltas
+
+    def _restore(self, deltas):
+        with self._lock:
+            for pk, values in deltas.items():
+                pending = self._deltas.setdefault(pk, dict.fromkeys(self.fields, 0))
+                for field, amount in values.items():
+                    pending[field] += amount
+
+    def flush(self):
+        """
+        Escribe todos los deltas pendientes en una sola transacción.
+        """
+        deltas = self._take()
+        if not deltas:
+            return
+        try:
+            with transaction.atomic():
+                items = list(deltas.items())
+                for start in range(0, len(items), self.chunk_size):
+                    self._write(dict(items[start:start + self.chunk_size]))
+        except Exception:
+            self._restore(deltas)
+            raise
+
+    def _write(self, deltas):
+        updates = {}
+        for field in self.fields:
+            whens = [
+                When(pk=pk, then=Value(values[field]))
+                for pk, values in deltas.items()
+                if values[field]
+            ]
+            if whens:
+                updates[field] = F(field) + Case(
+                    *whens,
+                    default=Value(0),
+                    output_field=self.model._meta.get_field(field),
+                )
+        if updates:
+            self.model.objects.filter(pk__in=deltas).update(**updates)
+
+
+class BulkInsertBuffer(PeriodicFlusher):
+    """
+    Acumula instancias sin guardar de un modelo de eventos y las inserta con
+    `bulk_create` en lotes de `batch_size`. Al alcanzar un lote completo se
+    despierta al hilo de escritura sin esperar al intervalo.
+
+    El búfer está acotado por `ADS_EVENT_BUFFER_MAX`: si se llena, quien añade
+    el evento lo vacía de forma síncrona (contrapresión) en vez de descartarlo.
+    En las vistas asíncronas la contrapresión se limita a despertar al hilo.
+    """
+    batch_size = 1000
+
+    def __init__(self, model, interval_setting="ADS_EVENT_FLUSH_INTERVAL"):
+        super().__init__(interval_setting)
+        self.model = model
+        self._pending = []
+        self._flush_lock = threading.Lock()
+
+    @property
+    def max_pending(self):
+        return getattr(settings, "ADS_EVENT_BUFFER_MAX", 50000)
+
+    def add(self, instance):
+        """
+        Encola una instancia para su inserción diferida.
+        """
+        with self._lock:
+            self._pending.append(instance)
+            size = len(self._pending)
+        if size >= self.max_pending:
+            self._flush_now()
+        elif size >= self.batch_size:
+            self._wakeup.set()
+        self._after_add()
+
+    def flush(self):
+        """
+        Inserta todas las instancias pendientes en una transacción.
+
+        Si el lote viola una restricción se descartan las filas que nunca se
+        podrán insertar y se inserta el resto; sólo un fallo que puede ser
+        transitorio devuelve las filas al búfer.
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return
+            try:
+                try:
+                    self._insert(rows)
+                except IntegrityError:
+                    rows = self._without_deleted_ads(rows)
+                    try:
+                        self._insert(rows)
+                    except IntegrityError:
+                        self._insert_each(rows)
+            except Exception:
+                with self._lock:
+                    self._pending[:0] = rows[-self.max_pending:]
+                raise
+
+    def _insert(self, rows):
+        with transaction.atomic():
+            self.model.objects.bulk_create(rows, batch_size=self.batch_size)
+
+    def _without_deleted_ads(self, rows):
+        """
+        Quita los eventos de anuncios eliminados mientras esperaban en el búfer.
+        """
+        ad_ids = {row.ad_id for row in rows}
+        existing = set(Ad.objects.filter(pk__in=ad_ids).values_list("pk", flat=True))
+        if existing == ad_ids:
+            return rows
+        logger.warning(
+            "Descartados %s eventos %s de anuncios eliminados: %s",
+            sum(row.ad_id not in existing for row in rows),
+            self.model._meta.model_name,
+            sorted(ad_ids - existing),
+        )
+        return [row for row in rows if row.ad_id in existing]
+
+    def _insert_each(self, rows):
+        """
+        Inserta las filas de una en una, registrando y descartando las que
+        violan una restricción. Consume la lista a medida que avanza, de modo
+        que ante otro error en ella sólo quedan las filas no insertadas.
+        """
+        while rows:
+            try:
+                self._insert(rows[:1])
+            except IntegrityError:
+                logger.exception(
+                    "Descartado un evento %s inválido: %r",
+                    self.model._meta.model_name,
+                    {field.attname: field.value_from_object(rows[0]) for field in self.model._meta.concrete_fields},
+                )
+            del rows[0]
+
+
+counter_buffer = CounterBuffer()
+# Gasto pendiente de las campañas (ver `ads.delivery.pacing`)
+spend_buffer = CounterBuffer(Campaign, ("spent",))
+impression_buffer = BulkInsertBuffer(Impression)
+click_buffer = BulkInsertBuffer(Click)
@@ -0,0 +1,13 @@
+import asyncio
+
+
+def in_event_loop():
+    """
+    Indica si el código se ejecuta dentro de un bucle de eventos (vistas
+    asíncronas bajo ASGI), donde no se puede usar el ORM de forma síncrona.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
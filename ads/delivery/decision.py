@@ -0,0 +1,68 @@
+from django.utils import timezone
+
+from ads.delivery.frequency import frequency_capper
+from ads.delivery.index import eligibility_index
+
+
+def _draw(pool, candidates, session_hash):
+    """
+    Extrae un id de `candidates` que no supere los topes de frecuencia de la
+    sesión. Los topes sólo se comprueban sobre el id extraído; si ya los
+    alcanzó se descarta y se vuelve a extraer. Retorna None si no queda ninguno.
+    """
+    remaining = candidates
+    while remaining:
+        ad_id = pool.choose(remaining)
+        if frequency_capper.allows(ad_id, session_hash):
+            return ad_id
+        remaining = remaining - {ad_id}
+    return None
+
+
+def choose_ad(targeting, moment=None, session_hash=None):
+    """
+    Elige un anuncio para la segmentación dada usando el índice de elegibilidad
+    y la tabla de alias del grupo programado (O(1) por extracción).
+    Si ningún anuncio cumple la segmentación se recurre al grupo de respaldo.
+    Con `session_hash` se excluyen los anuncios que la sesión ya vio tantas
+    veces como permite su tope de frecuencia. Retorna la instancia o None.
+    """
+    moment = moment or timezone.localtime()
+    pool, candidates = eligibility_index.lookup(targeting, moment)
+    ad_id = _draw(pool, candidates, session_hash)
+    if ad_id is None:
+        fallback, fallback_ids = eligibility_index.fallback(moment)
+        ad_id = _draw(fallback, fallback_ids, session_hash)
+    return eligibility_index.get(ad_id) if ad_id is not None else None
+
+
+def _draw_distinct(pool, candidates, count, chosen, session_hash=None):
+    """
+    Añade a `chosen` ids distintos de `candidates` que no superen los topes
+    de frecuencia, hasta reunir `count`.
+    """
+    remaining = candidates.difference(chosen)
+    while len(chosen) < count and remaining:
+        ad_id = pool.choose(remaining)
+        if frequency_capper.allows(ad_id, session_hash):
+            chosen.append(ad_id)
+        remaining = remaining - {ad_id}
+    return chosen
+
+
+def choose_ads(targeting, count, moment=None, session_hash=None):
+    """
+    Elige hasta `count` anuncios distintos para los espacios de una misma
+    página a partir de una sola evaluación de la segmentación. Se extrae sin
+    reemplazo respetando los pesos; si no hay suficientes candidatos se
+    completa con el grupo de respaldo. Los topes de frecuencia se aplican como
+    en `choose_ad`. Retorna una lista de instancias que puede ser más corta
+    que `count`.
+    """
+    moment = moment or timezone.localtime()
+    pool, candidates = eligibility_index.lookup(targeting, moment)
+    chosen = _draw_distinct(pool, candidates, count, [], session_hash)
+    if len(chosen) < count:
+        fallback, fallback_ids = eligibility_index.fallback(moment)
+        _draw_distinct(fallback, fallback_ids, count, chosen, session_hash)
+    return [eligibility_index.get(ad_id) for ad_id in chosen]
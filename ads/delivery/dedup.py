@@ -0,0 +1,62 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class RecentKeys:
+    """
+    Mapa en memoria de claves vistas recientemente, con caducidad (TTL).
+
+    Como todas las claves comparten el mismo TTL, el orden de inserción es
+    también el orden de caducidad: las entradas vencidas se purgan desde el
+    principio en O(1) amortizado. El tamaño está acotado por `max_keys`.
+    """
+
+    def __init__(self, ttl_setting, default_ttl, max_keys_setting, default_max_keys):
+        self._ttl_setting = ttl_setting
+        self._default_ttl = default_ttl
+        self._max_keys_setting = max_keys_setting
+        self._default_max_keys = default_max_keys
+        self._expires = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, self._ttl_setting, self._default_ttl)
+
+    @property
+    def max_keys(self):
+        return getattr(settings, self._max_keys_setting, self._default_max_keys)
+
+    def _prune(self, now):
+        expires = self._expires
+        while expires:
+            key, expiry = next(iter(expires.items()))
+            if expiry > now and len(expires) <= self.max_keys:
+                break
+            del expires[key]
+
+    def check_and_add(self, key):
+        """
+        Registra la clave y retorna True si no se había visto dentro del TTL,
+        o False si es un duplicado reciente (en cuyo caso no se renueva).
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            if key in self._expires:
+                return False
+            self._expires[key] = now + self.ttl
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._expires.clear()
+
+
+# Clics recientes por (ad_id, session_hash) para el rate limiting de ad_redirect.
+recent_clicks = RecentKeys(
+    "ADS_CLICK_DEDUP_SECONDS", 5, "ADS_CLICK_DEDUP_MAX_KEYS", 100000
+)
@@ -0,0 +1,72 @@
+from django.utils import timezone
+
+from ads.delivery.buffers import click_buffer, counter_buffer, impression_buffer
+from ads.delivery.dedup import recent_clicks
+from ads.delivery.frequency import frequency_capper
+from ads.delivery.ivt import traffic_filter
+from ads.delivery.pacing import CLICK, IMPRESSION, budget_pacer
+from ads.models import Click, Impression
+
+
+def record_impression(ad, session_hash=None, invalid=False):
+    """
+    Registra una impresión del anuncio: incrementa el contador en el búfer de
+    contadores y encola un evento `Impression` para su inserción en lote.
+
+    No se usa `ad.save()`: la instancia puede venir del índice de elegibilidad
+    y estar compartida entre hilos, y los búferes agrupan las escrituras.
+    `session_hash` es el hash SHA-256 en hexadecimal; se guarda como binario.
+    Si la campaña se cobra por mil impresiones (CPM) se carga su costo, y si
+    el anuncio o su campaña tienen tope de frecuencia se cuenta para la sesión.
+
+    Una impresión de tráfico inválido (`invalid`, ver `ads.delivery.ivt`) sólo
+    incrementa `invalid_impressions`: no se guarda, no se cobra ni se cuenta
+    para los topes de frecuencia.
+    """
+    if invalid:
+        counter_buffer.add(ad.pk, invalid_impressions=1)
+        return
+    counter_buffer.add(ad.pk, total_impressions=1)
+    impression_buffer.add(
+        Impression(
+            ad_id=ad.pk,
+            timestamp=timezone.now(),
+            session_hash=bytes.fromhex(session_hash) if session_hash else None,
+        )
+    )
+    budget_pacer.charge(ad.campaign_id, IMPRESSION)
+    frequency_capper.record(ad.pk, session_hash)
+
+
+def record_click(ad, user_ip, user_agent, session_hash):
+    """
+    Registra un clic sin esperar a la base de datos.
+
+    Si la IP o el User-Agent corresponden a tráfico inválido el clic sólo
+    incrementa `invalid_clicks` y se retorna False. Si la misma sesión ya hizo
+    clic en el anuncio dentro de la ventana de `ADS_CLICK_DEDUP_SECONDS` el
+    clic se descarta (rate limiting) y se retorna False. Si no, el `Click` se
+    encola para su inserción en lote, el contador se incrementa en el búfer
+    de contadores, se carga el costo si la campaña se cobra por clic (CPC) y
+    se retorna True.
+
+    El mapa de clics recientes es local al proceso: con varios workers, dos
+    clics de la misma sesión atendidos por procesos distintos no se deduplican.
+    """
+    if traffic_filter.classify(user_ip, user_agent):
+        counter_buffer.add(ad.pk, invalid_clicks=1)
+        return False
+    if not recent_clicks.check_and_add((ad.pk, session_hash)):
+        return False
+    click_buffer.add(
+        Click(
+            ad_id=ad.pk,
+            timestamp=timezone.now(),
+            user_ip=user_ip,
+            user_agent=user_agent,
+            session_id=session_hash,
+        )
+    )
+    counter_buffer.add(ad.pk, total_clicks=1)
+    budget_pacer.charge(ad.campaign_id, CLICK)
+    return True
@@ -0,0 +1,146 @@
+import threading
+import time
+
+from django.conf import settings
+
+# Los contadores de cada ventana son de un byte y se saturan en este valor.
+MAX_COUNT = 255
+
+
+class FrequencySketch:
+    """
+    Count-min sketch con ventanas de tiempo para contar impresiones por
+    (clave, sesión) en memoria acotada.
+
+    La ventana se divide en `buckets` intervalos; cada uno tiene `depth` filas
+    de `width` contadores de un byte, y los intervalos vencidos se reciclan.
+    El conteo de una ventana es la suma de sus intervalos en cada fila y el
+    mínimo entre filas: puede sobrestimar (colisiones) pero nunca subestima.
+    Se incrementa de forma conservadora (sólo los contadores mínimos), lo que
+    reduce mucho el error con el sketch lleno.
+    """
+
+    def __init__(self, memory, depth, buckets, window):
+        self.depth = depth
+        self.buckets = buckets
+        self.width = max(memory // (depth * buckets), 1)
+        self.bucket_seconds = window / buckets
+        self._epochs = [None] * buckets
+        self._counters = [None] * buckets
+        self._lock = threading.Lock()
+
+    def _positions(self, key):
+        # Doble hashing: `depth` posiciones independientes a partir de un solo hash.
+        h = hash(key)
+        h1, h2 = h & 0xffffffff, (h >> 32) | 1
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def estimate(self, key, now=None):
+        """
+        Conteo aproximado de la clave en la ventana que termina en `now`.
+        """
+        epoch = int((now or time.time()) // self.bucket_seconds)
+        positions = self._positions(key)
+        totals = [0] * self.depth
+        for slot, counters in enumerate(self._counters):
+            bucket_epoch = self._epochs[slot]
+            if counters is None or not epoch - self.buckets < bucket_epoch <= epoch:
+                continue
+            for row, position in enumerate(positions):
+                totals[row] += counters[position]
+        return min(totals)
+
+    def add(self, key, now=None):
+        epoch = int((now or time.time()) // self.bucket_seconds)
+        slot = epoch % self.buckets
+        positions = self._positions(key)
+        with self._lock:
+            if self._epochs[slot] != epoch:
+                self._counters[slot] = bytearray(self.depth * self.width)
+                self._epochs[slot] = epoch
+            counters = self._counters[slot]
+            current = min(counters[position] for position in positions)
+            if current < MAX_COUNT:
+                for position in positions:
+                    if counters[position] == current:
+                        counters[position] = current + 1
+
+    def clear(self):
+        with self._lock:
+            self._epochs = [None] * self.buckets
+            self._counters = [None] * self.buckets
+
+
+class FrequencyCapper:
+    """
+    Topes de frecuencia por anuncio y por campaña para cada sesión (el mismo
+    hash SHA-256 de IP y User-Agent que usa `ad_redirect`).
+
+    Los topes configurados se cargan desde el índice de elegibilidad con
+    `track()`, y sólo se cuentan las impresiones de anuncios con algún tope.
+    Los conteos viven en un `FrequencySketch` de memoria fija
+    (`ADS_FREQUENCY_SKETCH_MEMORY` bytes), así que comprobar un tope no
+    consulta la base de datos. Son locales al proceso, como `recent_clicks`.
+    """
+
+    def __init__(self):
+        self._caps = {}
+        self._sketch = None
+        self._lock = threading.Lock()
+
+    @property
+    def sketch(self):
+        if self._sketch is None:
+            with self._lock:
+                if self._sketch is None:
+                    self._sketch = FrequencySketch(
+                        memory=getattr(settings, "ADS_FREQUENCY_SKETCH_MEMORY", 16 * 1024 * 1024),
+                        depth=getattr(settings, "ADS_FREQUENCY_SKETCH_DEPTH", 4),
+                        buckets=getattr(settings, "ADS_FREQUENCY_BUCKETS", 8),
+                        window=getattr(settings, "ADS_FREQUENCY_WINDOW_HOURS", 24) * 3600,
+                    )
+        return self._sketch
+
+    def track(self, ads):
+        """
+        Reemplaza los topes conocidos por los de los anuncios dados
+        (con `campaign` ya cargada).
+        """
+        self._caps = {
+            ad.pk: (ad.campaign_id, ad.frequency_cap, ad.campaign.frequency_cap)
+            for ad in ads
+            if ad.frequency_cap or ad.campaign.frequency_cap
+        }
+
+    def allows(self, ad_id, session_hash, now=None):
+        """
+        Indica si el anuncio se puede mostrar a la sesión sin superar sus topes.
+        """
+        caps = self._caps.get(ad_id)
+        if caps is None or not session_hash:
+            return True
+        campaign_id, ad_cap, campaign_cap = caps
+        if ad_cap and self.sketch.estimate(("ad", ad_id, session_hash), now) >= ad_cap:
+            return False
+        if campaign_cap and self.sketch.estimate(
+            ("campaign", campaign_id, session_hash), now
+        ) >= campaign_cap:
+            return False
+        return True
+
+    def record(self, ad_id, session_hash, now=None):
+        """
+        Cuenta una impresión del anuncio para la sesión.
+        """
+        caps = self._caps.get(ad_id)
+        if caps is None or not session_hash:
+            return
+        campaign_id, ad_cap, campaign_cap = caps
+        if ad_cap:
+            self.sketch.add(("ad", ad_id, session_hash), now)
+        if campaign_cap:
+            self.sketch.add(("campaign", campaign_id, session_hash), now)
+
+
+frequency_capper = FrequencyCapper()
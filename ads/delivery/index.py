@@ -0,0 +1,560 @@
+import bisect
+import datetime
+import itertools
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from ads.delivery.concurrency import in_event_loop
+from ads.delivery.frequency import frequency_capper
+from ads.delivery.pacing import budget_pacer
+from ads.delivery.selection import CandidatePool
+from ads import schedule
+from ads.models import Ad
+from ads.text import normalize_text, split_tokens
+
+ONE_DAY = datetime.timedelta(days=1)
+
+
+@dataclass(frozen=True)
+class Targeting:
+    """
+    Contexto de segmentación de una solicitud de anuncio.
+    """
+    age: int | None = None
+    gender: str | None = None
+    location: str | None = None
+    keywords: tuple = ()
+    ab_test_group: str | None = None
+
+    @classmethod
+    def from_params(cls, params):
+        """
+        Construye la segmentación desde un QueryDict (request.GET o query_params).
+        Una edad no numérica se ignora en lugar de provocar un error.
+        """
+        try:
+            age = int(params.get("age"))
+        except (TypeError, ValueError):
+            age = None
+        return cls(
+            age=age,
+            gender=params.get("gender") or None,
+            location=params.get("location") or None,
+            keywords=tuple(params.getlist("keywords")),
+            ab_test_group=params.get("ab_test_group") or None,
+        )
+
+
+@dataclass(frozen=True)
+class _AdEntry:
+    """
+    Datos de segmentación de un anuncio ya normalizados para el índice.
+    """
+    ad: Ad
+    campaign_start: datetime.date
+    campaign_end: datetime.date
+    gender: str
+    age_min: int | None
+    age_max: int | None
+    locations: frozenset
+    keywords: frozenset
+    days_mask: int
+    start_minute: int | None
+    end_minute: int | None
+    zone: datetime.tzinfo
+    ab_test_group: str
+    weight: int
+
+    @classmethod
+    def from_ad(cls, ad):
+        return cls(
+            ad=ad,
+            campaign_start=ad.campaign.start_date,
+            campaign_end=ad.campaign.end_date,
+            gender=ad.target_gender,
+            age_min=ad.target_age_min,
+            age_max=ad.target_age_max,
+            locations=frozenset(token.token for token in ad.location_tokens.all()),
+            keywords=frozenset(
+                normalize_text(keyword.name) for keyword in ad.target_keywords.all()
+            ),
+            days_mask=ad.display_days_mask,
+            start_minute=ad.display_start_minute,
+            end_minute=ad.display_end_minute,
+            zone=schedule.get_zone(ad.campaign.timezone),
+            ab_test_group=ad.ab_test_group,
+            weight=ad.delivery_weight,
+        )
+
+    @property
+    def is_unscheduled(self):
+        """
+        Un anuncio que se puede mostrar cualquier día a cualquier hora.
+        """
+        return (
+            self.days_mask == schedule.ALL_DAYS_MASK
+            and self.start_minute is None
+            and self.end_minute is None
+        )
+
+    @property
+    def is_fallback(self):
+        """
+        Un anuncio sin ningún tipo de segmentación ni programación.
+        """
+        return (
+            self.is_unscheduled
+            and self.age_min is None
+            and self.age_max is None
+            and self.gender == Ad.Gender.ANY
+            and not self.locations
+            and not self.keywords
+            and not self.ab_test_group
+        )
+
+    def accepts_age(self, age):
+        return (self.age_min is None or self.age_min <= age) and (
+            self.age_max is None or self.age_max >= age
+        )
+
+    def intervals(self, first_day, last_day):
+        """
+        Intervalos [inicio, fin) en UTC en los que la programación está activa.
+        """
+        return schedule.active_intervals(
+            self.days_mask, self.start_minute, self.end_minute, self.zone, first_day, last_day
+        )
+
+
+class _Snapshot:
+    """
+    Vista inmutable del índice para un día concreto, de modo que las lecturas
+    concurrentes no necesitan bloqueo.
+
+    Cada anuncio ocupa una posición densa (0..n-1) y cada grupo de la
+    segmentación es un bitset (un entero de Python) sobre esas posiciones:
+    evaluar una solicitud son unas pocas operaciones & y | sobre enteros, y
+    el resultado se convierte a ids una sola vez al final.
+    """
+
+    def __init__(self, entries, day):
+        self.day = day
+        self.entries = {
+            ad_id: entry
+            for ad_id, entry in entries.items()
+            if entry.campaign_start <= day <= entry.campaign_end
+        }
+        self.positions = tuple(sorted(self.entries))
+        ordered = [self.entries[ad_id] for ad_id in self.positions]
+        self.all = (1 << len(ordered)) - 1
+
+        def bucket(predicate):
+            bits = 0
+            for position, entry in enumerate(ordered):
+                if predicate(entry):
+                    bits |= 1 << position
+            return bits
+
+        any_gender = bucket(lambda e: e.gender == Ad.Gender.ANY)
+        self.by_gender = {
+            gender: any_gender | bucket(lambda e, g=gender: e.gender == g)
+            for gender in Ad.Gender.values
+        }
+
+        # La edad se divide en intervalos delimitados por los límites de los anuncios;
+        # dentro de cada intervalo el conjunto elegible es constante.
+        bounds = set()
+        for entry in ordered:
+            if entry.age_min is not None:
+                bounds.add(entry.age_min)
+            if entry.age_max is not None:
+                bounds.add(entry.age_max + 1)
+        self.age_bounds = sorted(bounds)
+        representatives = [self.age_bounds[0] - 1] if self.age_bounds else [0]
+        representatives += self.age_bounds
+        self.age_buckets = [
+            bucket(lambda e, a=age: e.accepts_age(a)) for age in representatives
+        ]
+
+        # Línea de tiempo de la programación: los instantes (UTC) en los que
+        # algún anuncio se activa o se desactiva, cada uno con el bitset de
+        # anuncios programados desde ese instante hasta el siguiente. Cubre
+        # unos días alrededor de `day` para cualquier zona horaria de campaña.
+        self.unscheduled = bucket(lambda e: e.is_unscheduled)
+        events = []
+        for position, entry in enumerate(ordered):
+            if not entry.is_unscheduled:
+                for begins, ends in entry.intervals(day - 2 * ONE_DAY, day + 2 * ONE_DAY):
+                    events.append((begins, 1, position))
+                    events.append((ends, -1, position))
+        events.sort()
+        self.transitions = []
+        self.segments = []
+        active = [0] * len(ordered)
+        bits = 0
+        for instant, changes in itertools.groupby(events, key=lambda event: event[0]):
+            for _, delta, position in changes:
+                active[position] += delta
+                if active[position]:
+                    bits |= 1 << position
+                else:
+                    bits &= ~(1 << position)
+            self.transitions.append(instant)
+            self.segments.append(bits)
+
+        # Ubicaciones: índice invertido de término normalizado a bitset.
+        self.location_any = bucket(lambda e: not e.locations)
+        self.by_location = {}
+        for position, entry in enumerate(ordered):
+            for token in entry.locations:
+                self.by_location[token] = self.by_location.get(token, 0) | 1 << position
+
+        # Palabras clave: cada forma normalizada recibe un id entero y el índice
+        # invertido va de ese id al bitset de anuncios que la tienen como objetivo.
+        self.keyword_ids = {}
+        self.by_keyword = []
+        self.keywords_any = bucket(lambda e: not e.keywords)
+        for position, entry in enumerate(ordered):
+            for keyword in entry.keywords:
+                keyword_id = self.keyword_ids.setdefault(keyword, len(self.keyword_ids))
+                if keyword_id == len(self.by_keyword):
+                    self.by_keyword.append(0)
+                self.by_keyword[keyword_id] |= 1 << position
+
+        self.by_ab_group = {}
+        self.by_campaign = {}
+        for position, entry in enumerate(ordered):
+            group = entry.ab_test_group
+            self.by_ab_group[group] = self.by_ab_group.get(group, 0) | 1 << position
+            campaign_id = entry.ad.campaign_id
+            self.by_campaign[campaign_id] = self.by_campaign.get(campaign_id, 0) | 1 << position
+
+        self.weights = {ad_id: entry.weight for ad_id, entry in self.entries.items()}
+        self.fallback_bits = bucket(lambda e: e.is_fallback)
+        self.fallback = CandidatePool(self.ids(self.fallback_bits), self.weights)
+        self._scheduled = (None, None, 0)
+        self._paused = (None, 0)
+        self._digest = (None, 0)
+
+    def ids(self, bits):
+        """
+        Ids de anuncio de las posiciones activas en un bitset.
+        """
+        # En la representación binaria invertida el carácter i es el bit i.
+        digits = bin(bits)[:1:-1]
+        positions = self.positions
+        ids = []
+        position = digits.find("1")
+        while position >= 0:
+            ids.append(positions[position])
+            position = digits.find("1", position + 1)
+        return frozenset(ids)
+
+    def digest(self, bits):
+        """
+        Suma de verificación de los ids de un bitset. Las posiciones dependen
+        de los anuncios cargados en cada proceso; los ids ordenados no.
+        """
+        cached_bits, value = self._digest
+        if cached_bits != bits:
+            value = zlib.crc32(",".join(map(str, sorted(self.ids(bits)))).encode())
+            self._digest = (bits, value)
+        return value
+
+    def paused(self):
+        """
+        Bitset de los anuncios de campañas pausadas por el control de gasto.
+        Se recalcula sólo cuando cambia el conjunto de campañas bloqueadas.
+        """
+        version, blocked = budget_pacer.blocked()
+        cached_version, bits = self._paused
+        if cached_version != version:
+            bits = 0
+            for campaign_id in blocked:
+                bits |= self.by_campaign.get(campaign_id, 0)
+            self._paused = (version, bits)
+        return bits
+
+    def age_bucket(self, age):
+        return self.age_buckets[bisect.bisect_right(self.age_bounds, age)]
+
+    def keyword_bits(self, keywords):
+        """
+        Anuncios sin palabras clave o con alguna de las indicadas (K operaciones OR).
+        """
+        bits = self.keywords_any
+        for keyword in keywords:
+            keyword_id = self.keyword_ids.get(normalize_text(keyword))
+            if keyword_id is not None:
+                bits |= self.by_keyword[keyword_id]
+        return bits
+
+    def location_bits(self, location):
+        """
+        Anuncios sin ubicación o con alguna de las de la solicitud (coincidencia
+        exacta de términos normalizados: "Peru" no coincide con "Perugia").
+        """
+        bits = self.location_any
+        for token in split_tokens(location):
+            bits |= self.by_location.get(token, 0)
+        return bits
+
+    def schedule(self, moment):
+        """
+        Grupo de anuncios cuya programación permite mostrarlos en `moment`,
+        junto con su bitset. Sólo cambia en los instantes de transición de la
+        línea de tiempo; entre dos transiciones se reutiliza el mismo grupo
+        (y su tabla de alias) sin recalcular nada.
+        """
+        segment = bisect.bisect_right(self.transitions, moment) - 1
+        cached_segment, pool, bits = self._scheduled
+        if cached_segment == segment:
+            return pool, bits
+        bits = self.unscheduled | (self.segments[segment] if segment >= 0 else 0)
+        pool = CandidatePool(self.ids(bits), self.weights)
+        self._scheduled = (segment, pool, bits)
+        return pool, bits
+
+    def next_transition(self, moment):
+        """
+        Próximo instante en el que cambia el grupo programado, o None.
+        """
+        segment = bisect.bisect_right(self.transitions, moment)
+        return self.transitions[segment] if segment < len(self.transitions) else None
+
+    def scheduled(self, moment):
+        return self.schedule(moment)[0]
+
+
+class EligibilityIndex:
+    """
+    Índice en memoria (por proceso) de los anuncios elegibles.
+
+    Agrupa los anuncios activos de campañas activas por género, rango de edad,
+    día de la semana y franja horaria, y precalcula el grupo de respaldo. Una
+    decisión se reduce a unas pocas intersecciones de conjuntos, sin SQL.
+
+    Las señales de `ads.signals` mantienen el índice al día: sólo se vuelven a
+    consultar los anuncios afectados y la vista inmutable se regenera en memoria.
+    Como las señales no cruzan procesos, el índice además se reconstruye por
+    completo cada `ADS_INDEX_MAX_AGE` segundos.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._entries = None
+        self._snapshot = None
+        self._built_at = 0.0
+
+    @staticmethod
+    def _queryset():
+        return (
+            Ad.objects.filter(is_active=True, campaign__is_active=True)
+            .select_related("campaign")
+            .prefetch_related("target_keywords", "location_tokens")
+        )
+
+    @property
+    def max_age(self):
+        return getattr(settings, "ADS_INDEX_MAX_AGE", 300)
+
+    def rebuild(self):
+        """
+        Reconstruye el índice completo desde la base de datos y retorna la
+        vista del día.
+        """
+        today = timezone.localdate()
+        entries = {
+            ad.pk: _AdEntry.from_ad(ad)
+            for ad in self._queryset().filter(campaign__end_date__gte=today)
+        }
+        budget_pacer.track(
+            {entry.ad.campaign_id: entry.ad.campaign for entry in entries.values()}.values(),
+            replace=True,
+        )
+        frequency_capper.track(entry.ad for entry in entries.values())
+        with self._lock:
+            self._entries = entries
+            self._snapshot = snapshot = _Snapshot(entries, today)
+            self._built_at = time.monotonic()
+        return snapshot
+
+    def invalidate(self):
+        """
+        Fuerza una reconstrucción completa en la próxima decisión.
+        """
+        with self._lock:
+            self._entries = None
+            self._snapshot = None
+
+    def refresh_ads(self, ad_ids):
+        """
+        Vuelve a cargar sólo los anuncios indicados (alta, cambio o baja).
+        """
+        ad_ids = set(ad_ids)
+        if self._entries is None or not ad_ids:
+            return
+        fresh = {
+            ad.pk: _AdEntry.from_ad(ad)
+            for ad in self._queryset().filter(pk__in=ad_ids)
+        }
+        budget_pacer.track(
+            {entry.ad.campaign_id: entry.ad.campaign for entry in fresh.values()}.values()
+        )
+        with self._lock:
+            if self._entries is None:
+                return
+            entries = {k: v for k, v in self._entries.items() if k not in ad_ids}
+            entries.update(fresh)
+            frequency_capper.track(entry.ad for entry in entries.values())
+            self._entries = entries
+            self._snapshot = _Snapshot(entries, self._snapshot.day)
+
+    def refresh_campaign(self, campaign_id):
+        """
+        Vuelve a cargar los anuncios de una campaña.
+        """
+        if self._entries is None:
+            return
+        ad_ids = set(Ad.objects.filter(campaign_id=campaign_id).values_list("pk", flat=True))
+        ad_ids.update(
+            ad_id
+            for ad_id, entry in self._entries.items()
+            if entry.ad.campaign_id == campaign_id
+        )
+        self.refresh_ads(ad_ids)
+
+    def is_stale(self):
+        """
+        Indica si la próxima decisión tendría que reconstruir el índice.
+        """
+        return self._snapshot is None or time.monotonic() - self._built_at > self.max_age
+
+    async def aprepare(self):
+        """
+        Para vistas asíncronas: si el índice está vencido lo reconstruye en un
+        hilo aparte, de modo que las consultas no bloqueen el bucle de eventos.
+        Después de esperarla, las decisiones no necesitan la base de datos.
+        """
+        if self.is_stale():
+            await sync_to_async(self._current)(timezone.localdate())
+
+    def _current(self, day):
+        snapshot = self._snapshot
+        # Dentro de un bucle de eventos se sigue usando la vista anterior;
+        # la reconstrucción la hace `aprepare()` fuera del bucle.
+        if self.is_stale() and not (snapshot is not None and in_event_loop()):
+            snapshot = self._refresh()
+        if snapshot.day != day:
+            with self._lock:
+                entries = self._entries
+                if entries is None:
+                    # Invalidado mientras se usaba la vista anterior: se avanza
+                    # sólo para esta decisión y la próxima lo reconstruye.
+                    return _Snapshot(snapshot.entries, day)
+                snapshot = _Snapshot(entries, day)
+                self._snapshot = snapshot
+        return snapshot
+
+    def _refresh(self):
+        """
+        Reconstruye el índice vencido. Sólo un hilo reconstruye; el resto sigue
+        usando la vista vigente, o espera si no hay ninguna (primer uso o
+        después de `invalidate()`).
+        """
+        if not self._build_lock.acquire(blocking=False):
+            snapshot = self._snapshot
+            if snapshot is not None:
+                return snapshot
+            self._build_lock.acquire()
+        try:
+            snapshot = self._snapshot
+            if snapshot is None or self.is_stale():
+                snapshot = self.rebuild()
+            return snapshot
+        finally:
+            self._build_lock.release()
+
+    def get(self, ad_id):
+        """
+        Devuelve la instancia cacheada de un anuncio elegible, o None.
+        """
+        snapshot = self._snapshot
+        entry = snapshot.entries.get(ad_id) if snapshot else None
+        return entry.ad if entry else None
+
+    def fingerprint(self, moment=None):
+        """
+        Huella del estado de elegibilidad actual (día, conjunto programado y
+        campañas pausadas). Sólo cambia cuando cambia el conjunto de anuncios
+        que se pueden mostrar, así que sirve para validar cachés HTTP sin
+        consultar la base de datos.
+        """
+        moment = moment or timezone.localtime()
+        snapshot = self._current(moment.date())
+        _, bits = snapshot.schedule(moment)
+        servable = bits & ~snapshot.paused()
+        return f"{snapshot.day:%Y%m%d}.{snapshot.digest(servable):08x}"
+
+    def scheduled_ads(self, ad_ids, moment=None):
+        """
+        Instancias de los anuncios indicados que son elegibles y están
+        programados en el momento dado, sin consultar la base de datos.
+        """
+        moment = moment or timezone.localtime()
+        snapshot = self._current(moment.date())
+        _, bits = snapshot.schedule(moment)
+        servable = snapshot.ids(bits & ~snapshot.paused())
+        return [snapshot.entries[ad_id].ad for ad_id in ad_ids if ad_id in servable]
+
+    def lookup(self, targeting, moment=None):
+        """
+        Retorna el grupo programado para el momento dado y el subconjunto de
+        ids que además cumple la segmentación y cuya campaña no está pausada.
+        """
+        moment = moment or timezone.localtime()
+        snapshot = self._current(moment.date())
+        pool, bits = snapshot.schedule(moment)
+        bits &= ~snapshot.paused()
+
+        if targeting.age is not None:
+            bits &= snapshot.age_bucket(targeting.age)
+        if targeting.gender:
+            # Un valor desconocido sólo admite los anuncios para cualquier género,
+            # igual que el filtro `target_gender=<valor> OR 'A'` de la consulta original.
+            bits &= snapshot.by_gender.get(targeting.gender, snapshot.by_gender[Ad.Gender.ANY])
+        if targeting.keywords:
+            bits &= snapshot.keyword_bits(targeting.keywords)
+        if targeting.ab_test_group:
+            bits &= snapshot.by_ab_group.get(targeting.ab_test_group, 0)
+        if targeting.location:
+            bits &= snapshot.location_bits(targeting.location)
+        return pool, snapshot.ids(bits)
+
+    def candidates(self, targeting, moment=None):
+        """
+        Ids de los anuncios que cumplen la segmentación en el momento dado.
+        """
+        return self.lookup(targeting, moment)[1]
+
+    def fallback(self, moment=None):
+        """
+        Grupo de respaldo (anuncios sin segmentación ni programación) y los ids
+        que se pueden servir, sin las campañas pausadas.
+        """
+        moment = moment or timezone.localtime()
+        snapshot = self._current(moment.date())
+        paused = snapshot.paused()
+        if not paused & snapshot.fallback_bits:
+            return snapshot.fallback, snapshot.fallback.ids
+        return snapshot.fallback, snapshot.ids(snapshot.fallback_bits & ~paused)
+
+
+eligibility_index = EligibilityIndex()
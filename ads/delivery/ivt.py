@@ -0,0 +1,208 @@
+import ipaddress
+import logging
+import re
+import socket
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Fragmentos (en minúsculas) de User-Agent de bots, rastreadores, clientes HTTP
+# y navegadores automatizados, y prefijos con los que empiezan algunos clientes.
+BOT_USER_AGENT_FRAGMENTS = (
+    "bot/", "bot;", "bot)", "bot-", "bot_", "/robots", "crawl", "spider", "slurp",
+    "scrap", "archiver", "facebookexternalhit", "mediapartners-google", "adsbot",
+    "bingpreview", "headlesschrome", "phantomjs", "selenium", "puppeteer",
+    "playwright", "lighthouse", "pingdom", "uptime", "monitor", "python-requests",
+    "aiohttp", "httpx", "okhttp", "go-http-client", "libwww-perl",
+    "apache-httpclient", "node-fetch", "axios/",
+)
+BOT_USER_AGENT_PREFIXES = ("curl/", "wget/", "python-", "java/", "scrapy")
+
+
+def _literal_pattern(literals):
+    """
+    Expresión regular que reconoce cualquiera de los literales, factorizada
+    como un trie ("abc|abd" -> "ab(?:c|d)"): en cada posición del texto el
+    motor prueba un carácter por rama en lugar de todos los literales.
+    """
+    trie = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{pattern})?" if "" in node else pattern
+
+    return build(trie)
+
+
+# Prefijo de las direcciones IPv6 que representan una IPv4 (::ffff:a.b.c.d).
+_IPV4_MAPPED_PREFIX = bytes(10) + b"\xff\xff"
+
+# Motivos por los que un evento se considera tráfico inválido (IVT).
+USER_AGENT = "user_agent"
+IP_RANGE = "ip_range"
+
+
+class IPRangeTrie:
+    """
+    Trie de prefijos IP (IPv4 e IPv6) con paso de un byte por nivel.
+
+    Cada nodo es un diccionario de byte a hijo; `True` marca que todo lo que
+    cuelga de ahí está cubierto por un rango. Los prefijos que no son múltiplo
+    de 8 bits se expanden en los bytes que cubren, así que comprobar una
+    dirección recorre como mucho 4 niveles (IPv4) o 16 (IPv6). Las direcciones
+    se convierten con `socket.inet_pton`, varias veces más rápido que `ipaddress`.
+    """
+
+    def __init__(self, networks=()):
+        self._roots = {}
+        for network in networks:
+            self.add(network)
+
+    def add(self, network):
+        network = ipaddress.ip_network(network, strict=False)
+        width = network.max_prefixlen
+        value = int(network.network_address)
+        length = network.prefixlen
+        parent, key = self._roots, network.version
+        depth = 0
+        while length - depth >= 8:
+            node = parent.get(key)
+            if node is True:
+                return
+            if node is None:
+                node = parent[key] = {}
+            parent, key = node, (value >> (width - depth - 8)) & 0xFF
+            depth += 8
+        remainder = length - depth
+        if remainder == 0:
+            parent[key] = True
+            return
+        node = parent.get(key)
+        if node is True:
+            return
+        if node is None:
+            node = parent[key] = {}
+        first = (value >> (width - depth - 8)) & 0xFF
+        for byte in range(first, first + (1 << (8 - remainder))):
+            node[byte] = True
+
+    def __contains__(self, address):
+        """
+        Comprueba una dirección en texto ("203.0.113.7", "2001:db8::1").
+        Las direcciones IPv6 que representan una IPv4 se comprueban como IPv4.
+        """
+        try:
+            packed = socket.inet_pton(socket.AF_INET, address)
+        except (OSError, TypeError):
+            try:
+                packed = socket.inet_pton(socket.AF_INET6, address)
+            except (OSError, TypeError):
+                return False
+            if packed.startswith(_IPV4_MAPPED_PREFIX):
+                packed = packed[12:]
+        node = self._roots.get(4 if len(packed) == 4 else 6)
+        value = int.from_bytes(packed)
+        shift = len(packed) * 8
+        while node.__class__ is dict:
+            shift -= 8
+            node = node.get((value >> shift) & 0xFF)
+        return node is True
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Carga un rango por línea (CIDR o dirección suelta); las líneas vacías
+        y lo que sigue a "#" se ignoran.
+        """
+        trie = cls()
+        with open(path, encoding="utf-8") as lines:
+            for number, line in enumerate(lines, 1):
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                try:
+                    trie.add(line)
+                except ValueError:
+                    logger.warning("Rango IP inválido en %s:%s: %s", path, number, line)
+        return trie
+
+
+class TrafficFilter:
+    """
+    Filtro de tráfico inválido (IVT) para impresiones y clics.
+
+    Un evento es inválido si su User-Agent empieza por alguno de los prefijos
+    o contiene algún fragmento de bot (todos compilados en una única expresión
+    regular que se aplica al User-Agent en minúsculas, mucho más barata que
+    una búsqueda que no distingue mayúsculas) o si su IP está en alguno de
+    los rangos (centros de datos, IPs bloqueadas) del archivo
+    `ADS_IVT_IP_RANGES_FILE`, cargados en un `IPRangeTrie`. Los veredictos
+    recientes se guardan en un LRU de `ADS_IVT_CACHE_SIZE` entradas, de modo
+    que las solicitudes repetidas de la misma IP y User-Agent no vuelven a
+    evaluar las reglas.
+    """
+
+    def __init__(self, fragments=BOT_USER_AGENT_FRAGMENTS, prefixes=BOT_USER_AGENT_PREFIXES):
+        self._user_agents = re.compile(_literal_pattern(fragments))
+        self._prefixes = tuple(prefixes)
+        self._ranges = None
+        self._verdicts = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def cache_size(self):
+        return getattr(settings, "ADS_IVT_CACHE_SIZE", 100000)
+
+    @property
+    def ranges(self):
+        if self._ranges is None:
+            path = getattr(settings, "ADS_IVT_IP_RANGES_FILE", "")
+            self._ranges = IPRangeTrie.from_file(path) if path else IPRangeTrie()
+        return self._ranges
+
+    def reload(self):
+        """
+        Vuelve a leer el archivo de rangos y olvida los veredictos guardados.
+        """
+        with self._lock:
+            self._ranges = None
+            self._verdicts.clear()
+
+    def classify(self, user_ip, user_agent):
+        """
+        Retorna el motivo (`USER_AGENT` o `IP_RANGE`) si el evento es tráfico
+        inválido, o None si es válido.
+        """
+        key = (user_ip, user_agent)
+        verdicts = self._verdicts
+        with self._lock:
+            if key in verdicts:
+                verdicts.move_to_end(key)
+                return verdicts[key]
+        verdict = self._evaluate(user_ip, user_agent)
+        with self._lock:
+            verdicts[key] = verdict
+            if len(verdicts) > self.cache_size:
+                verdicts.popitem(last=False)
+        return verdict
+
+    def _evaluate(self, user_ip, user_agent):
+        if user_agent:
+            user_agent = user_agent.lower()
+            if user_agent.startswith(self._prefixes) or self._user_agents.search(user_agent):
+                return USER_AGENT
+        return IP_RANGE if user_ip and user_ip in self.ranges else None
+
+
+traffic_filter = TrafficFilter()
@@ -0,0 +1,218 @@
+import datetime
+import math
+import time
+from decimal import Decimal
+
+from django.conf import settings
+
+from ads import schedule
+from ads.delivery.buffers import PeriodicFlusher, spend_buffer
+from ads.models import Campaign
+
+IMPRESSION = "impression"
+CLICK = "click"
+
+
+class _Budget:
+    """
+    Estado de gasto y ritmo de una campaña en este proceso.
+
+    `spent` es el gasto persistido en la última conciliación y `local` lo que
+    este proceso ha cargado desde entonces. El cubo de tokens (`tokens`,
+    `capacity`, `rate`) está en unidades de dinero y se rellena de forma
+    perezosa según el tiempo transcurrido.
+    """
+    __slots__ = (
+        "pricing_model", "bid", "budget", "ends_at", "spent", "local",
+        "tokens", "capacity", "rate", "refilled_at",
+    )
+
+    def __init__(self, campaign):
+        self.spent = campaign.spent
+        self.local = Decimal(0)
+        self.tokens = 0.0
+        self.refilled_at = time.monotonic()
+        self.configure(campaign)
+        self.tokens = self.capacity
+
+    def configure(self, campaign):
+        self.pricing_model = campaign.pricing_model
+        self.bid = campaign.bid
+        self.budget = campaign.budget
+        end_of_flight = datetime.datetime.combine(
+            campaign.end_date + datetime.timedelta(days=1),
+            datetime.time.min,
+            tzinfo=schedule.get_zone(campaign.timezone),
+        )
+        self.ends_at = end_of_flight.timestamp()
+        self.pace()
+
+    def cost(self, event):
+        if self.pricing_model == Campaign.PricingModel.CPM:
+            return self.bid / 1000 if event == IMPRESSION else 0
+        return self.bid if event == CLICK else 0
+
+    @property
+    def exhausted(self):
+        return self.spent + self.local >= self.budget
+
+    def pace(self):
+        """
+        Reparte el presupuesto restante de forma uniforme hasta el fin de la
+        campaña. La capacidad del cubo admite ráfagas de `ADS_PACING_BURST_SECONDS`
+        y siempre al menos un evento.
+        """
+        remaining = max(float(self.budget - self.spent - self.local), 0.0)
+        seconds_left = max(self.ends_at - time.time(), 1.0)
+        workers = max(getattr(settings, "ADS_PACING_WORKERS", 1), 1)
+        self.rate = remaining / seconds_left / workers
+        burst = getattr(settings, "ADS_PACING_BURST_SECONDS", 300)
+        unit = float(max(self.cost(IMPRESSION), self.cost(CLICK)))
+        self.capacity = max(self.rate * burst, unit)
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + self.rate * (now - self.refilled_at))
+        self.refilled_at = now
+
+    def blocked_until(self, now):
+        """
+        Instante (monotónico) hasta el que la campaña no debe servirse:
+        0 si puede servirse, infinito si agotó el presupuesto.
+        """
+        if self.exhausted:
+            return math.inf
+        if self.tokens >= 0:
+            return 0
+        return now + (-self.tokens / self.rate if self.rate else math.inf)
+
+
+class BudgetPacer(PeriodicFlusher):
+    """
+    Control de gasto de las campañas con precio (`Campaign.bid` > 0).
+
+    Cada impresión (CPM) o clic (CPC) carga su costo: se descuenta del cubo
+    de tokens de la campaña y se acumula en `spend_buffer`, que lo suma a
+    `Campaign.spent` en lote. Una campaña sin tokens queda pausada hasta que
+    el cubo se rellena, y una que agotó su presupuesto queda bloqueada. El
+    conjunto de campañas bloqueadas se consulta en cada decisión sin SQL.
+
+    Un hilo en segundo plano concilia cada `ADS_PACING_RECONCILE_INTERVAL`
+    milisegundos: escribe el gasto pendiente, relee `spent` (que incluye el
+    de otros procesos) y recalcula el ritmo con el presupuesto restante.
+    """
+    interval_setting = "ADS_PACING_RECONCILE_INTERVAL"
+    default_interval = 5000
+
+    def __init__(self):
+        super().__init__()
+        self._budgets = {}
+        self._blocked_until = {}
+        self._blocked = frozenset()
+        self._version = 0
+        self._next_release = math.inf
+
+    def track(self, campaigns, replace=False):
+        """
+        Registra o actualiza (precio, presupuesto, fechas) las campañas indicadas.
+        Con `replace` se olvidan las demás. Las campañas sin precio no se controlan.
+        """
+        with self._lock:
+            budgets = {} if replace else self._budgets
+            for campaign in campaigns:
+                if not campaign.bid:
+                    budgets.pop(campaign.pk, None)
+                    continue
+                budget = self._budgets.get(campaign.pk)
+                if budget is None:
+                    budget = _Budget(campaign)
+                else:
+                    budget.configure(campaign)
+                budgets[campaign.pk] = budget
+            self._budgets = budgets
+            now = time.monotonic()
+            self._blocked_until = {
+                pk: until
+                for pk, until in self._blocked_until.items()
+                if pk in budgets and until > now
+            }
+            for pk, budget in budgets.items():
+                self._update(pk, budget, now)
+            self._publish(now)
+
+    def charge(self, campaign_id, event):
+        """
+        Carga el costo de un evento (`IMPRESSION` o `CLICK`) a la campaña.
+        """
+        budget = self._budgets.get(campaign_id)
+        if budget is None:
+            return
+        cost = budget.cost(event)
+        if not cost:
+            return
+        spend_buffer.add(campaign_id, spent=cost)
+        now = time.monotonic()
+        with self._lock:
+            budget.local += cost
+            budget.refill(now)
+            budget.tokens -= float(cost)
+            self._update(campaign_id, budget, now)
+            self._publish(now)
+        self._after_add()
+
+    def blocked(self):
+        """
+        Versión y conjunto de ids de campañas que no deben servirse ahora.
+        """
+        if self._next_release <= time.monotonic():
+            with self._lock:
+                self._publish(time.monotonic())
+        return self._version, self._blocked
+
+    def flush(self):
+        """
+        Concilia el estado en memoria con el gasto persistido.
+        """
+        with self._lock:
+            taken = {pk: budget.local for pk, budget in self._budgets.items()}
+            for budget in self._budgets.values():
+                budget.local = Decimal(0)
+        try:
+            spend_buffer.flush()
+        except Exception:
+            with self._lock:
+                for pk, amount in taken.items():
+                    if pk in self._budgets:
+                        self._budgets[pk].local += amount
+            raise
+        if not taken:
+            return
+        spent = dict(Campaign.objects.filter(pk__in=taken).values_list("pk", "spent"))
+        with self._lock:
+            now = time.monotonic()
+            for pk, budget in self._budgets.items():
+                if pk in spent:
+                    budget.spent = spent[pk]
+                budget.pace()
+                budget.refill(now)
+                self._update(pk, budget, now)
+            self._publish(now)
+
+    def _update(self, pk, budget, now):
+        until = budget.blocked_until(now)
+        if until > now:
+            self._blocked_until[pk] = until
+        else:
+            self._blocked_until.pop(pk, None)
+
+    def _publish(self, now):
+        for pk in [pk for pk, until in self._blocked_until.items() if until <= now]:
+            del self._blocked_until[pk]
+            self._budgets[pk].refill(now)
+        blocked = frozenset(self._blocked_until)
+        if blocked != self._blocked:
+            self._blocked = blocked
+            self._version += 1
+        self._next_release = min(self._blocked_until.values(), default=math.inf)
+
+
+budget_pacer = BudgetPacer()
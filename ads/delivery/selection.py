@@ -0,0 +1,121 @@
+import random
+from array import array
+
+from django.conf import settings
+
+# Número de extracciones por rechazo antes de recurrir a una elección lineal.
+MAX_REJECTIONS = 16
+
+
+class AliasTable:
+    """
+    Tabla de alias (método de Vose) sobre un arreglo compacto de ids.
+
+    Construirla cuesta O(n); cada extracción ponderada cuesta O(1): un índice
+    uniforme y una comparación contra su probabilidad.
+    """
+    __slots__ = ("ids", "probabilities", "aliases")
+
+    def __init__(self, ids, weights):
+        count = len(ids)
+        self.ids = array("q", ids)
+        self.probabilities = array("d", [1.0]) * count
+        self.aliases = array("l", range(count))
+        total = float(sum(weights))
+        if not count or total <= 0:
+            return
+
+        scaled = [weight * count / total for weight in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probabilities[less] = scaled[less]
+            self.aliases[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Lo que queda tiene probabilidad 1 salvo errores de redondeo.
+        for i in small + large:
+            self.probabilities[i] = 1.0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def sample(self, rng=random):
+        """
+        Extrae un id según los pesos de la tabla.
+        """
+        i = int(rng.random() * len(self.ids))
+        if rng.random() < self.probabilities[i]:
+            return self.ids[i]
+        return self.ids[self.aliases[i]]
+
+
+class CandidatePool:
+    """
+    Conjunto de anuncios elegibles junto con su tabla de alias.
+
+    Las decisiones se hacen sobre subconjuntos del grupo (tras aplicar la
+    segmentación): se extrae de la tabla completa y se rechaza lo que no esté
+    en el subconjunto, lo que respeta exactamente los pesos relativos. Si el
+    subconjunto es una fracción muy pequeña del grupo se elige en O(k).
+    """
+
+    def __init__(self, ids, weights):
+        self.ids = frozenset(ids)
+        self.weights = weights
+        ordered = sorted(self.ids)
+        self.table = AliasTable(ordered, [weights[ad_id] for ad_id in ordered])
+
+    def __bool__(self):
+        return bool(self.ids)
+
+    def choose(self, candidates=None, weighted=None, rng=random):
+        """
+        Elige un id de `candidates` (que debe ser un subconjunto del grupo),
+        o de todo el grupo si no se indica. Retorna None si no hay candidatos.
+        """
+        if candidates is None:
+            candidates = self.ids
+        if not candidates:
+            return None
+        if weighted is None:
+            weighted = selection_is_weighted()
+
+        draw = self.table.sample if weighted else self._uniform
+        if len(candidates) == len(self.ids):
+            return draw(rng)
+        for _ in range(MAX_REJECTIONS):
+            ad_id = draw(rng)
+            if ad_id in candidates:
+                return ad_id
+        ids = tuple(candidates)
+        weights = [self.weights[ad_id] for ad_id in ids]
+        if not weighted or not any(weights):
+            return rng.choice(ids)
+        return rng.choices(ids, weights)[0]
+
+    def _uniform(self, rng):
+        ids = self.table.ids
+        return ids[int(rng.random() * len(ids))]
+
+
+def selection_is_weighted():
+    return getattr(settings, "ADS_SELECTION_MODE", "weighted") == "weighted"
+
+
+def weighted_shuffle(ads, rng=random):
+    """
+    Ordena aleatoriamente una lista de anuncios respetando `delivery_weight`
+    (muestreo de Efraimidis-Spirakis): los anuncios con más peso tienden a
+    aparecer antes.
+    """
+    if not selection_is_weighted():
+        ads = list(ads)
+        rng.shuffle(ads)
+        return ads
+    return sorted(
+        ads,
+        key=lambda ad: rng.random() ** (1.0 / ad.delivery_weight) if ad.delivery_weight else 0.0,
+        reverse=True,
+    )
@@ -0,0 +1,86 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ads.analytics import date_range_q
+from ads.analytics.attribution import lookback, session_clicks
+from ads.models import AdHourlyStats, Click, Conversion, Impression
+
+
+def hot_queries():
+    """
+    Consultas calientes del sistema y el índice que cada una debe usar.
+    """
+    today = timezone.localdate()
+    week_ago = today - datetime.timedelta(days=7)
+    now = timezone.now()
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    span = {"timestamp__gte": day, "timestamp__lt": day + datetime.timedelta(days=1)}
+    return [
+        (
+            "Agregados: clics de un día para ciertos anuncios",
+            Click.objects.filter(ad_id__in=[1, 2, 3], **span).values_list("ad_id", "session_id").order_by(),
+            "ads_click_ad_ts_idx",
+        ),
+        (
+            "Agregados: clics recientes",
+            Click.objects.filter(timestamp__gte=now).values_list("ad_id").order_by(),
+            "ads_click_ts_idx",
+        ),
+        (
+            "Agregados: impresiones de un día para ciertos anuncios",
+            Impression.objects.filter(ad_id__in=[1, 2, 3], **span).values_list("ad_id").order_by(),
+            "ads_impression_ad_ts_idx",
+        ),
+        (
+            "Agregados: conversiones de un día para ciertos anuncios",
+            Conversion.objects.filter(ad_id__in=[1, 2, 3], **span).values_list("ad_id").order_by(),
+            "ads_conversion_ad_ts_idx",
+        ),
+        (
+            "Atribución: clics de un grupo de sesiones en la ventana de atribución",
+            session_clicks(["0" * 64, "1" * 64], now - lookback(), now),
+            "ads_click_session_ts_idx",
+        ),
+        (
+            "Estadísticas: agregados horarios de un rango de fechas",
+            AdHourlyStats.objects.filter(date_range_q("hour", week_ago, today)).values_list("clicks").order_by(),
+            "ads_hourly_stats_hour_idx",
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    """
+    Ejecuta EXPLAIN sobre las consultas calientes y comprueba que cada una usa
+    el índice previsto en la migración de índices. Sale con error si alguna no lo usa.
+    """
+    help = "Comprueba con EXPLAIN que las consultas calientes usan sus índices."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verbose-plans", action="store_true", help="Muestra el plan completo de cada consulta."
+        )
+
+    def handle(self, *args, **options):
+        failures = []
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # En tablas pequeñas PostgreSQL prefiere un recorrido secuencial;
+                # lo desactivamos para comprobar que el índice es utilizable.
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            for description, queryset, index_name in hot_queries():
+                plan = queryset.explain()
+                uses_index = index_name in plan
+                style = self.style.SUCCESS if uses_index else self.style.ERROR
+                status = "OK" if uses_index else "SIN ÍNDICE"
+                self.stdout.write(style(f"[{status}] {description} -> {index_name}"))
+                if options["verbose_plans"] or not uses_index:
+                    self.stdout.write(f"    {plan}")
+                if not uses_index:
+                    failures.append(description)
+        if failures:
+            raise CommandError(f"{len(failures)} consultas no usan su índice.")
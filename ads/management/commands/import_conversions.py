@@ -0,0 +1,49 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ads.conversions import ingest_conversions
+
+
+class Command(BaseCommand):
+    """
+    Importa conversiones desde un CSV con cabecera (`event_id`, `ad_id`,
+    `conversion_type` y opcionalmente `value`, `timestamp`, `session_id`).
+    El archivo se lee en flujo y se escribe por lotes, así que el consumo de
+    memoria no depende de su tamaño; reimportarlo no duplica conversiones.
+    """
+    help = "Importa conversiones desde un archivo CSV (o '-' para la entrada estándar)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Ruta del CSV, o '-' para leer de la entrada estándar.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=None,
+            help="Filas por transacción (por defecto ADS_CONVERSION_CHUNK_SIZE).",
+        )
+        parser.add_argument("--delimiter", default=",", help="Separador de columnas.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            source = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        except OSError as exc:
+            raise CommandError(f"No se puede abrir {path}: {exc}") from exc
+        with source:
+            reader = csv.DictReader(source, delimiter=options["delimiter"])
+            # La posición de cada fila es su número de línea en el archivo.
+            rows = ((reader.line_num, row) for row in reader)
+            result = ingest_conversions(rows, chunk_size=options["chunk_size"])
+
+        for line, message in result.errors:
+            self.stderr.write(f"Línea {line}: {message}")
+        if result.rejected > len(result.errors):
+            self.stderr.write(f"... y {result.rejected - len(result.errors)} errores más.")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result.accepted} conversiones importadas, {result.duplicates} duplicadas, "
+                f"{result.rejected} rechazadas."
+            )
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from ads.analytics import reset_attribution, update_attribution
+
+
+class Command(BaseCommand):
+    """
+    Atribuye las conversiones nuevas al último clic de su sesión.
+    Pensado para ejecutarse periódicamente, como `update_rollups`.
+    """
+    help = "Atribuye las conversiones nuevas por último clic y actualiza el resumen por anuncio."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50000,
+            help="Número máximo de conversiones nuevas en cada pasada.",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Borra el resumen y vuelve a atribuir todas las conversiones.",
+        )
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            reset_attribution()
+        attributed = update_attribution(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{attributed} conversiones atribuidas."))
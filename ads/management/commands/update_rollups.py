@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from ads.analytics import update_rollups
+
+
+class Command(BaseCommand):
+    """
+    Actualiza los agregados horarios de estadísticas desde la última marca de agua.
+    Pensado para ejecutarse periódicamente (p. ej. cada minuto desde cron).
+    """
+    help = "Incorpora los clics, impresiones y conversiones nuevos a los agregados horarios."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50000,
+            help="Número máximo de eventos nuevos por tabla en cada pasada.",
+        )
+
+    def handle(self, *args, **options):
+        buckets = update_rollups(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Agregados actualizados ({buckets} horas por anuncio recalculadas).")
+        )
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.2 on 2026-10-18 19:21
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0005_ad_ab_test_group'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ad',
+            name='delivery_weight',
+            field=models.PositiveIntegerField(default=1, help_text='Peso relativo en la selección aleatoria: un anuncio con peso 2 se muestra el doble que uno con peso 1.', validators=[django.core.validators.MinValueValidator(1)], verbose_name='Peso de Entrega'),
+        ),
+    ]
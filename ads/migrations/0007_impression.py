@@ -0,0 +1,30 @@
+# Generated by Django 5.2.2 on 2026-10-18 19:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0006_ad_delivery_weight'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Impression',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha/Hora de la Impresión')),
+                ('session_hash', models.BinaryField(blank=True, max_length=32, null=True, verbose_name='Hash de Sesión (SHA-256)')),
+                ('ad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='impressions', to='ads.ad', verbose_name='Anuncio')),
+            ],
+            options={
+                'verbose_name': 'Impresión',
+                'verbose_name_plural': 'Impresiones',
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['timestamp'], name='ads_impression_ts_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.2 on 2026-10-18 19:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0007_impression'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50, unique=True, verbose_name='Origen')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='Último ID Procesado')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Última Actualización')),
+            ],
+            options={
+                'verbose_name': 'Marca de Agua de Agregados',
+                'verbose_name_plural': 'Marcas de Agua de Agregados',
+            },
+        ),
+        migrations.CreateModel(
+            name='AdHourlyConversionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='Hora')),
+                ('conversion_type', models.CharField(max_length=100, verbose_name='Tipo de Conversión')),
+                ('conversions', models.PositiveIntegerField(default=0, verbose_name='Conversiones')),
+                ('conversion_value', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Valor de Conversiones')),
+                ('ad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_conversion_stats', to='ads.ad', verbose_name='Anuncio')),
+            ],
+            options={
+                'verbose_name': 'Estadística Horaria de Conversión',
+                'verbose_name_plural': 'Estadísticas Horarias de Conversión',
+                'ordering': ['-hour'],
+                'indexes': [models.Index(fields=['hour'], name='ads_hourly_conv_hour_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ad', 'hour', 'conversion_type'), name='ads_hourly_conv_ad_hour_type_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AdHourlyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='Hora')),
+                ('clicks', models.PositiveIntegerField(default=0, verbose_name='Clicks')),
+                ('unique_clicks', models.PositiveIntegerField(default=0, verbose_name='Clicks Únicos')),
+                ('impressions', models.PositiveIntegerField(default=0, verbose_name='Impresiones')),
+                ('conversions', models.PositiveIntegerField(default=0, verbose_name='Conversiones')),
+                ('conversion_value', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Valor de Conversiones')),
+                ('ad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_stats', to='ads.ad', verbose_name='Anuncio')),
+            ],
+            options={
+                'verbose_name': 'Estadística Horaria',
+                'verbose_name_plural': 'Estadísticas Horarias',
+                'ordering': ['-hour'],
+                'indexes': [models.Index(fields=['hour'], name='ads_hourly_stats_hour_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ad', 'hour'), name='ads_hourly_stats_ad_hour_uniq')],
+            },
+        ),
+    ]
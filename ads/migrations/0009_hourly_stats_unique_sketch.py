@@ -0,0 +1,18 @@
+# Generated by Django 5.2.2 on 2026-10-18 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0008_hourly_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adhourlystats',
+            name='unique_sketch',
+            field=models.BinaryField(blank=True, help_text='Sketch de los session_id de los clics de la hora (ver ads.analytics.hll).', null=True, verbose_name='Sketch HyperLogLog de Sesiones'),
+        ),
+    ]
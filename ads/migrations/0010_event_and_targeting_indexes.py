@@ -0,0 +1,45 @@
+# Generated by Django 5.2.2 on 2026-10-18 19:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0009_hourly_stats_unique_sketch'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ad',
+            index=models.Index(fields=['is_active', 'campaign'], name='ads_ad_active_campaign_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['is_active', 'end_date', 'start_date'], name='ads_campaign_active_dates_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='click',
+            index=models.Index(fields=['timestamp'], name='ads_click_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='click',
+            index=models.Index(fields=['ad', 'timestamp'], name='ads_click_ad_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='click',
+            index=models.Index(fields=['session_id', 'timestamp'], name='ads_click_session_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversion',
+            index=models.Index(fields=['timestamp'], name='ads_conversion_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversion',
+            index=models.Index(fields=['ad', 'timestamp'], name='ads_conversion_ad_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='impression',
+            index=models.Index(fields=['ad', 'timestamp'], name='ads_impression_ad_ts_idx'),
+        ),
+    ]
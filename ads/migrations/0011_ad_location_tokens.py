@@ -0,0 +1,55 @@
+# Generated by Django 5.2.2 on 2026-10-18 19:37
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _split_tokens(value):
+    # Copia de ads.text.split_tokens para que la migración no dependa del código actual.
+    tokens = set()
+    for part in value.split(","):
+        decomposed = unicodedata.normalize("NFKD", " ".join(part.split()).casefold())
+        token = "".join(char for char in decomposed if not unicodedata.combining(char))
+        if token:
+            tokens.add(token)
+    return tokens
+
+
+def tokenize_locations(apps, schema_editor):
+    Ad = apps.get_model("ads", "Ad")
+    AdLocationToken = apps.get_model("ads", "AdLocationToken")
+    rows = []
+    ads = Ad.objects.exclude(target_location="").values_list("pk", "target_location")
+    for ad_id, location in ads.iterator(chunk_size=2000):
+        rows.extend(AdLocationToken(ad_id=ad_id, token=token) for token in _split_tokens(location))
+        if len(rows) >= 5000:
+            AdLocationToken.objects.bulk_create(rows)
+            rows = []
+    AdLocationToken.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0010_event_and_targeting_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdLocationToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=255, verbose_name='Ubicación Normalizada')),
+                ('ad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='location_tokens', to='ads.ad', verbose_name='Anuncio')),
+            ],
+            options={
+                'verbose_name': 'Ubicación de Anuncio',
+                'verbose_name_plural': 'Ubicaciones de Anuncios',
+                'indexes': [models.Index(fields=['token'], name='ads_location_token_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ad', 'token'), name='ads_location_token_unique')],
+            },
+        ),
+        migrations.RunPython(tokenize_locations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.2 on 2026-10-18 19:39
+
+import ads.schedule
+from django.db import migrations, models
+
+DAY_ABBREVIATIONS = {
+    "MON": 0, "TUE": 1, "WED": 2, "THU": 3, "FRI": 4, "SAT": 5, "SUN": 6,
+    "LUN": 0, "MAR": 1, "MIE": 2, "JUE": 3, "VIE": 4, "SAB": 5, "DOM": 6,
+}
+
+
+def compile_schedules(apps, schema_editor):
+    # Copia de Ad.compile_schedule para que la migración no dependa del código actual.
+    Ad = apps.get_model("ads", "Ad")
+    ads = Ad.objects.only("display_start_time", "display_end_time", "display_days_of_week")
+    batch = []
+    for ad in ads.iterator(chunk_size=2000):
+        if ad.display_days_of_week.strip():
+            ad.display_days_mask = 0
+            for token in ad.display_days_of_week.upper().replace(" ", "").split(","):
+                if token[:3] in DAY_ABBREVIATIONS:
+                    ad.display_days_mask |= 1 << DAY_ABBREVIATIONS[token[:3]]
+        start, end = ad.display_start_time, ad.display_end_time
+        if start is not None:
+            ad.display_start_minute = start.hour * 60 + start.minute + (start.second > 0 or start.microsecond > 0)
+        if end is not None:
+            ad.display_end_minute = end.hour * 60 + end.minute
+        batch.append(ad)
+        if len(batch) >= 2000:
+            Ad.objects.bulk_update(batch, ["display_days_mask", "display_start_minute", "display_end_minute"])
+            batch = []
+    Ad.objects.bulk_update(batch, ["display_days_mask", "display_start_minute", "display_end_minute"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0011_ad_location_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ad',
+            name='display_days_mask',
+            field=models.PositiveSmallIntegerField(default=127, editable=False, verbose_name='Máscara de Días'),
+        ),
+        migrations.AddField(
+            model_name='ad',
+            name='display_end_minute',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, verbose_name='Minuto de Fin'),
+        ),
+        migrations.AddField(
+            model_name='ad',
+            name='display_start_minute',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, verbose_name='Minuto de Inicio'),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='timezone',
+            field=models.CharField(blank=True, help_text='Zona horaria IANA en la que se interpretan los horarios de sus anuncios (ej. America/Guayaquil). Vacío: la del proyecto.', max_length=64, validators=[ads.schedule.validate_timezone], verbose_name='Zona Horaria'),
+        ),
+        migrations.AlterField(
+            model_name='ad',
+            name='display_start_time',
+            field=models.TimeField(blank=True, help_text='Si es posterior a la hora de fin, la franja cruza la medianoche.', null=True, verbose_name='Hora de Inicio de Visualización'),
+        ),
+        migrations.RunPython(compile_schedules, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.2 on 2026-10-18 19:41
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0012_compiled_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='bid',
+            field=models.DecimalField(decimal_places=4, default=0, help_text='Precio por mil impresiones (CPM) o por clic (CPC). Con 0 la campaña no consume presupuesto.', max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Precio'),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='pricing_model',
+            field=models.CharField(choices=[('CPM', 'Costo por mil impresiones'), ('CPC', 'Costo por clic')], default='CPM', max_length=3, verbose_name='Modelo de Costo'),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='spent',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=14, verbose_name='Gasto'),
+        ),
+    ]
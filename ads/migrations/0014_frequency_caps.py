@@ -0,0 +1,24 @@
+# Generated by Django 5.2.2 on 2026-10-18 19:45
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0013_campaign_pricing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ad',
+            name='frequency_cap',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Máximo de impresiones del anuncio por sesión en la ventana de frecuencia (24 h por defecto). Vacío: sin tope.', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(255)], verbose_name='Tope de Frecuencia'),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='frequency_cap',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Máximo de impresiones de los anuncios de la campaña por sesión en la ventana de frecuencia (24 h por defecto). Vacío: sin tope.', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(255)], verbose_name='Tope de Frecuencia'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.2 on 2026-10-18 19:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0014_frequency_caps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ad',
+            name='invalid_clicks',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Clicks Inválidos'),
+        ),
+        migrations.AddField(
+            model_name='ad',
+            name='invalid_impressions',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Impresiones Inválidas'),
+        ),
+    ]
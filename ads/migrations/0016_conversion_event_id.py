@@ -0,0 +1,22 @@
+# Generated by Django 5.2.2 on 2026-10-18 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0015_invalid_traffic_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversion',
+            name='event_id',
+            field=models.CharField(blank=True, help_text='Identificador del evento en el sistema del anunciante; una conversión con un ID ya registrado se ignora, así que los reintentos no duplican.', max_length=128, null=True, verbose_name='ID de Evento'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversion',
+            constraint=models.UniqueConstraint(fields=('event_id',), name='ads_conversion_event_unique'),
+        ),
+    ]
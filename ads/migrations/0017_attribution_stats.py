@@ -0,0 +1,32 @@
+# Generated by Django 5.2.2 on 2026-10-18 19:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0016_conversion_event_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdHourlyAttributionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='Hora')),
+                ('conversion_type', models.CharField(max_length=100, verbose_name='Tipo de Conversión')),
+                ('conversions', models.PositiveIntegerField(default=0, verbose_name='Conversiones Atribuidas')),
+                ('conversion_value', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Valor Atribuido')),
+                ('ad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_attribution_stats', to='ads.ad', verbose_name='Anuncio')),
+            ],
+            options={
+                'verbose_name': 'Estadística Horaria de Atribución',
+                'verbose_name_plural': 'Estadísticas Horarias de Atribución',
+                'ordering': ['-hour'],
+                'indexes': [models.Index(fields=['hour'], name='ads_hourly_attr_hour_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ad', 'hour', 'conversion_type'), name='ads_hourly_attr_ad_hour_type_uniq')],
+            },
+        ),
+    ]
@@ -1,8 +1,12 @@
 import os
 import uuid
-from django.db import models
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
 from django.utils import timezone
 
+from ads import schedule
+from ads.text import split_tokens
+
 
 # Función personalizada para renombrar la imagen con un UUID4
 def ad_image_upload_path(instance, filename):
@@ -34,16 +38,58 @@ class Campaign(models.Model):
     """
     Modelo para campañas publicitarias.
     """
+
+    class PricingModel(models.TextChoices):
+        CPM = 'CPM', "Costo por mil impresiones"
+        CPC = 'CPC', "Costo por clic"
+
     name = models.CharField(max_length=200, verbose_name="Nombre de la Campaña")
     start_date = models.DateField(verbose_name="Fecha de Inicio")
     end_date = models.DateField(verbose_name="Fecha de Fin")
     budget = models.DecimalField(
         max_digits=10, decimal_places=2, verbose_name="Presupuesto"
     )
+    pricing_model = models.CharField(
+        max_length=3,
+        choices=PricingModel.choices,
+        default=PricingModel.CPM,
+        verbose_name="Modelo de Costo"
+    )
+    bid = models.DecimalField(
+        max_digits=10,
+        decimal_places=4,
+        default=0,
+        validators=[MinValueValidator(0)],
+        verbose_name="Precio",
+        help_text="Precio por mil impresiones (CPM) o por clic (CPC). Con 0 la campaña no consume presupuesto."
+    )
+    spent = models.DecimalField(
+        max_digits=14,
+        decimal_places=4,
+        default=0,
+        editable=False,
+        verbose_name="Gasto"
+    )
+    frequency_cap = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1), MaxValueValidator(255)],
+        verbose_name="Tope de Frecuencia",
+        help_text="Máximo de impresiones de los anuncios de la campaña por sesión en la ventana "
+                  "de frecuencia (24 h por defecto). Vacío: sin tope."
+    )
     target_audience = models.TextField(
         blank=True, verbose_name="Audiencia Objetivo"
     )
     is_active = models.BooleanField(default=True, verbose_name="Activa")
+    timezone = models.CharField(
+        max_length=64,
+        blank=True,
+        validators=[schedule.validate_timezone],
+        verbose_name="Zona Horaria",
+        help_text="Zona horaria IANA en la que se interpretan los horarios de sus anuncios "
+                  "(ej. America/Guayaquil). Vacío: la del proyecto."
+    )
     created_at = models.DateTimeField(
         auto_now_add=True, verbose_name="Fecha de Creación"
     )
@@ -61,6 +107,14 @@ class Campaign(models.Model):
         updated_at = timezone.now()
         if not self.updated_at or self.updated_at < updated_at:
             self.updated_at = updated_at
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # `spent` lo acumula el control de gasto con UPDATE atómicos: guardar
+            # la campaña no debe sobrescribirlo con el valor que se leyó antes.
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "spent"
+            ]
         super().save(*args, **kwargs)
 
     def __str__(self) -> str:
@@ -69,6 +123,12 @@ class Campaign(models.Model):
     class Meta:
         verbose_name = "Campaña"
         ordering = ["-start_date"]
+        indexes = [
+            # Reconstrucción del índice de elegibilidad: campañas activas y vigentes.
+            models.Index(
+                fields=["is_active", "end_date", "start_date"], name="ads_campaign_active_dates_idx"
+            ),
+        ]
 
 
 class Keyword(models.Model):
@@ -118,6 +178,13 @@ class Ad(models.Model):
     total_impressions = models.PositiveIntegerField(
         default=0, verbose_name="Total de Impresiones"
     )
+    # Eventos descartados por el filtro de tráfico inválido (ver `ads.delivery.ivt`).
+    invalid_clicks = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Clicks Inválidos"
+    )
+    invalid_impressions = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Impresiones Inválidas"
+    )
 
     # Campos de segmentación
     target_age_min = models.PositiveIntegerField(
@@ -147,7 +214,8 @@ class Ad(models.Model):
 
     # Campos de programación
     display_start_time = models.TimeField(
-        null=True, blank=True, verbose_name="Hora de Inicio de Visualización"
+        null=True, blank=True, verbose_name="Hora de Inicio de Visualización",
+        help_text="Si es posterior a la hora de fin, la franja cruza la medianoche."
     )
     display_end_time = models.TimeField(
         null=True, blank=True, verbose_name="Hora de Fin de Visualización"
@@ -158,6 +226,17 @@ class Ad(models.Model):
         verbose_name="Días de la Semana de Visualización",
         help_text="Días de la semana separados por comas (ej. LUN,MAR,MIE)"
     )
+    # Programación compilada a partir de los tres campos anteriores en `save()`:
+    # máscara de días (bit 0 = lunes) y franja de minutos del día, inclusive.
+    display_days_mask = models.PositiveSmallIntegerField(
+        default=schedule.ALL_DAYS_MASK, editable=False, verbose_name="Máscara de Días"
+    )
+    display_start_minute = models.PositiveSmallIntegerField(
+        null=True, editable=False, verbose_name="Minuto de Inicio"
+    )
+    display_end_minute = models.PositiveSmallIntegerField(
+        null=True, editable=False, verbose_name="Minuto de Fin"
+    )
 
     # Campo para pruebas A/B
     ab_test_group = models.CharField(
@@ -165,12 +244,101 @@ class Ad(models.Model):
         help_text="Identificador del grupo de prueba A/B al que pertenece este anuncio (ej. 'Control', 'Variante A')."
     )
 
+    # Campo para el reparto de entregas
+    delivery_weight = models.PositiveIntegerField(
+        default=1,
+        validators=[MinValueValidator(1)],
+        verbose_name="Peso de Entrega",
+        help_text="Peso relativo en la selección aleatoria: un anuncio con peso 2 se muestra el doble que uno con peso 1."
+    )
+    frequency_cap = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1), MaxValueValidator(255)],
+        verbose_name="Tope de Frecuencia",
+        help_text="Máximo de impresiones del anuncio por sesión en la ventana de frecuencia "
+                  "(24 h por defecto). Vacío: sin tope."
+    )
+
+    SCHEDULE_FIELDS = {"display_start_time", "display_end_time", "display_days_of_week"}
+    COMPILED_SCHEDULE_FIELDS = {"display_days_mask", "display_start_minute", "display_end_minute"}
+
+    def save(self, *args, **kwargs):
+        """
+        Guarda el anuncio con su programación compilada y, si cambió la
+        ubicación, sus términos normalizados en `AdLocationToken`, en la misma
+        transacción (las señales que refrescan el índice de elegibilidad se
+        ejecutan al confirmarla).
+        """
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or self.SCHEDULE_FIELDS.intersection(update_fields):
+            self.compile_schedule()
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | self.COMPILED_SCHEDULE_FIELDS
+        if update_fields is not None and "target_location" not in update_fields:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.sync_location_tokens()
+
+    def compile_schedule(self):
+        """
+        Calcula la máscara de días y la franja en minutos a partir de los
+        campos de programación editables.
+        """
+        self.display_days_mask = schedule.days_mask(self.display_days_of_week)
+        self.display_start_minute = schedule.start_minute(self.display_start_time)
+        self.display_end_minute = schedule.end_minute(self.display_end_time)
+
+    def sync_location_tokens(self):
+        """
+        Ajusta los términos de ubicación a `target_location`. Las actualizaciones
+        hechas con `QuerySet.update()` no pasan por aquí y deben llamarlo.
+        """
+        tokens = split_tokens(self.target_location)
+        existing = set(self.location_tokens.values_list("token", flat=True))
+        if existing - tokens:
+            self.location_tokens.filter(token__in=existing - tokens).delete()
+        if tokens - existing:
+            AdLocationToken.objects.bulk_create(
+                AdLocationToken(ad=self, token=token) for token in tokens - existing
+            )
+
     def __str__(self):
         return f"{self.name}"
 
     class Meta:
         verbose_name = "Anuncio"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["is_active", "campaign"], name="ads_ad_active_campaign_idx"),
+        ]
+
+
+class AdLocationToken(models.Model):
+    """
+    Término de ubicación normalizado de un anuncio (uno por cada elemento de
+    `Ad.target_location`). Permite filtrar por ubicación con una búsqueda
+    exacta indexada en lugar de `icontains`.
+    """
+    ad = models.ForeignKey(
+        Ad, on_delete=models.CASCADE, related_name="location_tokens", verbose_name="Anuncio"
+    )
+    token = models.CharField(max_length=255, verbose_name="Ubicación Normalizada")
+
+    def __str__(self):
+        return f"{self.ad} - {self.token}"
+
+    class Meta:
+        verbose_name = "Ubicación de Anuncio"
+        verbose_name_plural = "Ubicaciones de Anuncios"
+        constraints = [
+            models.UniqueConstraint(fields=["ad", "token"], name="ads_location_token_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["token"], name="ads_location_token_idx"),
+        ]
 
 
 class Click(models.Model):
@@ -200,6 +368,42 @@ class Click(models.Model):
     class Meta:
         verbose_name = "Click"
         ordering = ["-timestamp"]
+        indexes = [
+            # Rangos de fechas (agregados, exportaciones) globales y por anuncio.
+            models.Index(fields=["timestamp"], name="ads_click_ts_idx"),
+            models.Index(fields=["ad", "timestamp"], name="ads_click_ad_ts_idx"),
+            # Búsquedas por sesión (atribución de conversiones).
+            models.Index(fields=["session_id", "timestamp"], name="ads_click_session_ts_idx"),
+        ]
+
+
+class Impression(models.Model):
+    """
+    Modelo de solo inserción para registrar cada impresión de un anuncio.
+    Las filas se escriben en lotes con bulk_create (ver ads.delivery.buffers).
+    """
+
+    ad = models.ForeignKey(
+        Ad, on_delete=models.CASCADE, related_name="impressions", verbose_name="Anuncio"
+    )
+    timestamp = models.DateTimeField(
+        default=timezone.now, verbose_name="Fecha/Hora de la Impresión"
+    )
+    session_hash = models.BinaryField(
+        max_length=32, null=True, blank=True, verbose_name="Hash de Sesión (SHA-256)"
+    )
+
+    def __str__(self):
+        return f"Impresión de {self.ad_id} el {self.timestamp}"
+
+    class Meta:
+        verbose_name = "Impresión"
+        verbose_name_plural = "Impresiones"
+        ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=["timestamp"], name="ads_impression_ts_idx"),
+            models.Index(fields=["ad", "timestamp"], name="ads_impression_ad_ts_idx"),
+        ]
 
 
 class Carousel(models.Model):
@@ -251,6 +455,11 @@ class Conversion(models.Model):
         max_length=255, verbose_name="ID de Sesión (hash)", null=True, blank=True,
         help_text="ID de sesión del usuario que realizó la conversión, para atribución."
     )
+    event_id = models.CharField(
+        max_length=128, null=True, blank=True, verbose_name="ID de Evento",
+        help_text="Identificador del evento en el sistema del anunciante; una conversión "
+                  "con un ID ya registrado se ignora, así que los reintentos no duplican."
+    )
 
     def __str__(self):
         return f"Conversión de {self.conversion_type} para {self.ad.name} el {self.timestamp}"
@@ -259,3 +468,125 @@ class Conversion(models.Model):
         verbose_name = "Conversión"
         verbose_name_plural = "Conversiones"
         ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=["timestamp"], name="ads_conversion_ts_idx"),
+            models.Index(fields=["ad", "timestamp"], name="ads_conversion_ad_ts_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["event_id"], name="ads_conversion_event_unique"),
+        ]
+
+
+class AdHourlyStats(models.Model):
+    """
+    Agregado horario por anuncio de clics, impresiones y conversiones.
+    Lo mantiene el comando `update_rollups` a partir de los eventos crudos.
+    """
+    ad = models.ForeignKey(
+        Ad, on_delete=models.CASCADE, related_name="hourly_stats", verbose_name="Anuncio"
+    )
+    hour = models.DateTimeField(verbose_name="Hora")
+    clicks = models.PositiveIntegerField(default=0, verbose_name="Clicks")
+    unique_clicks = models.PositiveIntegerField(default=0, verbose_name="Clicks Únicos")
+    unique_sketch = models.BinaryField(
+        null=True, blank=True, verbose_name="Sketch HyperLogLog de Sesiones",
+        help_text="Sketch de los session_id de los clics de la hora (ver ads.analytics.hll)."
+    )
+    impressions = models.PositiveIntegerField(default=0, verbose_name="Impresiones")
+    conversions = models.PositiveIntegerField(default=0, verbose_name="Conversiones")
+    conversion_value = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, verbose_name="Valor de Conversiones"
+    )
+
+    def __str__(self):
+        return f"Estadísticas de {self.ad_id} a las {self.hour}"
+
+    class Meta:
+        verbose_name = "Estadística Horaria"
+        verbose_name_plural = "Estadísticas Horarias"
+        ordering = ["-hour"]
+        constraints = [
+            models.UniqueConstraint(fields=["ad", "hour"], name="ads_hourly_stats_ad_hour_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["hour"], name="ads_hourly_stats_hour_idx"),
+        ]
+
+
+class AdHourlyConversionStats(models.Model):
+    """
+    Agregado horario por anuncio y tipo de conversión.
+    """
+    ad = models.ForeignKey(
+        Ad, on_delete=models.CASCADE, related_name="hourly_conversion_stats", verbose_name="Anuncio"
+    )
+    hour = models.DateTimeField(verbose_name="Hora")
+    conversion_type = models.CharField(max_length=100, verbose_name="Tipo de Conversión")
+    conversions = models.PositiveIntegerField(default=0, verbose_name="Conversiones")
+    conversion_value = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, verbose_name="Valor de Conversiones"
+    )
+
+    def __str__(self):
+        return f"Conversiones de {self.conversion_type} para {self.ad_id} a las {self.hour}"
+
+    class Meta:
+        verbose_name = "Estadística Horaria de Conversión"
+        verbose_name_plural = "Estadísticas Horarias de Conversión"
+        ordering = ["-hour"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ad", "hour", "conversion_type"], name="ads_hourly_conv_ad_hour_type_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["hour"], name="ads_hourly_conv_hour_idx"),
+        ]
+
+
+class AdHourlyAttributionStats(models.Model):
+    """
+    Conversiones atribuidas por último clic, por anuncio clicado, hora de la
+    conversión y tipo. Las mantiene el comando `update_attribution`.
+    """
+    ad = models.ForeignKey(
+        Ad, on_delete=models.CASCADE, related_name="hourly_attribution_stats", verbose_name="Anuncio"
+    )
+    hour = models.DateTimeField(verbose_name="Hora")
+    conversion_type = models.CharField(max_length=100, verbose_name="Tipo de Conversión")
+    conversions = models.PositiveIntegerField(default=0, verbose_name="Conversiones Atribuidas")
+    conversion_value = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, verbose_name="Valor Atribuido"
+    )
+
+    def __str__(self):
+        return f"Conversiones atribuidas de {self.conversion_type} para {self.ad_id} a las {self.hour}"
+
+    class Meta:
+        verbose_name = "Estadística Horaria de Atribución"
+        verbose_name_plural = "Estadísticas Horarias de Atribución"
+        ordering = ["-hour"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ad", "hour", "conversion_type"], name="ads_hourly_attr_ad_hour_type_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["hour"], name="ads_hourly_attr_hour_idx"),
+        ]
+
+
+class RollupWatermark(models.Model):
+    """
+    Último id de evento crudo ya incorporado a los agregados, por tabla de origen.
+    """
+    source = models.CharField(max_length=50, unique=True, verbose_name="Origen")
+    last_id = models.BigIntegerField(default=0, verbose_name="Último ID Procesado")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Última Actualización")
+
+    def __str__(self):
+        return f"{self.source} hasta {self.last_id}"
+
+    class Meta:
+        verbose_name = "Marca de Agua de Agregados"
+        verbose_name_plural = "Marcas de Agua de Agregados"
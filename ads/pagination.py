@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+
+class StandardPagination(PageNumberPagination):
+    """
+    Paginación por defecto de los endpoints de listado de la API.
+    El cliente puede pedir otro tamaño con `?page_size=`, hasta `max_page_size`.
+    """
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador para tablas de eventos muy grandes (listados del admin).
+
+    En lugar de un `COUNT(*)` exacto, que recorre toda la tabla, cuenta como
+    mucho `ADS_ADMIN_COUNT_LIMIT` filas (`COUNT` sobre una subconsulta con
+    `LIMIT`). En PostgreSQL, el listado sin filtros usa la estimación de filas
+    del planificador (`pg_class.reltuples`) si supera ese límite. Con más
+    filas que el límite, el total y el número de páginas son aproximados.
+    """
+
+    @cached_property
+    def count(self):
+        limit = getattr(settings, "ADS_ADMIN_COUNT_LIMIT", 10000)
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = self._estimated_rows(queryset)
+            if estimate is not None and estimate > limit:
+                return estimate
+        return queryset.order_by()[:limit].count()
+
+    @staticmethod
+    def _estimated_rows(queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # -1: la tabla todavía no se ha analizado.
+        return row[0] if row and row[0] >= 0 else None
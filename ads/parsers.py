@@ -0,0 +1,15 @@
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Cuerpo NDJSON (un objeto JSON por línea). No carga el cuerpo completo:
+    retorna un iterador perezoso de pares (número de línea, línea) que se
+    consume a medida que se procesa, sin decodificar cada línea todavía.
+    """
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return (
+            (number, line) for number, line in enumerate(stream, 1) if line.strip()
+        )
@@ -0,0 +1,101 @@
+import datetime
+import zoneinfo
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+# Máscara de días: el bit i corresponde a weekday() == i (0 = lunes).
+ALL_DAYS_MASK = 0b1111111
+MINUTES_PER_DAY = 24 * 60
+
+# Abreviaturas aceptadas en `display_days_of_week` (inglés y español) -> weekday()
+DAY_ABBREVIATIONS = {
+    "MON": 0, "TUE": 1, "WED": 2, "THU": 3, "FRI": 4, "SAT": 5, "SUN": 6,
+    "LUN": 0, "MAR": 1, "MIE": 2, "JUE": 3, "VIE": 4, "SAB": 5, "DOM": 6,
+}
+
+
+def days_mask(value):
+    """
+    Convierte una cadena como "MON,TUE" o "LUN,MAR" en una máscara de días.
+    Una cadena vacía significa "todos los días"; los valores desconocidos se
+    ignoran, así que una cadena sin ningún día válido no se muestra nunca.
+    """
+    if not value.strip():
+        return ALL_DAYS_MASK
+    mask = 0
+    for token in value.upper().replace(" ", "").split(","):
+        if token[:3] in DAY_ABBREVIATIONS:
+            mask |= 1 << DAY_ABBREVIATIONS[token[:3]]
+    return mask
+
+
+def start_minute(value):
+    """
+    Primer minuto del día (0-1439) en que se puede mostrar un anuncio que
+    empieza a la hora `value`. Una hora con segundos empieza el minuto siguiente.
+    """
+    if value is None:
+        return None
+    minute = value.hour * 60 + value.minute
+    return minute + (value.second > 0 or value.microsecond > 0)
+
+
+def end_minute(value):
+    """
+    Último minuto del día (0-1439, inclusive) en que se puede mostrar un anuncio
+    que termina a la hora `value`.
+    """
+    if value is None:
+        return None
+    return value.hour * 60 + value.minute
+
+
+def validate_timezone(value):
+    """
+    Valida un nombre de zona horaria IANA (p. ej. "America/Guayaquil").
+    """
+    if not value:
+        return
+    try:
+        zoneinfo.ZoneInfo(value)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError) as exc:
+        raise ValidationError(f"Zona horaria desconocida: {value}") from exc
+
+
+def get_zone(name):
+    """
+    Zona horaria de una campaña; la del proyecto si no se indica.
+    """
+    return zoneinfo.ZoneInfo(name) if name else timezone.get_default_timezone()
+
+
+def active_intervals(mask, start, end, zone, first_day, last_day):
+    """
+    Intervalos [inicio, fin) en UTC en los que una programación está activa
+    para los días locales de `first_day` a `last_day` (inclusive).
+
+    `start` y `end` son minutos del día (inclusive) o None. Si `start` es
+    posterior a `end` la franja cruza la medianoche: empieza el día indicado
+    en la máscara y termina al día siguiente.
+    """
+    start = 0 if start is None else start
+    end = MINUTES_PER_DAY - 1 if end is None else end
+    intervals = []
+    day = first_day
+    while day <= last_day:
+        if mask & (1 << day.weekday()):
+            begins = _instant(day, start, zone)
+            finish_day = day if start <= end else day + datetime.timedelta(days=1)
+            intervals.append((begins, _instant(finish_day, end + 1, zone)))
+        day += datetime.timedelta(days=1)
+    return intervals
+
+
+def _instant(day, minute, zone):
+    day += datetime.timedelta(days=minute // MINUTES_PER_DAY)
+    minute %= MINUTES_PER_DAY
+    local = datetime.datetime.combine(
+        day, datetime.time(minute // 60, minute % 60), tzinfo=zone
+    )
+    return local.astimezone(datetime.timezone.utc)
@@ -1,4 +1,9 @@
+from django.conf import settings
 from rest_framework import serializers
+
+from ads.analytics.downsampling import METHODS, SUM
+from ads.analytics.reports import DAY, HOUR, RANKING_ORDERINGS, TIMELINE_METRICS
+from ads.delivery import Targeting
 from ads.models import Ad, Campaign, Keyword, Carousel
 
 
@@ -11,7 +16,7 @@ class KeywordSerializer(serializers.ModelSerializer):
 class CampaignSerializer(serializers.ModelSerializer):
     class Meta:
         model = Campaign
-        fields = ['name', 'start_date', 'end_date', 'budget', 'target_audience', 'is_active']
+        fields = ['name', 'start_date', 'end_date', 'budget', 'target_audience', 'is_active', 'timezone']
 
 
 class AdSerializer(serializers.ModelSerializer):
@@ -38,6 +43,7 @@ class AdSerializer(serializers.ModelSerializer):
             'display_end_time',
             'display_days_of_week',
             'ab_test_group',
+            'delivery_weight',
         ]
 
 
@@ -53,3 +59,95 @@ class CarouselSerializer(serializers.ModelSerializer):
             'is_active',
             'campaign',
         ]
+
+
+class CarouselDetailSerializer(CarouselSerializer):
+    """
+    Carrusel con sólo sus anuncios elegibles y programados en este momento
+    (la vista los deja en el atributo `eligible_ads`).
+    """
+    ads = AdSerializer(source='eligible_ads', many=True, read_only=True)
+
+
+class AdSlotSerializer(serializers.Serializer):
+    """
+    Un espacio publicitario de la página, identificado por el cliente.
+    """
+    id = serializers.CharField(max_length=100)
+
+
+class AdBatchRequestSerializer(serializers.Serializer):
+    """
+    Solicitud de anuncios para varios espacios con una segmentación común.
+    """
+    slots = AdSlotSerializer(
+        many=True, allow_empty=False, max_length=settings.ADS_BATCH_MAX_SLOTS
+    )
+    age = serializers.IntegerField(required=False, allow_null=True)
+    gender = serializers.CharField(required=False, allow_blank=True)
+    location = serializers.CharField(required=False, allow_blank=True)
+    keywords = serializers.ListField(child=serializers.CharField(), required=False)
+    ab_test_group = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_slots(self, value):
+        ids = [slot['id'] for slot in value]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError('Slot ids must be unique.')
+        return value
+
+    def get_targeting(self):
+        data = self.validated_data
+        return Targeting(
+            age=data.get('age'),
+            gender=data.get('gender') or None,
+            location=data.get('location') or None,
+            keywords=tuple(data.get('keywords', ())),
+            ab_test_group=data.get('ab_test_group') or None,
+        )
+
+
+class StatisticsRangeSerializer(serializers.Serializer):
+    """
+    Rango de fechas (ambas incluidas) de las consultas de estadísticas.
+    """
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, data):
+        start, end = data.get('start_date'), data.get('end_date')
+        if start and end and start > end:
+            raise serializers.ValidationError('start_date must not be after end_date.')
+        return data
+
+
+class AdRankingQuerySerializer(StatisticsRangeSerializer):
+    """
+    Parámetros del ranking de anuncios por clics, impresiones o CTR.
+    """
+    ordering = serializers.ChoiceField(
+        choices=[prefix + field for field in RANKING_ORDERINGS for prefix in ('-', '')],
+        default='-clicks',
+    )
+
+
+class TimelineQuerySerializer(StatisticsRangeSerializer):
+    """
+    Parámetros de una serie temporal. Con `selected_date` la serie es por
+    hora de ese día; `points` limita los puntos devueltos.
+    """
+    metric = serializers.ChoiceField(choices=TIMELINE_METRICS)
+    granularity = serializers.ChoiceField(choices=[DAY, HOUR], default=DAY)
+    selected_date = serializers.DateField(required=False)
+    points = serializers.IntegerField(
+        min_value=3,
+        max_value=settings.ADS_STATS_MAX_POINTS,
+        default=settings.ADS_STATS_DEFAULT_POINTS,
+    )
+    method = serializers.ChoiceField(choices=METHODS, default=SUM)
+
+    def validate(self, data):
+        data = super().validate(data)
+        selected = data.get('selected_date')
+        if selected:
+            data.update(start_date=selected, end_date=selected, granularity=HOUR)
+        return data
@@ -0,0 +1,87 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from ads.catalog import bump_catalog_version
+from ads.delivery.index import eligibility_index
+from ads.models import Ad, Campaign, Carousel, Keyword
+
+# Campos que sólo cambian los contadores; guardarlos no afecta a la elegibilidad.
+COUNTER_FIELDS = {
+    "total_clicks", "total_impressions", "invalid_clicks", "invalid_impressions", "updated_at",
+}
+
+
+@receiver(post_save, sender=Ad)
+def ad_saved(sender, instance, update_fields=None, **kwargs):
+    """
+    Refresca el anuncio en el índice de elegibilidad al confirmarse la transacción.
+    """
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    transaction.on_commit(lambda: eligibility_index.refresh_ads([instance.pk]))
+
+
+@receiver(post_delete, sender=Ad)
+def ad_deleted(sender, instance, **kwargs):
+    """
+    Retira el anuncio eliminado del índice de elegibilidad.
+    """
+    transaction.on_commit(lambda: eligibility_index.refresh_ads([instance.pk]))
+
+
+@receiver(post_save, sender=Campaign)
+def campaign_saved(sender, instance, **kwargs):
+    """
+    Refresca los anuncios de la campaña (estado o fechas pueden haber cambiado).
+    """
+    transaction.on_commit(lambda: eligibility_index.refresh_campaign(instance.pk))
+
+
+@receiver(m2m_changed, sender=Ad.target_keywords.through)
+def ad_keywords_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Refresca los anuncios cuyas palabras clave han cambiado.
+    """
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        ad_ids = [instance.pk]
+    elif pk_set is not None:
+        ad_ids = list(pk_set)
+    else:
+        # `keyword.ad_set.clear()` no informa de los anuncios afectados.
+        transaction.on_commit(eligibility_index.invalidate)
+        return
+    transaction.on_commit(lambda: eligibility_index.refresh_ads(ad_ids))
+
+
+@receiver(post_save, sender=Keyword)
+@receiver(post_delete, sender=Keyword)
+def keyword_changed(sender, instance, created=False, **kwargs):
+    """
+    Renombrar o eliminar una palabra clave afecta a todos sus anuncios.
+    """
+    if not created:
+        transaction.on_commit(eligibility_index.invalidate)
+
+
+@receiver(post_save, sender=Ad)
+@receiver(post_delete, sender=Ad)
+@receiver(post_save, sender=Campaign)
+@receiver(post_delete, sender=Campaign)
+@receiver(post_save, sender=Keyword)
+@receiver(post_delete, sender=Keyword)
+@receiver(post_save, sender=Carousel)
+@receiver(post_delete, sender=Carousel)
+@receiver(m2m_changed, sender=Ad.target_keywords.through)
+@receiver(m2m_changed, sender=Carousel.ads.through)
+def catalog_changed(sender, update_fields=None, action=None, **kwargs):
+    """
+    Cualquier cambio en el catálogo invalida los ETag de las respuestas derivadas.
+    """
+    if action is not None and not action.startswith("post_"):
+        return
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    transaction.on_commit(bump_catalog_version)
@@ -0,0 +1,96 @@
+import calendar
+import datetime
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.db.models import Max, Min
+from django.utils import formats, timezone
+from django.utils.text import capfirst
+from django.utils.translation import gettext as _
+
+register = template.Library()
+
+
+@register.inclusion_tag("admin/date_hierarchy.html")
+def event_date_hierarchy(cl):
+    """
+    Jerarquía de fechas para tablas de eventos muy grandes.
+
+    La de Django lista los años, meses o días con datos mediante un
+    `SELECT DISTINCT` sobre la fecha truncada, que recorre toda la tabla.
+    Aquí sólo se consultan la primera y la última fecha (dos búsquedas en el
+    índice) y se ofrecen todos los periodos entre ellas, aunque alguno esté vacío.
+    """
+    field_name = cl.date_hierarchy
+    year_field = f"{field_name}__year"
+    month_field = f"{field_name}__month"
+    day_field = f"{field_name}__day"
+    year_lookup = cl.params.get(year_field)
+    month_lookup = cl.params.get(month_field)
+    if year_lookup and month_lookup and cl.params.get(day_field):
+        # El nivel de día no consulta la base de datos.
+        return date_hierarchy(cl)
+
+    bounds = cl.queryset.aggregate(first=Min(field_name), last=Max(field_name))
+    first, last = bounds["first"], bounds["last"]
+    if first is None or last is None:
+        return {"show": True, "back": None, "choices": []}
+    first, last = (
+        timezone.localtime(moment) if timezone.is_aware(moment) else moment
+        for moment in (first, last)
+    )
+    if not year_lookup:
+        # Nivel inicial como en Django: si todo cae en un año (o mes), empezar por él.
+        if first.year == last.year:
+            year_lookup = first.year
+            if first.month == last.month:
+                month_lookup = first.month
+
+    def link(filters):
+        return cl.get_query_string(filters, [f"{field_name}__"])
+
+    def within(day):
+        return first.date() <= day <= last.date()
+
+    if year_lookup and month_lookup:
+        year, month = int(year_lookup), int(month_lookup)
+        days = [
+            datetime.date(year, month, number)
+            for number in range(1, calendar.monthrange(year, month)[1] + 1)
+        ]
+        return {
+            "show": True,
+            "back": {"link": link({year_field: year}), "title": str(year)},
+            "choices": [
+                {
+                    "link": link({year_field: year, month_field: month, day_field: day.day}),
+                    "title": capfirst(formats.date_format(day, "MONTH_DAY_FORMAT")),
+                }
+                for day in days
+                if within(day)
+            ],
+        }
+    if year_lookup:
+        year = int(year_lookup)
+        months = [datetime.date(year, month, 1) for month in range(1, 13)]
+        return {
+            "show": True,
+            "back": {"link": link({}), "title": _("All dates")},
+            "choices": [
+                {
+                    "link": link({year_field: year, month_field: month.month}),
+                    "title": capfirst(formats.date_format(month, "YEAR_MONTH_FORMAT")),
+                }
+                for month in months
+                if (month.year, month.month) >= (first.year, first.month)
+                and (month.year, month.month) <= (last.year, last.month)
+            ],
+        }
+    return {
+        "show": True,
+        "back": None,
+        "choices": [
+            {"link": link({year_field: str(year)}), "title": str(year)}
+            for year in range(first.year, last.year + 1)
+        ],
+    }
@@ -0,0 +1,36 @@
+import datetime
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ads.models import Ad, Campaign
+
+
+class EventTestCase(TestCase):
+    """
+    Base con una campaña activa y un anuncio.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        cls.campaign = Campaign.objects.create(
+            name="Campaña", start_date=today, end_date=today + datetime.timedelta(days=7), budget=100
+        )
+        cls.ad = cls.create_ad("Anuncio")
+
+    @classmethod
+    def create_ad(cls, name, campaign=None, **fields):
+        return Ad.objects.create(
+            campaign=campaign or cls.campaign,
+            name=name,
+            image="images/x.png",
+            target_url=f"http://example.com/{name}",
+            **fields,
+        )
+
+
+# Los búferes escriben en el hilo de la prueba en lugar de en un hilo aparte.
+synchronous_writes = override_settings(
+    ADS_COUNTER_FLUSH_INTERVAL=0, ADS_EVENT_FLUSH_INTERVAL=0, ADS_PACING_RECONCILE_INTERVAL=0
+)
@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase
+
+from ads.analytics.ab import two_proportion_test, wilson_interval
+
+
+class ABStatisticsTests(SimpleTestCase):
+    """
+    Intervalo de Wilson y prueba z de dos proporciones contra valores conocidos.
+    """
+
+    def test_wilson_interval(self):
+        low, high = wilson_interval(260, 10000)
+        self.assertAlmostEqual(float(low), 0.023058, places=5)
+        self.assertAlmostEqual(float(high), 0.029306, places=5)
+        low, high = wilson_interval(0, 0)
+        self.assertEqual((float(low), float(high)), (0.0, 0.0))
+
+    def test_two_proportion_test(self):
+        z, p_value = two_proportion_test(260, 10000, 200, 10000)
+        self.assertAlmostEqual(float(z), 2.8303, places=4)
+        self.assertAlmostEqual(float(p_value), 0.00465, places=5)
+
+    def test_rates_above_one_are_clamped(self):
+        low, high = wilson_interval(25, 10)
+        self.assertLessEqual(float(high), 1.0)
+        self.assertGreater(float(low), 0.0)
+        z, p_value = two_proportion_test(3, 12, 25, 10)
+        self.assertLess(float(z), 0)
+        self.assertLess(float(p_value), 0.05)
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ads.models import Carousel, Click
+from ads.pagination import EstimatedCountPaginator
+from ads.tests.base import EventTestCase
+
+
+class EstimatedCountPaginatorTests(EventTestCase):
+    """
+    Conteo acotado de los listados del admin.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Click.objects.bulk_create(Click(ad=cls.ad, session_id=str(i % 2)) for i in range(8))
+
+    @override_settings(ADS_ADMIN_COUNT_LIMIT=5)
+    def test_count_is_bounded(self):
+        paginator = EstimatedCountPaginator(Click.objects.order_by("-pk"), 2)
+        self.assertEqual(paginator.count, 5)
+        self.assertEqual(paginator.num_pages, 3)
+
+    @override_settings(ADS_ADMIN_COUNT_LIMIT=5)
+    def test_small_filtered_count_is_exact(self):
+        paginator = EstimatedCountPaginator(Click.objects.filter(session_id="0").order_by("-pk"), 2)
+        self.assertEqual(paginator.count, 4)
+
+
+class ChangelistQueryTests(EventTestCase):
+    """
+    Los listados del admin hacen el mismo número de consultas sin importar
+    cuántas filas muestren.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = get_user_model().objects.create_superuser("admin", "admin@example.com", "clave")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def _add_rows(self):
+        number = Carousel.objects.count()
+        ad = self.create_ad(f"Anuncio {number}")
+        Click.objects.create(ad=ad, session_id="s")
+        Carousel.objects.create(name=f"Carrusel {number}", campaign=self.campaign).ads.add(ad, self.ad)
+
+    def test_query_count_does_not_grow_with_the_rows(self):
+        urls = [reverse(f"admin:ads_{model}_changelist") for model in ("ad", "click", "carousel")]
+        self._add_rows()
+        before = [self._queries(url) for url in urls]
+        for _ in range(3):
+            self._add_rows()
+        self.assertEqual([self._queries(url) for url in urls], before)
@@ -0,0 +1,91 @@
+import json
+
+from django.conf import settings
+from django.urls import reverse
+
+from ads.delivery import eligibility_index
+from ads.models import Carousel, Impression
+from ads.tests.base import EventTestCase, synchronous_writes
+
+
+class CarouselAPITests(EventTestCase):
+    """
+    Listado paginado y detalle de carruseles.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.inactive = cls.create_ad("Inactivo", is_active=False)
+        cls.carousel = Carousel.objects.create(name="Portada", campaign=cls.campaign)
+        cls.carousel.ads.add(cls.ad, cls.inactive)
+        for number in range(12):
+            Carousel.objects.create(name=f"Carrusel {number:02}", campaign=cls.campaign)
+        cls.hidden = Carousel.objects.create(name="Oculto", campaign=cls.campaign, is_active=False)
+
+    def setUp(self):
+        eligibility_index.rebuild()
+        self.addCleanup(eligibility_index.invalidate)
+
+    def test_detail_lists_only_eligible_ads(self):
+        response = self.client.get(reverse("ads:carousel_detail_api", args=[self.carousel.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["name"], "Portada")
+        self.assertEqual([ad["id"] for ad in response.json()["ads"]], [self.ad.pk])
+
+    def test_detail_of_inactive_carousel_is_not_found(self):
+        self.assertEqual(self.client.get(reverse("ads:carousel_detail_api", args=[self.hidden.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse("ads:carousel_detail_api", args=[9999])).status_code, 404)
+
+    def test_list_is_paginated(self):
+        response = self.client.get(reverse("ads:carousel_list_api"), {"page_size": 5})
+        data = response.json()
+        self.assertEqual(data["count"], 13)
+        self.assertEqual(len(data["results"]), 5)
+        self.assertIsNotNone(data["next"])
+
+        last = self.client.get(reverse("ads:carousel_list_api"), {"page_size": 5, "page": 3}).json()
+        self.assertEqual([carousel["name"] for carousel in last["results"]], ["Carrusel 10", "Carrusel 11", "Portada"])
+        self.assertIsNone(last["next"])
+
+
+@synchronous_writes
+class AdBatchAPITests(EventTestCase):
+    """
+    Decisión de varios espacios publicitarios en una sola solicitud.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.second = cls.create_ad("Segundo")
+
+    def setUp(self):
+        eligibility_index.rebuild()
+        self.addCleanup(eligibility_index.invalidate)
+        self.url = reverse("ads:ad_batch_api")
+
+    def _post(self, slots, **targeting):
+        body = {"slots": [{"id": slot} for slot in slots], **targeting}
+        return self.client.post(self.url, json.dumps(body), content_type="application/json")
+
+    def test_slots_get_distinct_ads(self):
+        response = self._post(["top", "side", "footer"])
+        self.assertEqual(response.status_code, 200)
+        slots = response.json()["slots"]
+        self.assertEqual([slot["id"] for slot in slots], ["top", "side", "footer"])
+        self.assertEqual({slot["ad"]["id"] for slot in slots[:2]}, {self.ad.pk, self.second.pk})
+        self.assertIsNone(slots[2]["ad"])
+        self.assertTrue(slots[0]["ad"]["image"].startswith("http://testserver/"))
+        self.assertEqual(Impression.objects.count(), 2)
+
+    def test_targeted_ad_is_preferred(self):
+        grouped = self.create_ad("Grupo B", ab_test_group="B")
+        eligibility_index.rebuild()
+        slots = self._post(["top"], ab_test_group="B").json()["slots"]
+        self.assertEqual(slots[0]["ad"]["id"], grouped.pk)
+
+    def test_invalid_slots_are_rejected(self):
+        self.assertEqual(self._post(["top", "top"]).status_code, 400)
+        self.assertEqual(self._post([]).status_code, 400)
+        self.assertEqual(self._post([str(slot) for slot in range(settings.ADS_BATCH_MAX_SLOTS + 1)]).status_code, 400)
@@ -0,0 +1,103 @@
+import importlib
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import override_settings
+from django.urls import clear_url_caches, reverse
+
+from ads.delivery import click_buffer, counter_buffer, eligibility_index, impression_buffer, recent_clicks
+from ads.models import Carousel, Click, Impression
+from ads.tests.base import EventTestCase, synchronous_writes
+
+BROWSER = "Mozilla/5.0 (X11; Linux x86_64)"
+
+
+def _reload_urls():
+    importlib.reload(importlib.import_module("ads.urls"))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+@synchronous_writes
+class AsyncViewTests(EventTestCase):
+    """
+    Vistas asíncronas del camino de entrega (`ADS_ASYNC_VIEWS`).
+
+    Los búferes no escriben dentro del bucle de eventos: se vacían en la
+    prueba después de cada solicitud.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Las URL se eligen al importar `ads.urls`; se restauran al terminar.
+        cls.addClassCleanup(_reload_urls)
+        cls.enterClassContext(override_settings(ADS_ASYNC_VIEWS=True))
+        _reload_urls()
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.carousel = Carousel.objects.create(name="Portada", campaign=cls.campaign)
+        cls.carousel.ads.add(cls.ad)
+
+    def setUp(self):
+        for buffer in (click_buffer, counter_buffer, impression_buffer):
+            patcher = mock.patch.object(buffer, "_ensure_started")
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self._flush)
+        recent_clicks.clear()
+        self.addCleanup(recent_clicks.clear)
+        eligibility_index.invalidate()
+        self.addCleanup(eligibility_index.invalidate)
+
+    def _get(self, url, **kwargs):
+        return async_to_sync(self.async_client.get)(url, **kwargs)
+
+    def _post(self, url, body):
+        return async_to_sync(self.async_client.post)(url, body, content_type="application/json")
+
+    def _flush(self):
+        for buffer in (impression_buffer, click_buffer, counter_buffer):
+            buffer.flush()
+
+    def test_ad_api_records_the_impression(self):
+        response = self._get(reverse("ads:ad_list_api"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["id"], self.ad.pk)
+        self.assertTrue(response.json()["image"].startswith("http://testserver/"))
+        self.assertFalse(Impression.objects.exists())
+        self._flush()
+        self.assertEqual(Impression.objects.get().ad_id, self.ad.pk)
+
+    def test_stale_index_is_rebuilt_before_deciding(self):
+        self.create_ad("Nuevo", ab_test_group="B")
+        eligibility_index._built_at = 0.0
+        response = self._get(reverse("ads:ad_list_api"), data={"ab_test_group": "B"})
+        self.assertEqual(response.json()["name"], "Nuevo")
+
+    def test_batch(self):
+        response = self._post(reverse("ads:ad_batch_api"), json.dumps({"slots": [{"id": "top"}, {"id": "side"}]}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([slot["ad"] and slot["ad"]["id"] for slot in response.json()["slots"]], [self.ad.pk, None])
+        self.assertEqual(self._post(reverse("ads:ad_batch_api"), "{").status_code, 400)
+
+    def test_carousel_detail_and_conditional_request(self):
+        url = reverse("ads:carousel_detail_api", args=[self.carousel.pk])
+        response = self._get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([ad["id"] for ad in response.json()["ads"]], [self.ad.pk])
+        self.assertEqual(self._get(url, headers={"if-none-match": response["ETag"]}).status_code, 304)
+        self.assertEqual(self._get(reverse("ads:carousel_detail_api", args=[9999])).status_code, 404)
+
+    def test_redirect_records_the_click(self):
+        response = self._get(reverse("ads:ad_redirect", args=[self.ad.pk]), headers={"user-agent": BROWSER})
+        self.assertRedirects(response, self.ad.target_url, fetch_redirect_response=False)
+        self._flush()
+        self.assertEqual(Click.objects.get().ad_id, self.ad.pk)
+        self.ad.refresh_from_db()
+        self.assertEqual(self.ad.total_clicks, 1)
+        self.assertEqual(self._get(reverse("ads:ad_redirect", args=[9999])).status_code, 404)
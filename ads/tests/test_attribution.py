@@ -0,0 +1,110 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.db.models import Sum
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from ads.analytics.attribution import WATERMARK, attribute, reset_attribution, update_attribution
+from ads.models import AdHourlyAttributionStats, Click, Conversion, RollupWatermark
+from ads.tests.base import EventTestCase
+
+
+class AttributionTests(SimpleTestCase):
+    """
+    Atribución por último clic en los bordes de la ventana.
+    """
+
+    def setUp(self):
+        self.now = datetime.datetime(2025, 6, 1, 12, tzinfo=datetime.timezone.utc)
+        self.window = datetime.timedelta(hours=1)
+
+    def _attribute(self, clicks, conversion_at):
+        conversion = (conversion_at, 1, "s", "compra", Decimal(1))
+        clicks = sorted(
+            (moment, pk, ad_id, session) for pk, (moment, ad_id, session) in enumerate(clicks, 1)
+        )
+        return [ad_id for _, ad_id in attribute([conversion], clicks, self.window)]
+
+    def test_click_at_window_start_counts(self):
+        self.assertEqual(self._attribute([(self.now - self.window, 7, "s")], self.now), [7])
+
+    def test_click_before_window_is_ignored(self):
+        moment = self.now - self.window - datetime.timedelta(microseconds=1)
+        self.assertEqual(self._attribute([(moment, 7, "s")], self.now), [])
+
+    def test_click_at_conversion_time_counts(self):
+        self.assertEqual(self._attribute([(self.now, 7, "s")], self.now), [7])
+
+    def test_last_click_of_the_session_wins(self):
+        clicks = [
+            (self.now - datetime.timedelta(minutes=30), 7, "s"),
+            (self.now - datetime.timedelta(minutes=10), 8, "s"),
+            (self.now - datetime.timedelta(minutes=5), 9, "other"),
+            (self.now + datetime.timedelta(minutes=1), 10, "s"),
+        ]
+        self.assertEqual(self._attribute(clicks, self.now), [8])
+
+
+class UpdateAttributionTests(EventTestCase):
+    """
+    Atribución incremental desde la marca de agua.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = cls.create_ad("Otro")
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def _click(self, ad, session, ago):
+        Click.objects.create(ad=ad, session_id=session, timestamp=self.now - ago)
+
+    def _conversion(self, session, ago, value=1):
+        Conversion.objects.create(
+            ad=self.ad, session_id=session, conversion_type="compra", value=value, timestamp=self.now - ago
+        )
+
+    def _totals(self):
+        rows = AdHourlyAttributionStats.objects.values("ad_id").annotate(
+            conversions=Sum("conversions"), value=Sum("conversion_value")
+        )
+        return sorted((row["ad_id"], row["conversions"], row["value"]) for row in rows)
+
+    @override_settings(ADS_ATTRIBUTION_DELAY_SECONDS=60)
+    def test_recent_conversion_waits_for_buffered_clicks(self):
+        self._conversion("s", datetime.timedelta(seconds=5))
+        self.assertEqual(update_attribution(), 0)
+        self.assertFalse(RollupWatermark.objects.filter(source=WATERMARK, last_id__gt=0).exists())
+
+        # El clic llega tarde desde el búfer de escritura y aún cuenta.
+        self._click(self.other, "s", datetime.timedelta(seconds=10))
+        with override_settings(ADS_ATTRIBUTION_DELAY_SECONDS=0):
+            self.assertEqual(update_attribution(), 1)
+        self.assertEqual(self._totals(), [(self.other.pk, 1, 1)])
+
+    @override_settings(ADS_ATTRIBUTION_DELAY_SECONDS=60)
+    def test_future_conversion_does_not_hold_the_watermark(self):
+        self._click(self.ad, "s", datetime.timedelta(hours=3))
+        self._conversion("s", -datetime.timedelta(days=2))
+        self._conversion("s", datetime.timedelta(hours=2), value=5)
+        self.assertEqual(update_attribution(), 2)
+        self.assertEqual(self._totals(), [(self.ad.pk, 2, 6)])
+
+    def test_session_batches_match_a_single_pass(self):
+        for number in range(12):
+            session = f"s{number}"
+            self._click(self.ad if number % 2 else self.other, session, datetime.timedelta(hours=5))
+            self._conversion(session, datetime.timedelta(hours=4), value=number)
+        self._conversion("sin-clic", datetime.timedelta(hours=4))
+        self.assertEqual(update_attribution(), 12)
+        single = self._totals()
+
+        reset_attribution()
+        with mock.patch("ads.analytics.attribution.SESSION_BATCH", 5):
+            self.assertEqual(update_attribution(batch_size=4), 12)
+        self.assertEqual(self._totals(), single)
+        self.assertEqual(single, [(self.ad.pk, 6, 36), (self.other.pk, 6, 30)])
@@ -0,0 +1,114 @@
+import datetime
+from unittest import mock
+
+from django.db import DatabaseError, OperationalError
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from ads.delivery.buffers import BulkInsertBuffer, CounterBuffer
+from ads.models import Ad, Campaign, Impression
+from ads.tests.base import EventTestCase
+
+
+class CounterBufferTests(EventTestCase):
+    """
+    Escritura diferida de los contadores de los anuncios.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = cls.create_ad("Otro")
+
+    def setUp(self):
+        self.buffer = CounterBuffer()
+        patcher = mock.patch.object(self.buffer, "_ensure_started")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _counts(self, ad):
+        ad.refresh_from_db()
+        return ad.total_impressions, ad.total_clicks
+
+    def test_deltas_are_summed_until_flushed(self):
+        for _ in range(3):
+            self.buffer.add(self.ad.pk, total_impressions=1)
+        self.buffer.add(self.ad.pk, total_clicks=1)
+        self.buffer.add(self.other.pk, total_impressions=2)
+        self.assertEqual(self.buffer.pending(self.ad.pk)["total_impressions"], 3)
+        self.assertEqual(self._counts(self.ad), (0, 0))
+
+        self.buffer.flush()
+        self.assertEqual(self._counts(self.ad), (3, 1))
+        self.assertEqual(self._counts(self.other), (2, 0))
+        self.assertEqual(self.buffer.pending(self.ad.pk)["total_impressions"], 0)
+
+    def test_rows_are_written_in_chunks(self):
+        self.buffer.chunk_size = 1
+        self.buffer.add(self.ad.pk, total_impressions=1)
+        self.buffer.add(self.other.pk, total_clicks=1)
+        self.buffer.flush()
+        self.assertEqual(self._counts(self.ad), (1, 0))
+        self.assertEqual(self._counts(self.other), (0, 1))
+
+    def test_failed_flush_restores_the_deltas(self):
+        self.buffer.add(self.ad.pk, total_impressions=2)
+        with mock.patch.object(Ad.objects, "filter", side_effect=DatabaseError("caída")):
+            with self.assertRaises(DatabaseError):
+                self.buffer.flush()
+        self.buffer.add(self.ad.pk, total_impressions=1)
+        self.assertEqual(self.buffer.pending(self.ad.pk)["total_impressions"], 3)
+
+        self.buffer.flush()
+        self.assertEqual(self._counts(self.ad), (3, 0))
+
+
+class BulkInsertBufferTests(TransactionTestCase):
+    """
+    Inserción en lote de eventos, incluidos los de anuncios ya eliminados.
+    """
+
+    def setUp(self):
+        today = timezone.localdate()
+        campaign = Campaign.objects.create(
+            name="Campaña", start_date=today, end_date=today + datetime.timedelta(days=7), budget=100
+        )
+        self.ad, self.deleted = (
+            Ad.objects.create(campaign=campaign, name=name, image="images/x.png", target_url="http://example.com")
+            for name in ("Anuncio", "Eliminado")
+        )
+        self.buffer = BulkInsertBuffer(Impression)
+        patcher = mock.patch.object(self.buffer, "_ensure_started")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _queue(self, ad, count):
+        for _ in range(count):
+            self.buffer.add(Impression(ad_id=ad.pk, timestamp=timezone.now()))
+
+    def test_events_of_deleted_ads_are_discarded(self):
+        self._queue(self.ad, 2)
+        self._queue(self.deleted, 3)
+        self._queue(self.ad, 1)
+        self.deleted.delete()
+        with self.assertLogs("ads.delivery.buffers", "WARNING"):
+            self.buffer.flush()
+        self.assertEqual(Impression.objects.filter(ad=self.ad).count(), 3)
+        self.assertEqual(self.buffer._pending, [])
+
+    def test_rows_violating_other_constraints_are_discarded(self):
+        self._queue(self.ad, 2)
+        self.buffer.add(Impression(ad_id=self.ad.pk, timestamp=None))
+        with self.assertLogs("ads.delivery.buffers", "ERROR"):
+            self.buffer.flush()
+        self.assertEqual(Impression.objects.count(), 2)
+        self.assertEqual(self.buffer._pending, [])
+
+    def test_transient_failure_requeues_the_batch(self):
+        self._queue(self.ad, 2)
+        with mock.patch.object(Impression.objects, "bulk_create", side_effect=OperationalError("bloqueada")):
+            with self.assertRaises(OperationalError):
+                self.buffer.flush()
+        self.assertEqual(len(self.buffer._pending), 2)
+        self.buffer.flush()
+        self.assertEqual(Impression.objects.count(), 2)
@@ -0,0 +1,86 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from ads.analytics.caching import (
+    bump_recent_version,
+    cache_key,
+    cached_periods,
+    split_range,
+    statistics_changed,
+)
+
+UTC = datetime.timezone.utc
+JUNE_1 = datetime.date(2025, 6, 1)
+JUNE_2 = datetime.date(2025, 6, 2)
+MAY_31 = datetime.date(2025, 5, 31)
+
+
+class StatisticsCacheTests(SimpleTestCase):
+    """
+    Versiones de los rangos cerrados y abiertos al cambiar el día UTC.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.loads = []
+        self.at(datetime.datetime(2025, 6, 1, 23, 30, tzinfo=UTC))
+
+    def at(self, now):
+        patcher = mock.patch("django.utils.timezone.now", return_value=now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _load(self, start, end):
+        self.loads.append((start, end))
+        return (end - start).days + 1
+
+    def _days(self, start, end):
+        self.loads = []
+        return cached_periods("days", {}, self._load, sum, start, end)
+
+    def test_split_range(self):
+        self.assertEqual(split_range(MAY_31, JUNE_1), ((MAY_31, MAY_31), (JUNE_1, JUNE_1)))
+        self.assertEqual(split_range(None, MAY_31), ((None, MAY_31), None))
+        self.assertEqual(split_range(JUNE_1, None), (None, (JUNE_1, None)))
+
+    def test_closed_key_ignores_recent_events(self):
+        closed, current = cache_key("days", {}, MAY_31), cache_key("days", {}, JUNE_1)
+        bump_recent_version()
+        self.assertEqual(cache_key("days", {}, MAY_31), closed)
+        self.assertNotEqual(cache_key("days", {}, JUNE_1), current)
+
+    def test_only_the_current_day_is_read_again(self):
+        self.assertEqual(self._days(MAY_31, JUNE_1), 2)
+        self.assertEqual(self.loads, [(MAY_31, MAY_31), (JUNE_1, JUNE_1)])
+        statistics_changed([datetime.datetime(2025, 6, 1, 23, tzinfo=UTC)])
+        self.assertEqual(self._days(MAY_31, JUNE_1), 2)
+        self.assertEqual(self.loads, [(JUNE_1, JUNE_1)])
+
+    def test_crossing_midnight_closes_the_previous_day(self):
+        self._days(MAY_31, JUNE_1)
+        self.at(datetime.datetime(2025, 6, 2, 0, 30, tzinfo=UTC))
+        # El 1 de junio ya es un día cerrado: su clave deja de depender de
+        # los eventos recientes.
+        key = cache_key("days", {}, JUNE_1)
+        bump_recent_version()
+        self.assertEqual(cache_key("days", {}, JUNE_1), key)
+
+        self.assertEqual(self._days(MAY_31, JUNE_2), 3)
+        self.assertEqual(self.loads, [(MAY_31, JUNE_1), (JUNE_2, JUNE_2)])
+        statistics_changed([datetime.datetime(2025, 6, 2, 0, 15, tzinfo=UTC)])
+        self.assertEqual(self._days(MAY_31, JUNE_2), 3)
+        self.assertEqual(self.loads, [(JUNE_2, JUNE_2)])
+        self.assertEqual(self._days(MAY_31, MAY_31), 1)
+        self.assertEqual(self.loads, [])
+
+    def test_late_events_of_a_closed_day_recompute_it(self):
+        self._days(MAY_31, JUNE_1)
+        self.at(datetime.datetime(2025, 6, 2, 0, 30, tzinfo=UTC))
+        self._days(MAY_31, JUNE_2)
+        statistics_changed([datetime.datetime(2025, 6, 1, 23, tzinfo=UTC)])
+        self._days(MAY_31, JUNE_2)
+        self.assertEqual(self.loads, [(MAY_31, JUNE_1), (JUNE_2, JUNE_2)])
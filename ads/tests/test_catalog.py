@@ -0,0 +1,55 @@
+from django.core.cache import cache
+from django.urls import reverse
+
+from ads.catalog import CATALOG_VERSION_KEY
+from ads.delivery import eligibility_index
+from ads.delivery.index import EligibilityIndex
+from ads.models import Ad
+from ads.tests.base import EventTestCase
+
+
+class CatalogCacheTests(EventTestCase):
+    """
+    ETag y respuestas 304 de los endpoints derivados del catálogo.
+    """
+
+    def setUp(self):
+        cache.delete(CATALOG_VERSION_KEY)
+        eligibility_index.rebuild()
+        self.addCleanup(eligibility_index.invalidate)
+        self.url = reverse("ads:carousel_list_api")
+
+    def test_matching_etag_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("max-age=", response["Cache-Control"])
+        etag = response["ETag"]
+
+        cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached["ETag"], etag)
+
+    def test_catalog_change_invalidates_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_ad("Nuevo")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class FingerprintTests(EventTestCase):
+    """
+    Huella del conjunto de anuncios servibles.
+    """
+
+    def test_same_positions_with_other_ads_differ(self):
+        index = EligibilityIndex()
+        index.rebuild()
+        before = index.fingerprint()
+        # El nuevo anuncio ocupa la misma posición densa que el desactivado.
+        Ad.objects.filter(pk=self.ad.pk).update(is_active=False)
+        self.create_ad("Reemplazo")
+        index.rebuild()
+        self.assertNotEqual(index.fingerprint(), before)
+
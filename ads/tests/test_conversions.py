@@ -0,0 +1,80 @@
+import json
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.query import QuerySet
+from django.test import override_settings
+
+from ads.models import Conversion
+from ads.tests.base import EventTestCase
+
+
+class ConversionPostbackTests(EventTestCase):
+    """
+    Autenticación e idempotencia del postback de conversiones.
+    """
+
+    def _post(self, event, **headers):
+        return self.client.post(
+            "/ads/api/conversions/", json.dumps(event), content_type="application/json", **headers
+        )
+
+    def _event(self, event_id="ord-1"):
+        return {"event_id": event_id, "ad_id": self.ad.pk, "conversion_type": "compra"}
+
+    @override_settings(ADS_CONVERSION_TOKEN="")
+    def test_rejected_without_configured_token(self):
+        self.assertEqual(self._post(self._event()).status_code, 403)
+        self.assertEqual(self._post(self._event(), HTTP_X_ADS_TOKEN="").status_code, 403)
+        del settings.ADS_CONVERSION_TOKEN
+        self.assertEqual(self._post(self._event(), HTTP_X_ADS_TOKEN="").status_code, 403)
+        self.assertFalse(Conversion.objects.exists())
+
+    @override_settings(ADS_CONVERSION_TOKEN="")
+    def test_logged_in_user_needs_the_token_too(self):
+        self.client.force_login(get_user_model().objects.create_superuser("admin", "admin@example.com", "clave"))
+        self.assertEqual(self._post(self._event()).status_code, 403)
+        self.assertFalse(Conversion.objects.exists())
+
+    @override_settings(ADS_CONVERSION_TOKEN="secreto")
+    def test_replayed_event_is_duplicate(self):
+        self.assertEqual(self._post(self._event(), HTTP_X_ADS_TOKEN="otro").status_code, 403)
+        first = self._post(self._event(), HTTP_X_ADS_TOKEN="secreto")
+        self.assertEqual(first.status_code, 201)
+        replay = self._post(self._event(), HTTP_X_ADS_TOKEN="secreto")
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual(replay.json()["accepted"], 0)
+        self.assertEqual(replay.json()["duplicates"], 1)
+
+    @override_settings(ADS_CONVERSION_TOKEN="secreto")
+    def test_repeated_event_in_ndjson_counts_once(self):
+        lines = [self._event("ord-1"), self._event("ord-2"), self._event("ord-1")]
+        response = self.client.post(
+            "/ads/api/conversions/",
+            "\n".join(json.dumps(line) for line in lines),
+            content_type="application/x-ndjson",
+            HTTP_X_ADS_TOKEN="secreto",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["accepted"], response.json()["duplicates"]), (2, 1))
+        self.assertEqual(Conversion.objects.count(), 2)
+
+    @override_settings(ADS_CONVERSION_TOKEN="secreto")
+    def test_concurrent_duplicate_is_retried(self):
+        # Otra ingesta confirma "ord-1" después de la comprobación de existentes.
+        Conversion.objects.create(event_id="ord-1", ad=self.ad, conversion_type="compra")
+        values_list = QuerySet.values_list
+        missed = []
+
+        def miss_first_check(queryset, *fields, **kwargs):
+            if fields == ("event_id",) and not missed:
+                missed.append(True)
+                queryset = queryset.none()
+            return values_list(queryset, *fields, **kwargs)
+
+        with mock.patch.object(QuerySet, "values_list", miss_first_check):
+            response = self._post([self._event("ord-1"), self._event("ord-2")], HTTP_X_ADS_TOKEN="secreto")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["accepted"], response.json()["duplicates"]), (1, 1))
+        self.assertEqual(sorted(Conversion.objects.values_list("event_id", flat=True)), ["ord-1", "ord-2"])
@@ -0,0 +1,92 @@
+import datetime
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from ads.delivery import click_buffer, counter_buffer, record_click, record_impression, recent_clicks
+from ads.models import Ad, Campaign, Click, Impression
+from ads.tests.base import EventTestCase, synchronous_writes
+
+SESSION = "ab" * 32
+BROWSER = "Mozilla/5.0 (X11; Linux x86_64)"
+
+
+@synchronous_writes
+class ImpressionEventTests(EventTestCase):
+    """
+    Registro de impresiones como eventos y contadores.
+    """
+
+    def test_impression_is_stored_as_an_event(self):
+        record_impression(self.ad, SESSION)
+        record_impression(self.ad)
+        self.ad.refresh_from_db()
+        self.assertEqual(self.ad.total_impressions, 2)
+        hashes = Impression.objects.values_list("session_hash", flat=True)
+        self.assertEqual(sorted((bytes(h) if h else None for h in hashes), key=bool), [None, bytes.fromhex(SESSION)])
+
+    def test_invalid_impression_is_only_counted(self):
+        record_impression(self.ad, SESSION, invalid=True)
+        self.ad.refresh_from_db()
+        self.assertEqual((self.ad.total_impressions, self.ad.invalid_impressions), (0, 1))
+        self.assertFalse(Impression.objects.exists())
+
+
+@synchronous_writes
+@override_settings(ADS_CLICK_DEDUP_SECONDS=5)
+class ClickEventTests(EventTestCase):
+    """
+    Registro de clics y descarte de los repetidos dentro de la ventana.
+    """
+
+    def setUp(self):
+        recent_clicks.clear()
+        self.addCleanup(recent_clicks.clear)
+
+    def test_repeated_click_is_dropped_until_the_ttl_expires(self):
+        with mock.patch("ads.delivery.dedup.time") as clock:
+            clock.monotonic.return_value = 1000.0
+            self.assertTrue(record_click(self.ad, "192.0.2.1", BROWSER, SESSION))
+            clock.monotonic.return_value = 1004.9
+            self.assertFalse(record_click(self.ad, "192.0.2.1", BROWSER, SESSION))
+            self.assertTrue(record_click(self.ad, "192.0.2.1", BROWSER, "other"))
+            clock.monotonic.return_value = 1005.0
+            self.assertTrue(record_click(self.ad, "192.0.2.1", BROWSER, SESSION))
+        self.ad.refresh_from_db()
+        self.assertEqual(self.ad.total_clicks, 3)
+        self.assertEqual(Click.objects.filter(ad=self.ad, session_id=SESSION).count(), 2)
+
+
+class BufferedClickTests(TransactionTestCase):
+    """
+    Clics de un anuncio eliminado mientras esperaban en el búfer.
+    """
+
+    def setUp(self):
+        today = timezone.localdate()
+        campaign = Campaign.objects.create(
+            name="Campaña", start_date=today, end_date=today + datetime.timedelta(days=7), budget=100
+        )
+        self.ad, self.deleted = (
+            Ad.objects.create(campaign=campaign, name=name, image="images/x.png", target_url="http://example.com")
+            for name in ("Anuncio", "Eliminado")
+        )
+        for buffer in (click_buffer, counter_buffer):
+            patcher = mock.patch.object(buffer, "_ensure_started")
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        recent_clicks.clear()
+        self.addCleanup(recent_clicks.clear)
+
+    def test_clicks_of_other_ads_are_still_written(self):
+        for session in ("a", "b"):
+            record_click(self.ad, "192.0.2.1", BROWSER, session)
+            record_click(self.deleted, "192.0.2.1", BROWSER, session)
+        self.deleted.delete()
+        with self.assertLogs("ads.delivery.buffers", "WARNING"):
+            click_buffer.flush()
+        counter_buffer.flush()
+        self.assertEqual(sorted(Click.objects.values_list("ad_id", "session_id")), [(self.ad.pk, "a"), (self.ad.pk, "b")])
+        self.ad.refresh_from_db()
+        self.assertEqual(self.ad.total_clicks, 2)
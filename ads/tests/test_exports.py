@@ -0,0 +1,78 @@
+import datetime
+import gzip
+import json
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+
+from ads.models import Click
+from ads.tests.base import EventTestCase
+
+DAY = datetime.datetime(2025, 3, 1, 12, tzinfo=datetime.timezone.utc)
+
+
+class ExportTests(EventTestCase):
+    """
+    Descarga en flujo de eventos crudos.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = cls.create_ad("Otro")
+        Click.objects.bulk_create(
+            Click(ad=ad, session_id=f"s{number}", user_ip="192.0.2.1", timestamp=DAY + datetime.timedelta(days=number))
+            for number, ad in enumerate([cls.ad, cls.other, cls.ad, cls.ad])
+        )
+        cls.user = get_user_model().objects.create_superuser("admin", "admin@example.com", "clave")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _url(self, kind="clicks"):
+        return reverse("ads:export_events", args=[kind])
+
+    def _content(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_csv_is_filtered_and_streamed(self):
+        response = self.client.get(self._url(), {"start_date": "2025-03-02", "end_date": "2025-03-04", "ad": self.ad.pk})
+        parts = list(response.streaming_content)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="clicks-2025-03-02-2025-03-04.csv"')
+        lines = b"".join(parts).decode().splitlines()
+        self.assertEqual(lines[0], "id,ad_id,campaign_id,timestamp,user_ip,user_agent,session_id")
+        self.assertEqual([line.split(",")[-1] for line in lines[1:]], ["s2", "s3"])
+        # La cabecera sale antes de leer la primera fila.
+        self.assertEqual(parts[0].decode().splitlines(), lines[:1])
+
+    def test_gzip_ndjson(self):
+        response = self.client.get(self._url(), {"format": "ndjson", "gzip": "1"})
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        rows = [json.loads(line) for line in gzip.decompress(self._content(response)).splitlines()]
+        self.assertEqual([row["session_id"] for row in rows], ["s0", "s1", "s2", "s3"])
+        self.assertEqual(rows[0]["timestamp"], DAY.isoformat())
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get(self._url("ventas")).status_code, 404)
+        self.assertEqual(self.client.get(self._url(), {"format": "xml"}).status_code, 400)
+        self.assertEqual(self.client.get(self._url(), {"start_date": "01/03/2025"}).status_code, 400)
+
+    def test_requires_the_view_permission(self):
+        self.client.force_login(get_user_model().objects.create_user("lector", password="clave"))
+        self.assertEqual(self.client.get(self._url()).status_code, 403)
+        self.client.logout()
+        self.assertEqual(self.client.get(self._url()).status_code, 302)
+
+    @override_settings(ADS_ASYNC_VIEWS=True)
+    def test_async_stream_under_asgi(self):
+        async def export():
+            await self.async_client.aforce_login(self.user)
+            response = await self.async_client.get(self._url(), {"gzip": "1"})
+            return response, [part async for part in response.streaming_content]
+
+        response, parts = async_to_sync(export)()
+        self.assertTrue(response.is_async)
+        lines = gzip.decompress(b"".join(parts)).decode().splitlines()
+        self.assertEqual(len(lines), 5)
@@ -0,0 +1,31 @@
+import random
+from collections import Counter
+
+from django.test import SimpleTestCase
+
+from ads.delivery.frequency import FrequencySketch
+
+
+class FrequencySketchTests(SimpleTestCase):
+    """
+    Count-min sketch con ventanas de tiempo de los topes de frecuencia.
+    """
+
+    def test_never_underestimates(self):
+        sketch = FrequencySketch(memory=4096, depth=4, buckets=4, window=3600)
+        now = 1_000_000.0
+        expected = Counter()
+        rng = random.Random(5)
+        for _ in range(5000):
+            key = (rng.randrange(50), rng.randrange(100))
+            sketch.add(key, now)
+            expected[key] += 1
+        for key, count in expected.items():
+            self.assertGreaterEqual(sketch.estimate(key, now), min(count, 255))
+
+    def test_counts_expire_with_the_window(self):
+        sketch = FrequencySketch(memory=4096, depth=4, buckets=4, window=3600)
+        sketch.add("key", 1_000_000.0)
+        sketch.add("key", 1_000_000.0)
+        self.assertEqual(sketch.estimate("key", 1_000_000.0), 2)
+        self.assertEqual(sketch.estimate("key", 1_000_000.0 + 3600), 0)
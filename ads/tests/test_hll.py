@@ -0,0 +1,27 @@
+from django.test import SimpleTestCase
+
+from ads.analytics.hll import STANDARD_ERROR, HyperLogLog, merge_sketches
+
+
+class HyperLogLogTests(SimpleTestCase):
+    """
+    Estimación de cardinalidad con HyperLogLog.
+    """
+
+    def test_error_within_bound(self):
+        for cardinality in (1000, 50000):
+            sketch = HyperLogLog()
+            for value in range(cardinality):
+                sketch.add(f"session-{value}")
+            error = abs(sketch.estimate() - cardinality) / cardinality
+            self.assertLess(error, 3 * STANDARD_ERROR)
+
+    def test_merge_is_union(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        for value in range(3000):
+            first.add(str(value))
+        for value in range(2000, 5000):
+            second.add(str(value))
+        merged = merge_sketches([first.to_bytes(), second.to_bytes(), None])
+        self.assertLess(abs(merged.estimate() - 5000) / 5000, 3 * STANDARD_ERROR)
+        self.assertEqual(HyperLogLog.from_bytes(first.to_bytes()).estimate(), first.estimate())
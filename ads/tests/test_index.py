@@ -0,0 +1,171 @@
+import datetime
+import threading
+from unittest import mock
+
+from django.utils import timezone
+
+from ads.delivery import Targeting, eligibility_index
+from ads.delivery.index import EligibilityIndex
+from ads.models import Ad, Campaign, Keyword
+from ads.tests.base import EventTestCase
+
+
+class EligibilityIndexTests(EventTestCase):
+    """
+    Segmentación resuelta con el índice en memoria.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.male = cls.create_ad("Hombres", target_gender=Ad.Gender.MALE, target_age_min=20, target_age_max=30)
+        cls.group = cls.create_ad("Grupo B", ab_test_group="B")
+        today = timezone.localdate()
+        future = Campaign.objects.create(
+            name="Futura",
+            start_date=today + datetime.timedelta(days=1),
+            end_date=today + datetime.timedelta(days=7),
+            budget=100,
+        )
+        cls.future = cls.create_ad("Futuro", campaign=future)
+
+    def setUp(self):
+        eligibility_index.rebuild()
+        self.addCleanup(eligibility_index.invalidate)
+
+    def test_targeting_filters(self):
+        self.assertEqual(eligibility_index.candidates(Targeting()), {self.ad.pk, self.male.pk, self.group.pk})
+        self.assertEqual(
+            eligibility_index.candidates(Targeting(gender=Ad.Gender.MALE, age=25)),
+            {self.ad.pk, self.male.pk, self.group.pk},
+        )
+        self.assertEqual(
+            eligibility_index.candidates(Targeting(gender=Ad.Gender.FEMALE, age=25)), {self.ad.pk, self.group.pk}
+        )
+        self.assertEqual(
+            eligibility_index.candidates(Targeting(gender=Ad.Gender.MALE, age=40)), {self.ad.pk, self.group.pk}
+        )
+        self.assertEqual(eligibility_index.candidates(Targeting(ab_test_group="B")), {self.group.pk})
+
+    def test_unknown_gender_keeps_any_gender_ads(self):
+        self.assertEqual(eligibility_index.candidates(Targeting(gender="X")), {self.ad.pk, self.group.pk})
+
+    def test_future_campaign_enters_on_its_start_date(self):
+        tomorrow = timezone.localtime() + datetime.timedelta(days=1)
+        self.assertIn(self.future.pk, eligibility_index.candidates(Targeting(), tomorrow))
+        self.assertNotIn(self.future.pk, eligibility_index.candidates(Targeting()))
+
+    def test_saved_ad_is_refreshed(self):
+        self.male.target_gender = Ad.Gender.FEMALE
+        with self.captureOnCommitCallbacks(execute=True):
+            self.male.save()
+        self.assertEqual(
+            eligibility_index.candidates(Targeting(gender=Ad.Gender.MALE, age=25)), {self.ad.pk, self.group.pk}
+        )
+
+
+class EligibilityIndexInvalidationTests(EventTestCase):
+    """
+    `invalidate()` concurrente con decisiones que aún usan la vista anterior.
+    """
+
+    def setUp(self):
+        self.index = EligibilityIndex()
+        self.index.rebuild()
+        self.index._built_at = 0.0
+
+    def _invalidated_after_read(self):
+        """
+        Simula un `invalidate()` entre la lectura de la vista y la comprobación
+        de vencimiento.
+        """
+        is_stale = self.index.is_stale
+
+        def stale_after_invalidate():
+            self.index.invalidate()
+            return is_stale()
+
+        return mock.patch.object(self.index, "is_stale", side_effect=stale_after_invalidate)
+
+    def test_waits_for_the_builder_when_invalidated(self):
+        self.index._build_lock.acquire()
+        threading.Timer(0.05, self.index._build_lock.release).start()
+        with self._invalidated_after_read():
+            snapshot = self.index._current(timezone.localdate())
+        self.assertIn(self.ad.pk, snapshot.entries)
+        self.assertIs(self.index._snapshot, snapshot)
+
+    def test_day_rollover_in_event_loop_after_invalidate(self):
+        tomorrow = timezone.localdate() + datetime.timedelta(days=1)
+        with self._invalidated_after_read(), mock.patch("ads.delivery.index.in_event_loop", return_value=True):
+            snapshot = self.index._current(tomorrow)
+        self.assertEqual(snapshot.day, tomorrow)
+        self.assertIn(self.ad.pk, snapshot.entries)
+        self.assertIsNone(self.index._snapshot)
+
+
+class KeywordTargetingTests(EventTestCase):
+    """
+    Palabras clave internadas y evaluadas como bitsets.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        technology, travel = Keyword.objects.create(name="Tecnología"), Keyword.objects.create(name="Viajes")
+        cls.technology = cls.create_ad("Tecnología")
+        cls.technology.target_keywords.add(technology)
+        cls.both = cls.create_ad("Ambas")
+        cls.both.target_keywords.add(technology, travel)
+
+    def setUp(self):
+        eligibility_index.rebuild()
+        self.addCleanup(eligibility_index.invalidate)
+
+    def test_any_keyword_matches_after_normalizing(self):
+        self.assertEqual(
+            eligibility_index.candidates(Targeting(keywords=("TECNOLOGIA",))),
+            {self.ad.pk, self.technology.pk, self.both.pk},
+        )
+        self.assertEqual(eligibility_index.candidates(Targeting(keywords=("viajes", "nada"))), {self.ad.pk, self.both.pk})
+
+    def test_unknown_keyword_keeps_only_untargeted_ads(self):
+        self.assertEqual(eligibility_index.candidates(Targeting(keywords=("nada",))), {self.ad.pk})
+
+    def test_keyword_change_is_refreshed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.technology.target_keywords.clear()
+        self.assertIn(self.technology.pk, eligibility_index.candidates(Targeting(keywords=("nada",))))
+
+
+class LocationTargetingTests(EventTestCase):
+    """
+    Ubicaciones como términos normalizados con coincidencia exacta.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.peru = cls.create_ad("Perú", target_location="Perú, Chile")
+        cls.perugia = cls.create_ad("Perugia", target_location="Perugia")
+
+    def setUp(self):
+        eligibility_index.rebuild()
+        self.addCleanup(eligibility_index.invalidate)
+
+    def test_tokens_are_normalized(self):
+        self.assertEqual(set(self.peru.location_tokens.values_list("token", flat=True)), {"peru", "chile"})
+
+    def test_location_matches_whole_tokens(self):
+        self.assertEqual(eligibility_index.candidates(Targeting(location="Peru")), {self.ad.pk, self.peru.pk})
+        self.assertEqual(eligibility_index.candidates(Targeting(location="PERUGIA")), {self.ad.pk, self.perugia.pk})
+        self.assertEqual(eligibility_index.candidates(Targeting(location="Lima, Perú")), {self.ad.pk, self.peru.pk})
+        self.assertEqual(eligibility_index.candidates(Targeting(location="Per")), {self.ad.pk})
+
+    def test_changed_location_replaces_the_tokens(self):
+        self.perugia.target_location = "Italia"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.perugia.save()
+        self.assertEqual(list(self.perugia.location_tokens.values_list("token", flat=True)), ["italia"])
+        self.assertEqual(eligibility_index.candidates(Targeting(location="Perugia")), {self.ad.pk})
+        self.assertEqual(eligibility_index.candidates(Targeting(location="italia")), {self.ad.pk, self.perugia.pk})
@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase
+
+from ads.delivery.ivt import IPRangeTrie
+
+
+class IPRangeTrieTests(SimpleTestCase):
+    """
+    Búsqueda de direcciones en el trie de rangos IP.
+    """
+
+    def setUp(self):
+        self.trie = IPRangeTrie(["192.0.2.0/24", "198.51.100.0/22", "2001:db8::/32", "203.0.113.7"])
+
+    def test_ipv4_ranges(self):
+        self.assertIn("192.0.2.200", self.trie)
+        self.assertIn("198.51.103.1", self.trie)
+        self.assertNotIn("198.51.104.1", self.trie)
+        self.assertIn("203.0.113.7", self.trie)
+        self.assertNotIn("203.0.113.8", self.trie)
+
+    def test_ipv6_and_mapped_addresses(self):
+        self.assertIn("2001:db8:1::1", self.trie)
+        self.assertNotIn("2001:db9::1", self.trie)
+        self.assertIn("::ffff:192.0.2.1", self.trie)
+
+    def test_invalid_addresses(self):
+        self.assertNotIn("not-an-ip", self.trie)
+        self.assertNotIn("", self.trie)
+        self.assertNotIn(None, self.trie)
@@ -0,0 +1,44 @@
+import datetime
+from decimal import Decimal
+
+from django.test import SimpleTestCase, override_settings
+
+from ads.delivery.pacing import CLICK, IMPRESSION, _Budget
+from ads.models import Campaign
+
+
+class TokenBucketTests(SimpleTestCase):
+    """
+    Cubo de tokens del control de gasto de una campaña.
+    """
+
+    def _budget(self, **kwargs):
+        today = datetime.date.today()
+        fields = {
+            "name": "c", "start_date": today, "end_date": today + datetime.timedelta(days=9),
+            "budget": Decimal("100.00"), "pricing_model": Campaign.PricingModel.CPC,
+            "bid": Decimal("1.00"), "spent": Decimal(0), **kwargs,
+        }
+        return _Budget(Campaign(**fields))
+
+    @override_settings(ADS_PACING_BURST_SECONDS=300, ADS_PACING_WORKERS=1)
+    def test_capacity_admits_at_least_one_event(self):
+        budget = self._budget()
+        self.assertEqual(budget.cost(CLICK), Decimal("1.00"))
+        self.assertEqual(budget.cost(IMPRESSION), 0)
+        self.assertGreaterEqual(budget.capacity, 1.0)
+        self.assertEqual(budget.blocked_until(budget.refilled_at), 0)
+
+    def test_empty_bucket_blocks_until_refilled(self):
+        budget = self._budget()
+        now = budget.refilled_at
+        budget.tokens = -1.0
+        until = budget.blocked_until(now)
+        self.assertAlmostEqual(until - now, 1.0 / budget.rate)
+        budget.refill(until)
+        self.assertAlmostEqual(budget.tokens, 0.0, places=6)
+
+    def test_exhausted_budget_is_blocked(self):
+        budget = self._budget(spent=Decimal("100.00"))
+        self.assertTrue(budget.exhausted)
+        self.assertEqual(budget.blocked_until(budget.refilled_at), float("inf"))
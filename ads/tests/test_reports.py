@@ -0,0 +1,81 @@
+import datetime
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from ads.analytics.downsampling import bucket_sum, lttb
+from ads.models import AdHourlyStats
+from ads.tests.base import EventTestCase
+
+
+class DownsamplingTests(SimpleTestCase):
+    """
+    Reducción de series con LTTB y por suma en intervalos.
+    """
+
+    def setUp(self):
+        rng = random.Random(1)
+        self.x = list(range(1000))
+        self.y = [rng.random() for _ in self.x]
+
+    def test_lttb_keeps_endpoints_and_size(self):
+        selected = lttb(self.x, self.y, 50).tolist()
+        self.assertEqual(len(selected), 50)
+        self.assertEqual(selected[0], 0)
+        self.assertEqual(selected[-1], 999)
+        self.assertEqual(selected, sorted(set(selected)))
+
+    def test_lttb_short_series(self):
+        self.assertEqual(lttb(self.x[:10], self.y[:10], 50).tolist(), list(range(10)))
+        self.assertEqual(len(lttb(self.x, self.y, 1)), 3)
+
+    def test_bucket_sum_preserves_total(self):
+        starts, sums = bucket_sum(self.x, self.y, 64)
+        self.assertLessEqual(len(sums), 64)
+        self.assertAlmostEqual(sums.sum(), sum(self.y))
+        self.assertEqual(starts[0], 0)
+
+
+class StatisticsAPITests(EventTestCase):
+    """
+    Ranking y series temporales de la API de estadísticas.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = cls.create_ad("Otro")
+        start = datetime.datetime(2025, 5, 1, tzinfo=datetime.timezone.utc)
+        AdHourlyStats.objects.bulk_create(
+            AdHourlyStats(ad=ad, hour=start + datetime.timedelta(hours=hour), clicks=clicks, impressions=100)
+            for hour in range(48)
+            for ad, clicks in ((cls.ad, 1), (cls.other, 3))
+        )
+        cls.user = get_user_model().objects.create_user("analista", password="clave")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertIn(self.client.get(reverse("ads:ad_statistics_api")).status_code, (401, 403))
+
+    def test_ranking_is_ordered_and_paginated(self):
+        response = self.client.get(reverse("ads:ad_statistics_api"), {"ordering": "-clicks", "page_size": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 2)
+        self.assertEqual([row["name"] for row in response.json()["results"]], ["Otro"])
+        self.assertEqual(self.client.get(reverse("ads:ad_statistics_api"), {"ordering": "nombre"}).status_code, 400)
+
+    def test_timeline_is_downsampled_keeping_the_total(self):
+        response = self.client.get(
+            reverse("ads:statistics_timeline_api"), {"metric": "clicks", "granularity": "hour", "points": 10}
+        )
+        self.assertEqual(response.status_code, 200)
+        series = response.json()["series"][0]
+        self.assertLessEqual(len(series["times"]), 10)
+        self.assertEqual(sum(series["values"]), 48 * 4)
@@ -0,0 +1,74 @@
+import datetime
+from unittest import mock
+
+from ads.analytics.rollups import get_watermarks, update_rollups
+from ads.models import AdHourlyConversionStats, AdHourlyStats, Click, Conversion, Impression
+from ads.tests.base import EventTestCase
+
+HOUR = datetime.datetime(2025, 1, 10, 10, tzinfo=datetime.timezone.utc)
+LATER = HOUR + datetime.timedelta(days=30)
+
+
+class RollupTests(EventTestCase):
+    """
+    Agregados horarios incrementales desde la marca de agua.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = cls.create_ad("Otro")
+
+    def _events(self, ad, moment, sessions):
+        for session in sessions:
+            Click.objects.create(ad=ad, session_id=session, timestamp=moment)
+            Impression.objects.create(ad=ad, timestamp=moment)
+        Conversion.objects.create(ad=ad, conversion_type="compra", value=2, timestamp=moment)
+
+    def _snapshot(self):
+        return (
+            sorted(AdHourlyStats.objects.values_list(
+                "ad_id", "hour", "clicks", "unique_clicks", "impressions", "conversions", "conversion_value"
+            )),
+            sorted(AdHourlyConversionStats.objects.values_list("ad_id", "hour", "conversion_type", "conversions")),
+        )
+
+    def test_batches_match_a_full_recompute(self):
+        for offset in range(3):
+            moment = HOUR + datetime.timedelta(minutes=50 * offset)
+            self._events(self.ad, moment, ["a", "b", "a"])
+            self._events(self.other, moment, ["c"])
+            update_rollups(batch_size=2, now=LATER)
+        incremental = self._snapshot()
+        self.assertEqual(get_watermarks(), {
+            "click": Click.objects.latest("pk").pk,
+            "impression": Impression.objects.latest("pk").pk,
+            "conversion": Conversion.objects.latest("pk").pk,
+        })
+
+        AdHourlyStats.objects.all().delete()
+        AdHourlyConversionStats.objects.all().delete()
+        with mock.patch("ads.analytics.rollups.get_watermarks", return_value=dict.fromkeys(get_watermarks(), 0)):
+            update_rollups(batch_size=1000, now=LATER)
+        self.assertEqual(self._snapshot(), incremental)
+        self.assertIn((self.ad.pk, HOUR, 6, 2, 6, 2), [row[:6] for row in incremental[0]])
+
+    def test_only_touched_hours_and_ads_are_recomputed(self):
+        self._events(self.ad, HOUR, ["a"])
+        self._events(self.other, HOUR, ["b"])
+        self.assertEqual(update_rollups(now=LATER), 2)
+        AdHourlyStats.objects.filter(ad=self.other).update(clicks=99)
+
+        self._events(self.ad, HOUR + datetime.timedelta(minutes=5), ["c"])
+        with mock.patch("ads.analytics.rollups.statistics_changed") as changed:
+            self.assertEqual(update_rollups(now=LATER), 1)
+        changed.assert_called_once_with({HOUR})
+        self.assertEqual(AdHourlyStats.objects.get(ad=self.ad).clicks, 2)
+        self.assertEqual(AdHourlyStats.objects.get(ad=self.other).clicks, 99)
+
+    def test_no_new_events_recompute_nothing(self):
+        self._events(self.ad, HOUR, ["a"])
+        update_rollups(now=LATER)
+        with mock.patch("ads.analytics.rollups.statistics_changed") as changed:
+            self.assertEqual(update_rollups(now=LATER), 0)
+        changed.assert_called_once_with(set())
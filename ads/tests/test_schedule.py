@@ -0,0 +1,91 @@
+import datetime
+import zoneinfo
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from ads import schedule
+from ads.delivery import Targeting, eligibility_index
+from ads.models import Campaign
+from ads.tests.base import EventTestCase
+
+UTC = datetime.timezone.utc
+
+
+class ScheduleCompilationTests(SimpleTestCase):
+    """
+    Compilación de la programación a máscaras, minutos e intervalos UTC.
+    """
+
+    def test_days_mask(self):
+        self.assertEqual(schedule.days_mask(""), schedule.ALL_DAYS_MASK)
+        self.assertEqual(schedule.days_mask("MON, tue"), 0b11)
+        self.assertEqual(schedule.days_mask("lun,MIE,dom"), 0b1000101)
+        self.assertEqual(schedule.days_mask("XYZ"), 0)
+
+    def test_minutes(self):
+        self.assertEqual(schedule.start_minute(datetime.time(9, 30)), 570)
+        self.assertEqual(schedule.start_minute(datetime.time(9, 30, 15)), 571)
+        self.assertEqual(schedule.end_minute(datetime.time(9, 30, 15)), 570)
+        self.assertIsNone(schedule.start_minute(None))
+
+    def test_overnight_interval_ends_the_next_day(self):
+        monday = datetime.date(2025, 6, 2)
+        intervals = schedule.active_intervals(0b1, 22 * 60, 2 * 60 - 1, UTC, monday, monday)
+        self.assertEqual(intervals, [(
+            datetime.datetime(2025, 6, 2, 22, tzinfo=UTC),
+            datetime.datetime(2025, 6, 3, 2, tzinfo=UTC),
+        )])
+
+    def test_intervals_follow_the_campaign_timezone(self):
+        monday = datetime.date(2025, 6, 2)
+        zone = zoneinfo.ZoneInfo("America/Guayaquil")
+        self.assertEqual(schedule.active_intervals(0b1, 9 * 60, 10 * 60 - 1, zone, monday, monday), [(
+            datetime.datetime(2025, 6, 2, 14, tzinfo=UTC),
+            datetime.datetime(2025, 6, 2, 15, tzinfo=UTC),
+        )])
+
+
+class ScheduleTimelineTests(EventTestCase):
+    """
+    Línea de tiempo de transiciones del índice de elegibilidad.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        today = timezone.localdate()
+        cls.day = today + datetime.timedelta(days=1)
+        tokyo = Campaign.objects.create(
+            name="Tokio",
+            start_date=today,
+            end_date=today + datetime.timedelta(days=7),
+            budget=100,
+            timezone="Asia/Tokyo",
+        )
+        cls.morning = cls.create_ad(
+            "Mañana en Tokio",
+            campaign=tokyo,
+            display_start_time=datetime.time(9),
+            display_end_time=datetime.time(9, 59),
+        )
+
+    def setUp(self):
+        eligibility_index.rebuild()
+        self.addCleanup(eligibility_index.invalidate)
+
+    def _at(self, hour, minute=0):
+        return datetime.datetime.combine(self.day, datetime.time(hour, minute), tzinfo=UTC)
+
+    def test_local_hours_of_the_campaign(self):
+        # 09:00-09:59 en Tokio (UTC+9) son las 00:00-00:59 UTC.
+        self.assertIn(self.morning.pk, eligibility_index.candidates(Targeting(), self._at(0, 30)))
+        self.assertNotIn(self.morning.pk, eligibility_index.candidates(Targeting(), self._at(1)))
+        self.assertIn(self.ad.pk, eligibility_index.candidates(Targeting(), self._at(1)))
+
+    def test_pool_changes_only_at_transitions(self):
+        snapshot = eligibility_index._current(self.day)
+        self.assertEqual(snapshot.next_transition(self._at(0, 30)), self._at(1))
+        pool, _ = snapshot.schedule(self._at(0, 10))
+        self.assertIs(snapshot.schedule(self._at(0, 50))[0], pool)
+        self.assertIsNot(snapshot.schedule(self._at(1, 10))[0], pool)
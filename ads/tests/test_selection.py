@@ -0,0 +1,31 @@
+import random
+from collections import Counter
+
+from django.test import SimpleTestCase
+
+from ads.delivery.selection import AliasTable, CandidatePool
+
+
+class AliasTableTests(SimpleTestCase):
+    """
+    Muestreo ponderado con la tabla de alias.
+    """
+
+    def test_sampling_follows_weights(self):
+        weights = [1, 2, 3, 4, 0]
+        table = AliasTable([10, 20, 30, 40, 50], weights)
+        rng = random.Random(7)
+        draws = 200000
+        counts = Counter(table.sample(rng) for _ in range(draws))
+        total = sum(weights)
+        for ad_id, weight in zip([10, 20, 30, 40, 50], weights):
+            self.assertAlmostEqual(counts[ad_id] / draws, weight / total, delta=0.005)
+        self.assertNotIn(50, counts)
+
+    def test_pool_respects_relative_weights_in_subset(self):
+        pool = CandidatePool([1, 2, 3], {1: 1, 2: 3, 3: 100})
+        rng = random.Random(3)
+        counts = Counter(pool.choose({1, 2}, weighted=True, rng=rng) for _ in range(40000))
+        self.assertEqual(set(counts), {1, 2})
+        self.assertAlmostEqual(counts[2] / 40000, 0.75, delta=0.01)
+        self.assertIsNone(pool.choose(set(), weighted=True, rng=rng))
@@ -0,0 +1,20 @@
+import unicodedata
+
+
+def normalize_text(value):
+    """
+    Forma canónica de un término de segmentación (palabra clave o ubicación):
+    sin mayúsculas, acentos ni espacios sobrantes, para que "Perú", "peru" y
+    " PERU " coincidan.
+    """
+    decomposed = unicodedata.normalize("NFKD", " ".join(value.split()).casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def split_tokens(value):
+    """
+    Convierte una lista separada por comas (p. ej. "España, México") en el
+    conjunto de sus términos normalizados, sin vacíos.
+    """
+    tokens = (normalize_text(part) for part in value.split(","))
+    return frozenset(token for token in tokens if token)
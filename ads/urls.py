@@ -1,7 +1,16 @@
 # ads/urls.py
+from django.conf import settings
 from django.urls import path
 from . import views
-from ads.views.api import AdListAPIView, CarouselListAPIView
+from ads.views.api import (
+    AdBatchAPIView,
+    AdListAPIView,
+    AdStatisticsAPIView,
+    CarouselDetailAPIView,
+    CarouselListAPIView,
+    ConversionPostbackAPIView,
+    StatisticsTimelineAPIView,
+)
 
 # ¡ESTA LÍNEA ES ESENCIAL! Define el espacio de nombres para tu aplicación.
 # Debe coincidir con el nombre que usas en {% url 'ads:...' %} en tus plantillas.
@@ -9,9 +18,8 @@ app_name = "ads"
 
 
 urlpatterns = [
-    path("display/", views.ad_display, name="ad_display"),
-    path("<int:ad_id>/redirect/", views.ad_redirect, name="ad_redirect"),
     path("statistics/", views.ad_statistics, name="ad_statistics"),
+    path("export/<slug:kind>/", views.export_events, name="export_events"),
     path("login/", views.user_login, name="login"),
     path("logout/", views.user_logout, name="logout"),
     path(
@@ -19,6 +27,45 @@ urlpatterns = [
         views.carousel_display,
         name="carousel_display",
     ),
-    path("api/ads/", AdListAPIView.as_view(), name="ad_list_api"),
     path("api/carousels/", CarouselListAPIView.as_view(), name="carousel_list_api"),
+    path(
+        "api/conversions/",
+        ConversionPostbackAPIView.as_view(),
+        name="conversion_postback_api",
+    ),
+    path("api/statistics/ads/", AdStatisticsAPIView.as_view(), name="ad_statistics_api"),
+    path(
+        "api/statistics/timeline/",
+        StatisticsTimelineAPIView.as_view(),
+        name="statistics_timeline_api",
+    ),
 ]
+
+if settings.ADS_ASYNC_VIEWS:
+    # Perfil ASGI: el camino de entrega se sirve con vistas asíncronas en las
+    # mismas URL (ver "Despliegue ASGI" en el README).
+    from ads.views import asynchronous
+
+    urlpatterns += [
+        path("display/", asynchronous.ad_display, name="ad_display"),
+        path("<int:ad_id>/redirect/", asynchronous.ad_redirect, name="ad_redirect"),
+        path("api/ads/", asynchronous.ad_list_api, name="ad_list_api"),
+        path("api/ads/batch/", asynchronous.ad_batch_api, name="ad_batch_api"),
+        path(
+            "api/carousels/<int:pk>/",
+            asynchronous.carousel_detail_api,
+            name="carousel_detail_api",
+        ),
+    ]
+else:
+    urlpatterns += [
+        path("display/", views.ad_display, name="ad_display"),
+        path("<int:ad_id>/redirect/", views.ad_redirect, name="ad_redirect"),
+        path("api/ads/", AdListAPIView.as_view(), name="ad_list_api"),
+        path("api/ads/batch/", AdBatchAPIView.as_view(), name="ad_batch_api"),
+        path(
+            "api/carousels/<int:pk>/",
+            CarouselDetailAPIView.as_view(),
+            name="carousel_detail_api",
+        ),
+    ]
@@ -1,6 +1,7 @@
 from ads.views.login import user_login, user_logout
 from ads.views.display import ad_display, ad_redirect
 from ads.views.statistics import ad_statistics
+from ads.views.export import export_events
 from ads.views.carousel import carousel_display
 from ads.views.api import AdListAPIView
 
@@ -10,6 +11,7 @@ __all__ = [
     "ad_display",
     "ad_redirect",
     "ad_statistics",
+    "export_events",
     "carousel_display",
     "AdListAPIView",
 ]
@@ -1,116 +1,252 @@
-import datetime
+import hmac
+
 from rest_framework import generics
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import BasePermission, IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Q
+from rest_framework.views import APIView
+from django.conf import settings
+from django.db.models import Prefetch
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 
+from ads.analytics.caching import cached_periods, cached_statistic
+from ads.analytics.reports import (
+    ad_ranking,
+    downsample,
+    format_moment,
+    merge_timelines,
+    ranking_rows,
+    timeline,
+)
+from ads.catalog import catalog_cached
+from ads.conversions import ingest_conversions
+from ads.delivery import (
+    Targeting,
+    choose_ad,
+    choose_ads,
+    eligibility_index,
+    record_impression,
+)
 from ads.models import Ad, Carousel
-from ads.serializers import AdSerializer, CarouselSerializer
+from ads.parsers import NDJSONParser
+from ads.serializers import (
+    AdBatchRequestSerializer,
+    AdRankingQuerySerializer,
+    AdSerializer,
+    CarouselDetailSerializer,
+    CarouselSerializer,
+    TimelineQuerySerializer,
+)
+from ads.views.display import get_request_session_hash, is_invalid_traffic
 
 
 class AdListAPIView(generics.ListAPIView):
     serializer_class = AdSerializer
 
     def get_queryset(self):
-        today = timezone.now().date()
-        now = timezone.now().time()
-        current_day_of_week = datetime.datetime.now().strftime("%a").upper()
-
-        queryset = Ad.objects.filter(
-            is_active=True,
-            campaign__is_active=True,
-            campaign__start_date__lte=today,
-            campaign__end_date__gte=today,
-        )
-
-        # Scheduling filters
-        queryset = queryset.filter(
-            Q(display_start_time__lte=now) | Q(display_start_time__isnull=True),
-            Q(display_end_time__gte=now) | Q(display_end_time__isnull=True),
-        )
-        queryset = queryset.filter(
-            Q(display_days_of_week__icontains=current_day_of_week)
-            | Q(display_days_of_week__exact="")
-        )
-
-        # Targeting filters (from query parameters)
-        user_age = self.request.query_params.get("age")
-        user_gender = self.request.query_params.get("gender")
-        user_location = self.request.query_params.get("location")
-        page_keywords = self.request.query_params.getlist("keywords")
-        ab_test_group = self.request.query_params.get("ab_test_group")
-
-        if user_age:
-            queryset = queryset.filter(
-                Q(target_age_min__lte=user_age) | Q(target_age_min__isnull=True),
-                Q(target_age_max__gte=user_age) | Q(target_age_max__isnull=True),
-            )
-        if user_gender:
-            queryset = queryset.filter(
-                Q(target_gender=user_gender) | Q(target_gender="A")
-            )
-        if user_location:
-            queryset = queryset.filter(
-                Q(target_location__icontains=user_location)
-                | Q(target_location__exact="")
-            )
-        if page_keywords:
-            queryset = queryset.filter(
-                Q(target_keywords__name__in=page_keywords)
-                | Q(target_keywords__isnull=True)
-            ).distinct()
-        if ab_test_group:
-            queryset = queryset.filter(ab_test_group=ab_test_group)
-
-        return queryset.order_by("?")  # Return a random ad from the filtered set
+        """
+        Anuncios elegibles para la segmentación de la solicitud, según el índice.
+        """
+        targeting = Targeting.from_params(self.request.query_params)
+        return Ad.objects.filter(pk__in=eligibility_index.candidates(targeting))
 
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        ad = queryset.first()  # Get only one ad
+        # Get only one ad, chosen from the in-memory index without touching the database
+        session_hash = get_request_session_hash(request)
+        ad = choose_ad(Targeting.from_params(request.query_params), session_hash=session_hash)
 
         if ad:
-            # Increment impressions
-            ad.total_impressions += 1
-            ad.save()
+            record_impression(ad, session_hash, invalid=is_invalid_traffic(request))
             serializer = self.get_serializer(ad)
             return Response(serializer.data)
-        fallback_ad = (
-            Ad.objects.filter(
-                is_active=True,
-                campaign__is_active=True,
-                campaign__start_date__lte=timezone.now().date(),
-                campaign__end_date__gte=timezone.now().date(),
-                target_age_min__isnull=True,
-                target_age_max__isnull=True,
-                target_gender="A",
-                target_location__exact="",
-                target_keywords__isnull=True,
-                display_start_time__isnull=True,
-                display_end_time__isnull=True,
-                display_days_of_week__exact="",
-                ab_test_group__exact="",
-            )
-            .order_by("?")
-            .first()
+        return Response({"detail": "No ad available"}, status=404)
+
+
+class AdBatchAPIView(generics.GenericAPIView):
+    """
+    Decide los anuncios de todos los espacios de una página en una sola
+    solicitud: una única evaluación de la segmentación y anuncios distintos
+    en cada espacio. Los espacios sin anuncio disponible reciben `null`.
+    """
+    serializer_class = AdBatchRequestSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        slots = serializer.validated_data['slots']
+        session_hash = get_request_session_hash(request)
+        ads = choose_ads(serializer.get_targeting(), len(slots), session_hash=session_hash)
+
+        invalid = is_invalid_traffic(request)
+        for ad in ads:
+            record_impression(ad, session_hash, invalid=invalid)
+
+        ads += [None] * (len(slots) - len(ads))
+        context = self.get_serializer_context()
+        return Response({
+            "slots": [
+                {"id": slot['id'], "ad": AdSerializer(ad, context=context).data if ad else None}
+                for slot, ad in zip(slots, ads)
+            ]
+        })
+
+
+class HasConversionToken(BasePermission):
+    """
+    Exige el valor de `ADS_CONVERSION_TOKEN` en la cabecera `X-Ads-Token` de
+    los postbacks de conversión. Sin token configurado se rechazan todos.
+    """
+
+    def has_permission(self, request, view):
+        token = getattr(settings, "ADS_CONVERSION_TOKEN", "")
+        if not token:
+            return False
+        return hmac.compare_digest(
+            request.headers.get("X-Ads-Token", "").encode(), token.encode()
         )
 
-        if fallback_ad:
-            fallback_ad.total_impressions += 1
-            fallback_ad.save()
-            serializer = self.get_serializer(fallback_ad)
-            return Response(serializer.data)
-        return Response({"detail": "No ad available"}, status=404)
 
+class ConversionPostbackAPIView(APIView):
+    """
+    Registra conversiones enviadas por los anunciantes: un evento JSON, un
+    arreglo JSON o un lote NDJSON (`Content-Type: application/x-ndjson`, un
+    evento por línea) que se procesa en flujo, por lotes. Es idempotente
+    sobre `event_id`: reenviar un evento no lo cuenta dos veces.
+
+    Responde con el número de conversiones aceptadas, duplicadas y
+    rechazadas y los primeros errores con su posición (línea en NDJSON).
+    """
+    authentication_classes = []
+    permission_classes = [HasConversionToken]
+    parser_classes = [JSONParser, NDJSONParser]
+
+    def post(self, request, *args, **kwargs):
+        data = request.data
+        if isinstance(data, dict):
+            result = ingest_conversions([(1, data)])
+            if result.rejected:
+                return Response(result.as_dict(), status=400)
+            return Response(result.as_dict(), status=201 if result.accepted else 200)
+        if isinstance(data, list):
+            data = enumerate(data, 1)
+        return Response(ingest_conversions(data).as_dict())
+
+
+class AdStatisticsAPIView(generics.GenericAPIView):
+    """
+    Ranking paginado de anuncios por clics, impresiones o CTR (`ordering`,
+    con "-" para orden descendente) en el rango de fechas. La ordenación y
+    el corte se hacen en SQL: pedir `page_size=K` devuelve el top-K, y los
+    clics únicos y las conversiones atribuidas se calculan sólo para la página.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = AdRankingQuerySerializer
 
+    def get(self, request, *args, **kwargs):
+        params = self.get_serializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start_date = params.validated_data.get("start_date")
+        end_date = params.validated_data.get("end_date")
+
+        def compute():
+            queryset = ad_ranking(start_date, end_date, params.validated_data["ordering"])
+            page = self.paginate_queryset(queryset)
+            return self.get_paginated_response(ranking_rows(page, start_date, end_date)).data
+
+        # Los enlaces de la respuesta dependen del host y de la página pedida.
+        data = cached_statistic(
+            "ranking",
+            {
+                **params.validated_data,
+                "host": request.get_host(),
+                "page": request.query_params.get("page"),
+                "page_size": request.query_params.get("page_size"),
+            },
+            compute,
+            end_date,
+        )
+        return Response(data)
+
+
+class StatisticsTimelineAPIView(generics.GenericAPIView):
+    """
+    Serie temporal de clics, impresiones o conversiones (una serie por tipo)
+    por día u hora, reducida en el servidor a como mucho `points` puntos por
+    suma en intervalos (`method=sum`, para barras) o con LTTB (`method=lttb`,
+    para líneas).
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = TimelineQuerySerializer
+    pagination_class = None
+
+    def get(self, request, *args, **kwargs):
+        params = self.get_serializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        return Response(
+            cached_statistic("timeline", data, lambda: self._series(data), data.get("end_date"))
+        )
+
+    def _series(self, data):
+        granularity = data["granularity"]
+        # Los días cerrados se guardan aparte: sólo se vuelve a leer el día en curso.
+        series = cached_periods(
+            "timeline_series",
+            {"metric": data["metric"], "granularity": granularity},
+            lambda start_date, end_date: timeline(data["metric"], start_date, end_date, granularity),
+            merge_timelines,
+            data.get("start_date"),
+            data.get("end_date"),
+        )
+        result = []
+        for name, (moments, values) in series.items():
+            moments, values = downsample(moments, values, data["points"], data["method"])
+            result.append({
+                "name": name,
+                "times": [format_moment(moment, granularity) for moment in moments],
+                "values": values,
+            })
+        return {"metric": data["metric"], "granularity": granularity, "series": result}
+
+
+def _active_carousels():
+    today = timezone.now().date()
+    return Carousel.objects.filter(
+        is_active=True,
+        campaign__is_active=True,
+        campaign__start_date__lte=today,
+        campaign__end_date__gte=today
+    )
+
+
+def _eligibility_etag(request, *args, **kwargs):
+    return eligibility_index.fingerprint()
+
+
+@method_decorator(catalog_cached(_eligibility_etag), name="get")
 class CarouselListAPIView(generics.ListAPIView):
-    serializer_class = CarouselSerializer
+    serializer_class = CarouselSerializer  # Paginated by REST_FRAMEWORK's default pagination class
 
     def get_queryset(self):
-        today = timezone.now().date()
-        queryset = Carousel.objects.filter(
-            is_active=True,
-            campaign__is_active=True,
-            campaign__start_date__lte=today,
-            campaign__end_date__gte=today
-        ).prefetch_related('ads') # Prefetch related ads to avoid N+1 queries
-        return queryset
+        # Prefetch related ads (with their campaign and keywords) to avoid N+1 queries
+        ads = Ad.objects.select_related('campaign').prefetch_related('target_keywords')
+        return _active_carousels().prefetch_related(Prefetch('ads', queryset=ads)).order_by('name')
+
+
+@method_decorator(catalog_cached(_eligibility_etag), name="get")
+class CarouselDetailAPIView(generics.RetrieveAPIView):
+    """
+    Devuelve un único carrusel activo con sólo sus anuncios elegibles y
+    programados, resueltos desde el índice de elegibilidad en memoria.
+    """
+    serializer_class = CarouselDetailSerializer
+
+    def get_queryset(self):
+        return _active_carousels()
+
+    def get_object(self):
+        carousel = super().get_object()
+        ad_ids = carousel.ads.values_list('pk', flat=True)
+        carousel.eligible_ads = eligibility_index.scheduled_ads(ad_ids)
+        return carousel
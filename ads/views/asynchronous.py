@@ -0,0 +1,143 @@
+"""
+Vistas asíncronas del camino de entrega (decisión, redirección y API de
+anuncios y carruseles) para el despliegue ASGI (`ADS_ASYNC_VIEWS`).
+
+Ninguna bloquea el bucle de eventos: las decisiones se toman sobre el índice
+de elegibilidad en memoria (que se reconstruye en un hilo aparte con
+`aprepare()`), los eventos se encolan en los búferes de escritura diferida y
+las pocas consultas restantes usan la API asíncrona del ORM.
+"""
+import json
+
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404, redirect, render
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from ads.catalog import catalog_cached
+from ads.delivery import (
+    Targeting,
+    choose_ad,
+    choose_ads,
+    eligibility_index,
+    record_click,
+    record_impression,
+)
+from ads.models import Ad
+from ads.serializers import (
+    AdBatchRequestSerializer,
+    AdSerializer,
+    CarouselDetailSerializer,
+)
+from ads.views.api import _active_carousels
+from ads.views.display import (
+    get_client_ip,
+    get_request_session_hash,
+    get_session_hash,
+    get_user_agent,
+    is_invalid_traffic,
+    logger,
+)
+
+
+async def ad_display(request):
+    """
+    Versión asíncrona de `ads.views.display.ad_display`.
+    """
+    await eligibility_index.aprepare()
+    session_hash = get_request_session_hash(request)
+    ad = choose_ad(Targeting.from_params(request.GET), session_hash=session_hash)
+
+    if ad:
+        record_impression(ad, session_hash, invalid=is_invalid_traffic(request))
+
+    return render(request, 'ads/ad_display.html', {'ad': ad})
+
+
+async def ad_redirect(request, ad_id):
+    """
+    Versión asíncrona de `ads.views.display.ad_redirect`.
+    """
+    ad = eligibility_index.get(ad_id) or await aget_object_or_404(
+        Ad.objects.only("id", "campaign_id", "target_url"), id=ad_id
+    )
+
+    user_ip = get_client_ip(request)
+    user_agent = get_user_agent(request)
+    session_hash = get_session_hash(user_ip, user_agent)
+
+    if not record_click(ad, user_ip, user_agent, session_hash):
+        logger.info(
+            "Click descartado (tráfico inválido o rate limiting) para ad_id=%s, session_id=%s",
+            ad_id,
+            session_hash,
+        )
+
+    return redirect(ad.target_url)
+
+
+@require_GET
+async def ad_list_api(request):
+    """
+    Versión asíncrona de `AdListAPIView`: un anuncio para la segmentación.
+    """
+    await eligibility_index.aprepare()
+    session_hash = get_request_session_hash(request)
+    ad = choose_ad(Targeting.from_params(request.GET), session_hash=session_hash)
+
+    if ad:
+        record_impression(ad, session_hash, invalid=is_invalid_traffic(request))
+        return JsonResponse(AdSerializer(ad, context={"request": request}).data)
+    return JsonResponse({"detail": "No ad available"}, status=404)
+
+
+@csrf_exempt
+@require_POST
+async def ad_batch_api(request):
+    """
+    Versión asíncrona de `AdBatchAPIView`.
+    """
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"detail": "JSON parse error"}, status=400)
+    serializer = AdBatchRequestSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    await eligibility_index.aprepare()
+    slots = serializer.validated_data['slots']
+    session_hash = get_request_session_hash(request)
+    ads = choose_ads(serializer.get_targeting(), len(slots), session_hash=session_hash)
+
+    invalid = is_invalid_traffic(request)
+    for ad in ads:
+        record_impression(ad, session_hash, invalid=invalid)
+
+    ads += [None] * (len(slots) - len(ads))
+    context = {"request": request}
+    return JsonResponse({
+        "slots": [
+            {"id": slot['id'], "ad": AdSerializer(ad, context=context).data if ad else None}
+            for slot, ad in zip(slots, ads)
+        ]
+    })
+
+
+async def _eligibility_etag(request, *args, **kwargs):
+    await eligibility_index.aprepare()
+    return eligibility_index.fingerprint()
+
+
+@require_GET
+@catalog_cached(_eligibility_etag)
+async def carousel_detail_api(request, pk):
+    """
+    Versión asíncrona de `CarouselDetailAPIView`.
+    """
+    carousel = await aget_object_or_404(_active_carousels(), pk=pk)
+    ad_ids = [ad_id async for ad_id in carousel.ads.values_list('pk', flat=True)]
+    carousel.eligible_ads = eligibility_index.scheduled_ads(ad_ids)
+    return JsonResponse(
+        CarouselDetailSerializer(carousel, context={"request": request}).data
+    )
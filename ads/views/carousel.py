@@ -1,23 +1,26 @@
 from django.shortcuts import render, get_object_or_404
 from django.utils import timezone
-from django.db.models import Q
-import datetime
 
+from ads.catalog import catalog_cached
+from ads.delivery import eligibility_index, weighted_shuffle
 from ads.models import Carousel
 
 
+def _carousel_etag(request, carousel_id):
+    return eligibility_index.fingerprint()
+
+
+@catalog_cached(_carousel_etag)
 def carousel_display(request, carousel_id):
     """
     Vista para mostrar un carrusel de anuncios de campañas activas y programadas.
+    La programación (días, franja horaria y zona horaria de la campaña) se
+    resuelve con la línea de tiempo del índice de elegibilidad.
     """
-    today = timezone.now().date()
-    now = timezone.now().time()
-    current_day_of_week = datetime.datetime.now().strftime('%a').upper() # Ej. MON, TUE
+    today = timezone.localdate()
 
-    # Obtener el carrusel y sus anuncios activos relacionados.
-    # Usamos .prefetch_related('ads') para cargar los anuncios de una vez y evitar consultas N+1.
     carousel = get_object_or_404(
-        Carousel.objects.prefetch_related("ads").filter(
+        Carousel.objects.filter(
             is_active=True,
             campaign__is_active=True,
             campaign__start_date__lte=today,
@@ -26,21 +29,11 @@ def carousel_display(request, carousel_id):
         id=carousel_id
     )
 
-    # Filtrar solo los anuncios activos dentro del carrusel
-    ads = carousel.ads.filter(is_active=True)
-
-    # Filtrar por horario
-    ads = ads.filter(
-        Q(display_start_time__lte=now) | Q(display_start_time__isnull=True),
-        Q(display_end_time__gte=now) | Q(display_end_time__isnull=True),
-    )
-
-    # Filtrar por día de la semana
-    ads = ads.filter(
-        Q(display_days_of_week__icontains=current_day_of_week) | Q(display_days_of_week__exact='')
-    )
+    # Sólo los anuncios elegibles y programados ahora, desde el índice en memoria
+    ads = eligibility_index.scheduled_ads(carousel.ads.values_list("pk", flat=True))
 
-    ads = ads.order_by("?")  # Orden aleatorio de los ads
+    # Orden aleatorio de los ads, ponderado por su peso de entrega y sin ORDER BY RANDOM()
+    ads = weighted_shuffle(ads)
 
     context = {
         "carousel": carousel,
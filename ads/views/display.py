@@ -1,12 +1,20 @@
-import datetime
 import hashlib
+import logging
 import uuid
 
 from django.shortcuts import render, get_object_or_404, redirect
-from django.utils import timezone
-from django.db.models import Q
 
-from ads.models import Ad, Click
+from ads.delivery import (
+    Targeting,
+    choose_ad,
+    eligibility_index,
+    record_click,
+    record_impression,
+    traffic_filter,
+)
+from ads.models import Ad
+
+logger = logging.getLogger(__name__)
 
 
 def get_client_ip(request):
@@ -28,87 +36,44 @@ def get_user_agent(request):
     return request.META.get("HTTP_USER_AGENT", "")
 
 
-def ad_display(request):
+def get_session_hash(user_ip, user_agent):
     """
-    Vista para mostrar un anuncio basado en la segmentación y campañas activas.
+    Genera un hash SHA-256 (hexadecimal) para identificar la sesión (IP + User Agent).
+    Esto ayuda a identificar de manera más única a un "usuario" o "dispositivo".
     """
-    # Obtener el contexto del usuario
-    user_age = request.GET.get('age')
-    user_gender = request.GET.get('gender')
-    user_location = request.GET.get('location')
-    page_keywords = request.GET.getlist('keywords')
-    ab_test_group = request.GET.get('ab_test_group')
-
-    # Filtrar anuncios activos y de campañas activas
-    today = timezone.now().date()
-    now = timezone.now().time()
-    current_day_of_week = datetime.datetime.now().strftime('%a').upper() # Ej. MON, TUE
-
-    ads = Ad.objects.filter(
-        is_active=True,
-        campaign__is_active=True,
-        campaign__start_date__lte=today,
-        campaign__end_date__gte=today
-    )
+    if user_ip and user_agent:
+        session_string = f"{user_ip}-{user_agent}"
+    else:
+        # Fallback a un UUID si no se puede obtener IP o User Agent (caso raro, bot)
+        session_string = str(uuid.uuid4())
+    return hashlib.sha256(session_string.encode()).hexdigest()
 
-    # Filtrar por horario
-    ads = ads.filter(
-        Q(display_start_time__lte=now) | Q(display_start_time__isnull=True),
-        Q(display_end_time__gte=now) | Q(display_end_time__isnull=True),
-    )
 
-    # Filtrar por día de la semana
-    ads = ads.filter(
-        Q(display_days_of_week__icontains=current_day_of_week) | Q(display_days_of_week__exact='')
-    )
+def get_request_session_hash(request):
+    """
+    Hash de sesión de la solicitud, igual al que se guarda en los clics.
+    """
+    return get_session_hash(get_client_ip(request), get_user_agent(request))
 
-    # Filtrar por edad
-    if user_age:
-        ads = ads.filter(
-            Q(target_age_min__lte=user_age) | Q(target_age_min__isnull=True),
-            Q(target_age_max__gte=user_age) | Q(target_age_max__isnull=True),
-        )
 
-    # Filtrar por género
-    if user_gender:
-        ads = ads.filter(Q(target_gender=user_gender) | Q(target_gender='A'))
-
-    # Filtrar por ubicación
-    if user_location:
-        ads = ads.filter(Q(target_location__icontains=user_location) | Q(target_location__exact=''))
-
-    # Filtrar por palabras clave
-    if page_keywords:
-        ads = ads.filter(Q(target_keywords__name__in=page_keywords) | Q(target_keywords__isnull=True)).distinct()
-
-    # Filtrar por grupo de prueba A/B
-    if ab_test_group:
-        ads = ads.filter(ab_test_group=ab_test_group)
-
-    # Seleccionar un anuncio al azar de los filtrados
-    ad = ads.order_by('?').first()
-
-    # Fallback a un anuncio general si no se encuentra ninguno
-    if not ad:
-        ad = Ad.objects.filter(
-            is_active=True,
-            campaign__is_active=True,
-            campaign__start_date__lte=today,
-            campaign__end_date__gte=today,
-            target_age_min__isnull=True,
-            target_age_max__isnull=True,
-            target_gender='A',
-            target_location__exact='',
-            target_keywords__isnull=True,
-            display_start_time__isnull=True,
-            display_end_time__isnull=True,
-            display_days_of_week__exact='',
-            ab_test_group__exact='', # Considerar anuncios sin grupo A/B
-        ).order_by('?').first()
+def is_invalid_traffic(request):
+    """
+    Indica si la solicitud es tráfico inválido (bots o rangos IP bloqueados).
+    """
+    return traffic_filter.classify(get_client_ip(request), get_user_agent(request)) is not None
+
+
+def ad_display(request):
+    """
+    Vista para mostrar un anuncio basado en la segmentación y campañas activas.
+    La decisión se toma sobre el índice de elegibilidad en memoria, sin consultas SQL.
+    """
+    targeting = Targeting.from_params(request.GET)
+    session_hash = get_request_session_hash(request)
+    ad = choose_ad(targeting, session_hash=session_hash)
 
     if ad:
-        ad.total_impressions += 1
-        ad.save()
+        record_impression(ad, session_hash, invalid=is_invalid_traffic(request))
 
     return render(request, 'ads/ad_display.html', {'ad': ad})
 
@@ -117,44 +82,29 @@ def ad_redirect(request, ad_id):
     """
     Vista para redirigir al usuario a la URL de destino del anuncio
     y registrar el clic de forma más robusta con rate limiting.
+    La redirección no espera a la base de datos: el clic se encola y se
+    inserta en lote desde un hilo en segundo plano.
     """
-    ad = get_object_or_404(Ad, id=ad_id)
+    # El índice de elegibilidad ya tiene la URL de destino de los anuncios activos;
+    # sólo se consulta la base de datos para anuncios que no están en él.
+    ad = eligibility_index.get(ad_id) or get_object_or_404(
+        Ad.objects.only("id", "campaign_id", "target_url"), id=ad_id
+    )
 
     user_ip = get_client_ip(request)
     user_agent = get_user_agent(request)
-
-    # Generar un hash para el session_id (IP + User Agent). Esto ayuda a identificar
-    # de manera más única a un "usuario" o "dispositivo" para el rate limiting.
-    if user_ip and user_agent:
-        session_string = f"{user_ip}-{user_agent}"
-    else:
-        # Fallback a un UUID si no se puede obtener IP o User Agent (caso raro, bot)
-        session_string = str(uuid.uuid4())
-    session_hash = hashlib.sha256(session_string.encode()).hexdigest()
+    session_hash = get_session_hash(user_ip, user_agent)
 
     # --- Lógica de prevención de clics repetidos/bots (Rate Limiting) ---
-    # Establece un umbral de tiempo (ej. 5 segundos) para considerar un clic como "reciente".
-    # Si un click de la misma "sesión" para el mismo anuncio ocurre dentro de este tiempo,
-    # no se registrará un nuevo click.
-    time_threshold = timezone.now() - datetime.timedelta(seconds=5)  # 5 segundos
-
-    # Busca si ya existe un click reciente para este anuncio y esta sesión
-    recent_click = Click.objects.filter(
-        ad=ad, session_id=session_hash, timestamp__gte=time_threshold
-    ).first()
-
-    # Solo registra el click si no hay uno reciente de la misma sesión
-    if not recent_click:
-        Click.objects.create(
-            ad=ad, user_ip=user_ip, user_agent=user_agent, session_id=session_hash
-        )
-        # Incrementa el contador total de clics del anuncio solo si el click es "válido"
-        ad.total_clicks += 1
-        ad.save()
-    else:
-        # Opcional: Podrías loggear que un clic fue bloqueado por rate limiting
-        print(
-            f"Click bloqueado por rate limiting para ad_id={ad_id}, session_id={session_hash}"
+    # Los clics de tráfico inválido (User-Agent de bot o IP en un rango bloqueado)
+    # sólo se cuentan aparte. Si un click de la misma "sesión" para el mismo anuncio
+    # ocurre dentro de ADS_CLICK_DEDUP_SECONDS (5 segundos por defecto), no se
+    # registrará un nuevo click. La comprobación se hace en un mapa en memoria con caducidad.
+    if not record_click(ad, user_ip, user_agent, session_hash):
+        logger.info(
+            "Click descartado (tráfico inválido o rate limiting) para ad_id=%s, session_id=%s",
+            ad_id,
+            session_hash,
         )
 
     # Finalmente, redirige al usuario a la URL de destino del anuncio
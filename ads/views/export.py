@@ -0,0 +1,66 @@
+import datetime
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from ads.exports import CSV, EXPORTS, FORMATS, aexport_stream, export_stream
+
+
+def _date(value):
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+
+def _id(value):
+    return int(value) if value else None
+
+
+@require_GET
+@login_required
+def export_events(request, kind):
+    """
+    Descarga en flujo los eventos crudos de `kind` (clicks, impressions o
+    conversions) en CSV o NDJSON (`?format=`), filtrados por `start_date`,
+    `end_date` (AAAA-MM-DD), `ad` y `campaign`, y comprimidos si `gzip=1`.
+    Requiere el permiso de lectura del modelo exportado.
+    """
+    if kind not in EXPORTS:
+        raise Http404("Tipo de evento desconocido.")
+    model = EXPORTS[kind][0]
+    if not request.user.has_perm(f"{model._meta.app_label}.view_{model._meta.model_name}"):
+        raise PermissionDenied
+
+    export_format = request.GET.get("format", CSV)
+    if export_format not in FORMATS:
+        return HttpResponseBadRequest("Formato no soportado (use csv o ndjson).")
+    try:
+        filters = {
+            "start_date": _date(request.GET.get("start_date")),
+            "end_date": _date(request.GET.get("end_date")),
+            "ad_id": _id(request.GET.get("ad")),
+            "campaign_id": _id(request.GET.get("campaign")),
+        }
+    except ValueError:
+        return HttpResponseBadRequest("Parámetros inválidos: fechas AAAA-MM-DD e ids enteros.")
+    compress = request.GET.get("gzip") in ("1", "true")
+
+    filename = "-".join(
+        [kind] + [value.isoformat() for value in (filters["start_date"], filters["end_date"]) if value]
+    ) + f".{export_format}"
+    # Con ASGI el flujo debe ser asíncrono para enviarse a medida que se genera.
+    stream = aexport_stream if getattr(settings, "ADS_ASYNC_VIEWS", False) else export_stream
+    if compress:
+        response = StreamingHttpResponse(
+            stream(kind, export_format, compress=True, **filters),
+            content_type="application/gzip",
+        )
+        filename += ".gz"
+    else:
+        response = StreamingHttpResponse(
+            stream(kind, export_format, **filters),
+            content_type=f"{FORMATS[export_format]}; charset=utf-8",
+        )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
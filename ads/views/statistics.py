@@ -3,13 +3,21 @@ import datetime
 import json
 
 from django.shortcuts import render
-from django.db.models import Count, Q, Sum
-from django.db.models.functions import TruncHour, TruncDay
+from django.db.models import Max, Sum
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.urls import reverse
 
 
-from ads.models import Ad, Click, Conversion
+from ads.analytics import (
+    STANDARD_ERROR,
+    ab_test_report,
+    cached_periods,
+    cached_statistic,
+    date_range_q,
+    merge_sketches,
+)
+from ads.models import AdHourlyStats, RollupWatermark
 
 # --- Funciones Auxiliares para la Vista de Estadísticas ---
 
@@ -30,145 +38,60 @@ def _parse_date_param(request, param_name, date_format='%Y-%m-%d'):
             )
     return None
 
-def _get_clicks_filter_q(start_date, end_date):
+def _get_global_click_stats(start_date, end_date):
     """
-    Construye un objeto Q para filtrar los clics por rango de fechas.
+    Clics del rango y sketch HyperLogLog (serializado) de sus clics únicos,
+    fusionando los sketches horarios.
     """
-    clicks_filter = Q()
-    if start_date:
-        clicks_filter &= Q(timestamp__date__gte=start_date)
-    if end_date:
-        # Filtrar hasta el final del día de la fecha de fin
-        clicks_filter &= Q(timestamp__date__lte=end_date)
-    return clicks_filter
+    rollups_queryset = AdHourlyStats.objects.filter(date_range_q("hour", start_date, end_date))
+    total_global_clicks = rollups_queryset.aggregate(total=Sum("clicks"))["total"] or 0
+    sketches = rollups_queryset.filter(unique_sketch__isnull=False) \
+                               .values_list("unique_sketch", flat=True)
+    return total_global_clicks, merge_sketches(sketches.iterator()).to_bytes()
 
-def _get_global_click_stats(clicks_queryset):
+def _merge_global_click_stats(parts):
     """
-    Calcula y retorna las estadísticas globales de clics.
+    Suma los clics de varios periodos y estima sus clics únicos
+    (error estándar de ~2.3 %, ver ads.analytics.hll).
     """
-    total_global_clicks = clicks_queryset.count()
-    total_unique_global_clicks = clicks_queryset.values("session_id").distinct().count()
+    total_global_clicks = sum(clicks for clicks, _ in parts)
+    total_unique_global_clicks = merge_sketches(sketch for _, sketch in parts).estimate()
     return total_global_clicks, total_unique_global_clicks
 
-def _get_ad_click_stats(clicks_filter_q):
+def _percent(value):
+    return round(value * 100, 2)
+
+def _get_ab_test_stats(start_date, end_date):
     """
-    Calcula y retorna las estadísticas por anuncio, incluyendo CTR.
+    Comparación de los grupos A/B de cada campaña con su grupo de control
+    (ver ads.analytics.ab), con las tasas expresadas en porcentaje.
     """
-    ads_with_stats = Ad.objects.annotate(
-        total_clicks_count=Count("clicks", filter=clicks_filter_q),
-        unique_clicks_count=Count(
-            "clicks__session_id", distinct=True, filter=clicks_filter_q
-        ),
-    ).order_by("-total_clicks_count")
-
-    ads_clicks_data = []
-    ads_for_table = []
-
-    for ad in ads_with_stats:
-        ctr = 0.0
-        if ad.total_impressions > 0:
-            ctr = (ad.total_clicks_count / ad.total_impressions) * 100
-
-        if ad.total_clicks_count > 0 or ad.total_impressions > 0:
-            ads_clicks_data.append(
+    experiments = []
+    for experiment in ab_test_report(start_date, end_date):
+        arms = []
+        for arm in experiment["arms"]:
+            ctr, cvr = arm["ctr"], arm["cvr"]
+            arms.append(
                 {
-                    "name": ad.name,
-                    "total": ad.total_clicks_count,
-                    "unique": ad.unique_clicks_count,
-                    "impressions": ad.total_impressions,
-                    "ctr": round(ctr, 2),
+                    "group": arm["group"],
+                    "is_control": arm["is_control"],
+                    "impressions": arm["impressions"],
+                    "clicks": arm["clicks"],
+                    "conversions": arm["conversions"],
+                    "ads": len(arm["ads"]),
+                    "ctr": _percent(ctr["rate"]),
+                    "ctr_low": _percent(ctr["low"]),
+                    "ctr_high": _percent(ctr["high"]),
+                    "cvr": _percent(cvr["rate"]),
+                    "cvr_low": _percent(cvr["low"]),
+                    "cvr_high": _percent(cvr["high"]),
+                    "ctr_lift": None if arm["is_control"] else _percent(ctr["lift"]),
+                    "ctr_p_value": None if arm["is_control"] else round(ctr["p_value"], 4),
+                    "ctr_significant": not arm["is_control"] and ctr["sequential_significant"],
                 }
             )
-            # También para la tabla de la plantilla
-            ad.ctr = round(ctr, 2)
-            ads_for_table.append(ad)
-
-    return ads_clicks_data, ads_for_table
-
-def _get_timeline_click_stats(clicks_queryset, selected_date):
-    """
-    Prepara los datos para el gráfico de línea de tiempo (por día u hora).
-    """
-    clicks_timeline_data = []
-    is_hourly_view = False
-    timeline_title = "Clicks por Día"
-    x_axis_label = "Fecha"
-
-    if selected_date:
-        is_hourly_view = True
-        timeline_title = f"Clicks por Hora para {selected_date.strftime('%Y-%m-%d')}"
-        x_axis_label = "Hora del Día"
-
-        hourly_clicks_queryset = (
-            clicks_queryset.filter(timestamp__date=selected_date)
-            .annotate(hour=TruncHour("timestamp"))
-            .values("hour")
-            .annotate(count=Count("id"))
-            .order_by("hour")
-        )
-
-        for item in hourly_clicks_queryset:
-            clicks_timeline_data.append(
-                {"time": item["hour"].strftime("%H:%M"), "count": item["count"]}
-            )
-    else:
-        daily_clicks_queryset = (
-            clicks_queryset.annotate(date=TruncDay("timestamp"))
-            .values("date")
-            .annotate(count=Count("id"))
-            .order_by("date")
-        )
-
-        for item in daily_clicks_queryset:
-            clicks_timeline_data.append(
-                {"time": item["date"].strftime("%Y-%m-%d"), "count": item["count"]}
-            )
-
-    return clicks_timeline_data, is_hourly_view, timeline_title, x_axis_label
-
-def _get_historical_impressions_stats(start_date, end_date):
-    """
-    Calcula las impresiones históricas por día.
-    """
-    impressions_queryset = Ad.objects.filter(total_impressions__gt=0)
-    if start_date:
-        impressions_queryset = impressions_queryset.filter(updated_at__date__gte=start_date)
-    if end_date:
-        impressions_queryset = impressions_queryset.filter(updated_at__date__lte=end_date)
-
-    daily_impressions = impressions_queryset.annotate(date=TruncDay('updated_at')) \
-                                            .values('date') \
-                                            .annotate(total_impressions=Sum('total_impressions')) \
-                                            .order_by('date')
-    return [{'date': item['date'].strftime('%Y-%m-%d'), 'count': item['total_impressions']} for item in daily_impressions]
-
-def _get_historical_conversions_stats(start_date, end_date):
-    """
-    Calcula las conversiones históricas por día y tipo.
-    """
-    conversions_queryset = Conversion.objects.all()
-    if start_date:
-        conversions_queryset = conversions_queryset.filter(timestamp__date__gte=start_date)
-    if end_date:
-        conversions_queryset = conversions_queryset.filter(timestamp__date__lte=end_date)
-
-    daily_conversions = conversions_queryset.annotate(date=TruncDay('timestamp')) \
-                                            .values('date', 'conversion_type') \
-                                            .annotate(count=Count('id')) \
-                                            .order_by('date', 'conversion_type')
-
-    # Reestructurar para Plotly: un diccionario por tipo de conversión
-    conversions_by_type = {}
-    for item in daily_conversions:
-        date_str = item['date'].strftime('%Y-%m-%d')
-        conv_type = item['conversion_type']
-        count = item['count']
-        if conv_type not in conversions_by_type:
-            conversions_by_type[conv_type] = {'dates': [], 'counts': []}
-        conversions_by_type[conv_type]['dates'].append(date_str)
-        conversions_by_type[conv_type]['counts'].append(count)
-
-    return conversions_by_type
+        experiments.append({"campaign": experiment["campaign"], "arms": arms})
+    return experiments
 
 @login_required
 def ad_statistics(request):
@@ -180,38 +103,63 @@ def ad_statistics(request):
     end_date = _parse_date_param(request, 'end_date')
     selected_date = _parse_date_param(request, 'selected_date')
 
-    # 2. Construir filtro base para clics
-    clicks_filter_q = _get_clicks_filter_q(start_date, end_date)
-    clicks_queryset = Click.objects.filter(clicks_filter_q)
-
-    # 3. Obtener estadísticas globales
-    total_global_clicks, total_unique_global_clicks = _get_global_click_stats(clicks_queryset)
-
-    # 4. Obtener estadísticas por anuncio
-    ads_clicks_data, ads_for_table = _get_ad_click_stats(clicks_filter_q)
-
-    # 5. Obtener datos para el gráfico de línea de tiempo de clics
-    clicks_timeline_data, is_hourly_view, timeline_title, x_axis_label = \
-        _get_timeline_click_stats(clicks_queryset, selected_date)
-
-    # 6. Obtener datos históricos de impresiones y conversiones
-    historical_impressions_data = _get_historical_impressions_stats(start_date, end_date)
-    historical_conversions_data = _get_historical_conversions_stats(start_date, end_date)
+    # 2. Obtener estadísticas globales (en la caché de estadísticas, ver ads.analytics.caching;
+    # los días cerrados se guardan aparte y sólo se vuelve a leer el día en curso)
+    total_global_clicks, total_unique_global_clicks = cached_statistic(
+        "global_clicks",
+        {"start_date": start_date, "end_date": end_date},
+        lambda: cached_periods(
+            "global_clicks_periods",
+            {},
+            _get_global_click_stats,
+            _merge_global_click_stats,
+            start_date,
+            end_date,
+        ),
+        end_date,
+    )
+
+    # 3. Comparar los grupos de las pruebas A/B
+    ab_experiments = _get_ab_test_stats(start_date, end_date)
+
+    # 4. Los gráficos y el ranking de anuncios se cargan desde la API de
+    # estadísticas, que pagina y reduce las series a los puntos que se dibujan.
+    range_params = {
+        key: value.isoformat()
+        for key, value in (("start_date", start_date), ("end_date", end_date))
+        if value
+    }
+    if selected_date:
+        timeline_title = f"Clicks por Hora para {selected_date.strftime('%Y-%m-%d')}"
+        x_axis_label = "Hora del Día"
+        timeline_params = {"selected_date": selected_date.isoformat()}
+    else:
+        timeline_title = "Clicks por Día"
+        x_axis_label = "Fecha"
+        timeline_params = range_params
 
-    # 7. Preparar el contexto para la plantilla
+    # 5. Preparar el contexto para la plantilla
     context = {
-        "ads_with_clicks": ads_for_table,
+        "ab_experiments": ab_experiments,
         "total_global_clicks": total_global_clicks,
         "total_unique_global_clicks": total_unique_global_clicks,
-        "ads_clicks_data_json": json.dumps(ads_clicks_data),
-        "clicks_timeline_data_json": json.dumps(clicks_timeline_data),
-        "historical_impressions_data_json": json.dumps(historical_impressions_data),
-        "historical_conversions_data_json": json.dumps(historical_conversions_data),
+        "unique_clicks_error": round(STANDARD_ERROR * 100, 1),
+        "statistics_api_json": json.dumps(
+            {
+                "ads": reverse("ads:ad_statistics_api"),
+                "timeline": reverse("ads:statistics_timeline_api"),
+                "range": range_params,
+                "timeline_range": timeline_params,
+            }
+        ),
         "start_date_str": start_date.isoformat() if start_date else '',
         "end_date_str": end_date.isoformat() if end_date else '',
         "selected_date_str": selected_date.isoformat() if selected_date else '',
-        "is_hourly_view": is_hourly_view,
+        "is_hourly_view": bool(selected_date),
         "timeline_title": timeline_title,
         "x_axis_label": x_axis_label,
+        "rollups_updated_at": RollupWatermark.objects.aggregate(
+            updated_at=Max("updated_at")
+        )["updated_at"],
     }
     return render(request, "ads/ad_statistics.html", context)
@@ -8,5 +8,6 @@ declare namespace AdSystemSDK {
     }
 
     function displayAd(containerId: string, options?: AdOptions): Promise<void>;
+    function displayAds(containerIds: string[], options?: AdOptions): Promise<void>;
     function displayCarousel(containerId: string, carouselId: number): Promise<void>;
 }
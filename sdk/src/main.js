@@ -1,5 +1,19 @@
 const API_BASE_URL = 'http://127.0.0.1:8000/ads/api/'; // Replace with your Django API base URL
 
+/**
+ * Renders a single ad (as returned by the API) inside a container.
+ * @param {HTMLElement} container The element where the ad will be displayed.
+ * @param {object} ad The serialized ad.
+ */
+const renderAd = (container, ad) => {
+    container.innerHTML = `
+        <a href="${ad.target_url}" target="_blank" rel="noopener noreferrer">
+            <img src="${ad.image}" alt="${ad.name}" style="max-width: 100%; height: auto;">
+        </a>
+        <p>${ad.name}</p>
+    `;
+};
+
 const AdSystemSDK = {
     /**
      * Fetches and displays a single ad in the specified container.
@@ -38,18 +52,63 @@ const AdSystemSDK = {
                 return;
             }
             const ad = await response.json();
-            container.innerHTML = `
-                <a href="${ad.target_url}" target="_blank" rel="noopener noreferrer">
-                    <img src="${ad.image}" alt="${ad.name}" style="max-width: 100%; height: auto;">
-                </a>
-                <p>${ad.name}</p>
-            `;
+            renderAd(container, ad);
         } catch (error) {
             console.error('AdSystemSDK: Error fetching ad:', error);
             container.innerHTML = '<p>Failed to load ad.</p>';
         }
     },
 
+    /**
+     * Fetches ads for several slots of the page in a single request and displays them.
+     * Each slot gets a different ad; all slots share the same targeting options.
+     * @param {string[]} containerIds The IDs of the HTML elements where the ads will be displayed.
+     * @param {object} [options={}] Targeting and A/B testing options (same as displayAd).
+     */
+    displayAds: async (containerIds, options = {}) => {
+        const containers = {};
+        containerIds.forEach(containerId => {
+            const container = document.getElementById(containerId);
+            if (container) {
+                containers[containerId] = container;
+            } else {
+                console.error(`AdSystemSDK: Container with ID '${containerId}' not found.`);
+            }
+        });
+        const slotIds = Object.keys(containers);
+        if (slotIds.length === 0) {
+            return;
+        }
+
+        try {
+            const response = await fetch(`${API_BASE_URL}ads/batch/`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ ...options, slots: slotIds.map(id => ({ id })) }),
+            });
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const data = await response.json();
+            data.slots.forEach(slot => {
+                const container = containers[slot.id];
+                if (!container) {
+                    return;
+                }
+                if (slot.ad) {
+                    renderAd(container, slot.ad);
+                } else {
+                    container.innerHTML = '<p>No ad available for this targeting.</p>';
+                }
+            });
+        } catch (error) {
+            console.error('AdSystemSDK: Error fetching ads:', error);
+            slotIds.forEach(id => {
+                containers[id].innerHTML = '<p>Failed to load ad.</p>';
+            });
+        }
+    },
+
     /**
      * Fetches and displays a carousel of ads in the specified container.
      * @param {string} containerId The ID of the HTML element where the carousel will be displayed.
@@ -63,17 +122,17 @@ const AdSystemSDK = {
         }
 
         try {
-            const response = await fetch(`${API_BASE_URL}carousels/`);
+            // The detail endpoint returns only this carousel with its eligible, scheduled ads.
+            const response = await fetch(`${API_BASE_URL}carousels/${carouselId}/`);
             if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-            const carousels = await response.json();
-            const carousel = carousels.find(c => c.id === carouselId);
-
-            if (!carousel) {
-                container.innerHTML = '<p>Carousel not found or not active.</p>';
+                if (response.status === 404) {
+                    container.innerHTML = '<p>Carousel not found or not active.</p>';
+                } else {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
                 return;
             }
+            const carousel = await response.json();
 
             if (!carousel.ads || carousel.ads.length === 0) {
                 container.innerHTML = '<p>No ads in this carousel.</p>';